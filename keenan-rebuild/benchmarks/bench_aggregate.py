@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for aggregate.aggregate_responses.
+
+Generates synthetic flattened survey responses (see aggregate.RESPONSE_COLUMNS)
+at increasing sizes and times turning them into every figure table, and
+computing the peer-group percentile benchmarks (benchmarking.peer_benchmarks).
+
+Usage:
+    python benchmarks/bench_aggregate.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from aggregate import REGIONS, aggregate_responses
+from benchmarking import peer_benchmarks
+
+
+def _choice(rng, options, weights, n):
+    weights = np.asarray(weights, dtype=float)
+    return rng.choice(np.asarray(options, dtype=object), size=n, p=weights / weights.sum())
+
+
+def _multi(rng, options, rates, n):
+    """Build ';'-joined multi-select answers with per-option selection rates."""
+    picks = rng.random((n, len(options))) < np.asarray(rates)
+    joined = np.full(n, '', dtype=object)
+    for option, picked in zip(options, picks.T):
+        joined[picked] = joined[picked] + option + ';'
+    return joined
+
+
+def synthetic_responses(n, seed=0):
+    """
+    Generate n synthetic responses shaped like the production survey.
+
+    Args:
+        n: Number of responses
+        seed: Random seed
+
+    Returns:
+        DataFrame with the columns aggregate.py reads
+    """
+    rng = np.random.default_rng(seed)
+    region = _choice(rng, REGIONS, [3, 4, 2, 2], n)
+    region_pepm = pd.Series(region).map(dict(zip(REGIONS, [687, 623, 548, 758]))).to_numpy()
+    return pd.DataFrame({
+        'organization_id': np.arange(n),
+        'status': _choice(rng, ['submitted', 'completed', 'in_progress', 'draft'], [80, 10, 7, 3], n),
+        'region': region,
+        'plans_offered': _multi(rng, ['PPO', 'HMO', 'HDHP', 'POS'], [0.785, 0.452, 0.678, 0.123], n),
+        'funding': _choice(rng, ['Self-funded', 'Fully insured', 'Level funded'], [72.1, 24.6, 3.3], n),
+        'network': _choice(rng, ['Regional PPO', 'National PPO', 'Reference-based pricing', 'Regional HMO'],
+                           [48.7, 35.9, 8.2, 7.2], n),
+        'own_hospital_cost_method': _choice(rng, ['DRG', 'Per diem', 'Percent of charges', 'Case rate'],
+                                            [34.8, 28.7, 21.7, 14.8], n),
+        'pepm': rng.normal(region_pepm, 60).round(),
+        'no_cost_ee_only': rng.random(n) < 0.22,
+        'telemedicine_access': rng.random(n) < 0.893,
+        'teletherapy_access': rng.random(n) < 0.674,
+        'tele_copay_relationship': _choice(rng, ['Lower than PCP', 'Same as PCP', 'Higher than PCP'],
+                                           [45.2, 38.9, 15.9], n),
+        'stop_loss_attachment': rng.choice([125_000, 175_000, 225_000, 275_000, 300_000, 500_000], size=n,
+                                           p=np.array([18.9, 28.4, 24.7, 14.2, 6.9, 6.9]) / 100),
+        'hdhp_offering': _choice(rng, ['HDHP Only', 'HDHP + Traditional', 'No HDHP'], [12.4, 55.4, 32.2], n),
+        'dental_plans': _multi(rng, ['DPPO', 'DHMO', 'Dental Indemnity', 'Discount Plans'],
+                               [0.782, 0.346, 0.089, 0.123], n),
+        'union_representation': rng.random(n) < 0.413,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'responses':>10} {'figures s':>10} {'ns/response':>12} {'peers s':>10} {'ns/response':>12}")
+    for n in args.sizes:
+        responses = synthetic_responses(n)
+        timings = []
+        for func in (aggregate_responses, peer_benchmarks):
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                func(responses)
+                best = min(best, time.perf_counter() - start)
+            timings.append(best)
+        print(f"{n:>10,} " + ' '.join(f"{best:>10.3f} {best / n * 1e9:>12.0f}" for best in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Output size and cost of --compact (src/compact.py).
+
+Renders every manifest page's PDF and PNGs the way a cached or --jobs build
+does (one PDF fragment per page, merged), then times compacting the merged
+PDF and each PNG and reports bytes before and after. --copies repeats the
+manifest to stand in for longer reports.
+
+No PDF rasteriser is required to check the result: every font a page refers
+to must still give each code the page's original font defined the same
+glyph program and width, and every page's extracted text must be unchanged.
+PNGs are compared pixel by pixel and the mean and worst channel error
+reported. Exits 1 if any PDF check fails.
+
+Usage:
+    python benchmarks/bench_compact.py [--data-dir data] [--copies 1 10] [--png 150 thumb]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import numpy as np
+from PIL import Image
+from pypdf import PdfReader
+
+from build_report import PNG_VARIANTS, default_data_dir, merge_pdf_bytes, render_page, warm_up
+from compact import _differences, compact_pdf, compact_png, format_bytes
+from registry import load_manifest
+
+
+def page_glyphs(page):
+    """Map each font resource of a page to {code: (glyph program, width)}."""
+    glyphs = {}
+    for key, ref in page['/Resources'].get('/Font', {}).items():
+        font = ref.get_object()
+        if font.get('/Subtype') != '/Type3':
+            continue
+        widths = font['/Widths'].get_object()
+        procs = font['/CharProcs'].get_object()
+        glyphs[key] = {code: (procs[name].get_object().get_data(), widths[code - font['/FirstChar']])
+                       for code, name in _differences(font).items()}
+    return glyphs
+
+
+def same_pdf_content(original, compacted):
+    """
+    Check a compacted PDF against the original.
+
+    Returns:
+        List of problems found, empty if none
+    """
+    before, after = PdfReader(io.BytesIO(original)), PdfReader(io.BytesIO(compacted))
+    if len(before.pages) != len(after.pages):
+        return [f"{len(before.pages)} pages became {len(after.pages)}"]
+    problems = []
+    for number, (old, new) in enumerate(zip(before.pages, after.pages), start=1):
+        new_glyphs = page_glyphs(new)
+        for key, codes in page_glyphs(old).items():
+            if any(new_glyphs.get(key, {}).get(code) != glyph for code, glyph in codes.items()):
+                problems.append(f"page {number}: font {key} draws different glyphs")
+        if old.extract_text() != new.extract_text():
+            problems.append(f"page {number}: extracted text differs")
+    return problems
+
+
+def pixel_error(original, compacted):
+    """Return (mean, worst) absolute RGB difference between two PNGs, 0-255."""
+    with Image.open(io.BytesIO(original)) as a, Image.open(io.BytesIO(compacted)) as b:
+        diff = np.abs(np.asarray(a.convert('RGB'), dtype=np.int16) - np.asarray(b.convert('RGB'), dtype=np.int16))
+    return float(diff.mean()), int(diff.max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=default_data_dir(), help="Directory holding the page CSV files")
+    parser.add_argument('--copies', type=int, nargs='+', default=[1, 10], help="Manifest repetitions per report")
+    parser.add_argument('--png', nargs='*', default=['150', 'thumb'], choices=list(PNG_VARIANTS),
+                        help="PNG variants to render and compact")
+    args = parser.parse_args()
+
+    warm_up()
+    pages = load_manifest()
+    results = [render_page((page, args.data_dir, ('pdf',) + tuple(args.png))) for page in pages]
+    failed = [name for name, rendered, _ in results if rendered is None]
+    if failed:
+        print(f"Pages failed to render: {', '.join(failed)}")
+        sys.exit(1)
+
+    print(f"{'output':<18} {'before':>10} {'after':>10} {'saved':>6} {'seconds':>8}")
+    problems = []
+    for copies in args.copies:
+        merged, page_count = merge_pdf_bytes([rendered['pdf'] for _ in range(copies) for _, rendered, _ in results])
+        start = time.perf_counter()
+        compacted = compact_pdf(merged)
+        seconds = time.perf_counter() - start
+        print(f"{f'PDF {page_count} pages':<18} {format_bytes(len(merged)):>10} {format_bytes(len(compacted)):>10} "
+              f"{1 - len(compacted) / len(merged):6.0%} {seconds:8.2f}")
+        problems += [f"{copies} copies, {problem}" for problem in same_pdf_content(merged, compacted)]
+
+    for variant in args.png:
+        sheets = [sheet for _, rendered, _ in results for sheet in rendered[variant]]
+        start = time.perf_counter()
+        compacted = [compact_png(sheet) for sheet in sheets]
+        seconds = time.perf_counter() - start
+        before, after = sum(map(len, sheets)), sum(map(len, compacted))
+        errors = [pixel_error(sheet, small) for sheet, small in zip(sheets, compacted)]
+        print(f"{f'PNG {variant} x{len(sheets)}':<18} {format_bytes(before):>10} {format_bytes(after):>10} "
+              f"{1 - after / before:6.0%} {seconds:8.2f}   mean error {np.mean([e[0] for e in errors]):.2f}, "
+              f"worst {max(e[1] for e in errors)}/255")
+
+    for problem in problems:
+        print(f"  {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Throughput and peak memory of the database bulk loader (src/dbload.py).
+
+Builds a SQLite stand-in for the survey_responses table (database/schema.sql)
+holding synthetic responses (see bench_aggregate.synthetic_responses) as
+JSON payloads, then in a fresh interpreter per case times turning the table
+into the figure tables and records the peak RSS:
+
+- fetchall    every row fetched, decoded one payload at a time into one
+              DataFrame, then aggregate.aggregate_responses
+- chunked     dbload.load_figures: chunked cursor, one decode per chunk
+
+The chunked loader should keep the peak flat as the table grows. Exits 1 if
+its tables differ from aggregate_responses on the same data.
+
+Usage:
+    python benchmarks/bench_dbload.py [--rows 100000 1000000] [--chunk-rows 50000]
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_aggregate import synthetic_responses
+from bench_ingest import same_outputs
+
+CHILD = r'''
+import json, resource, sqlite3, sys, time
+sys.path.insert(0, {src_dir!r})
+import pandas as pd
+from aggregate import aggregate_responses
+from dbload import ConnectionPool, load_figures
+
+start = time.perf_counter()
+if {case!r} == 'fetchall':
+    conn = sqlite3.connect({path!r})
+    rows = conn.execute("SELECT organization_id, status, data FROM survey_responses").fetchall()
+    records = [dict(json.loads(data), organization_id=org, status=status) for org, status, data in rows]
+    del rows
+    tables = aggregate_responses(pd.DataFrame(records))
+else:
+    with ConnectionPool('sqlite:///' + {path!r}) as pool:
+        tables, _ = load_figures(pool, chunk_rows={chunk_rows!r})
+elapsed = time.perf_counter() - start
+for csv_name, df in tables.items():
+    df.to_csv({out_dir!r} + '/' + csv_name, index=False)
+# ru_maxrss would include the parent's peak from before exec; VmHWM is this process's own
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+with open('/proc/self/status') as f:
+    peak = next((int(line.split()[1]) for line in f if line.startswith('VmHWM:')), peak)
+print(json.dumps([peak, elapsed]))
+'''
+
+SCHEMA = """
+CREATE TABLE survey_responses (
+    id INTEGER PRIMARY KEY,
+    organization_id INTEGER NOT NULL,
+    user_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'draft'
+        CHECK (status IN ('draft', 'in_progress', 'completed', 'submitted')),
+    progress INTEGER DEFAULT 0,
+    data TEXT NOT NULL DEFAULT '{}',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    submitted_at TEXT
+)
+"""
+
+
+def build_database(path, responses, batch_rows=100_000):
+    """Write responses into a SQLite survey_responses table, answers as JSON in data."""
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    answers = [col for col in responses.columns if col not in ('organization_id', 'status')]
+    for offset in range(0, len(responses), batch_rows):
+        batch = responses.iloc[offset:offset + batch_rows]
+        payloads = batch[answers].to_json(orient='records', lines=True).splitlines()
+        conn.executemany("INSERT INTO survey_responses (organization_id, status, progress, data) "
+                         "VALUES (?, ?, 100, ?)",
+                         zip(batch['organization_id'].tolist(), batch['status'].tolist(), payloads))
+    conn.commit()
+    conn.close()
+
+
+def run_case(case, path, out_dir, chunk_rows):
+    """Run one case in a child interpreter; return (peak KiB, seconds)."""
+    os.makedirs(out_dir)
+    code = CHILD.format(src_dir=SRC_DIR, case=case, path=path, out_dir=out_dir, chunk_rows=chunk_rows)
+    result = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help="Table sizes")
+    parser.add_argument('--chunk-rows', type=int, default=50_000, help="Rows per chunk for the loader")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_dbload_')
+    failed = False
+    try:
+        print(f"{'case':<9} {'rows':>10} {'db MB':>7} {'peak MB':>8} {'seconds':>8} {'rows/s':>10}")
+        for rows in args.rows:
+            path = os.path.join(work, f'survey_{rows}.db')
+            build_database(path, synthetic_responses(rows))
+            size = os.path.getsize(path) / 1e6
+            for case in ('fetchall', 'chunked'):
+                peak, seconds = run_case(case, path, os.path.join(work, f'{case}_{rows}'), args.chunk_rows)
+                print(f"{case:<9} {rows:>10,} {size:7.1f} {peak / 1024:8.0f} {seconds:8.2f} {rows / seconds:10,.0f}")
+            if not same_outputs(os.path.join(work, f'fetchall_{rows}'), os.path.join(work, f'chunked_{rows}')):
+                print("  chunked tables differ from aggregate_responses")
+                failed = True
+            os.remove(path)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+One faceted page versus one page per region.
+
+For each --regions count, builds a regional breakdown (plan mix per region)
+two ways and saves each to a PDF: as one charts.bar_chart page per region,
+and as charts.faceted_bar_chart small multiples. Prints the page count and
+best-of --repeat build and save time of each.
+
+Usage:
+    python benchmarks/bench_facets.py [--regions 10 40] [--repeat 3]
+"""
+import argparse
+import io
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+
+from charts import bar_chart, facet_sheets, faceted_bar_chart
+from harness import best_of
+
+PLANS = ('PPO', 'HMO', 'EPO', 'HDHP', 'POS')
+
+
+def regional_frame(regions, seed=0):
+    """Return a long-form Region, Plan, Percent table."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Region': np.repeat([f'Region {i + 1}' for i in range(regions)], len(PLANS)),
+                         'Plan': list(PLANS) * regions,
+                         'Percent': rng.uniform(1, 99, regions * len(PLANS)).round(1)})
+
+
+def save_pages(figures):
+    """Save figures into one in-memory PDF, closing each; return the page count."""
+    pages = 0
+    with PdfPages(io.BytesIO()) as pdf:
+        for fig in figures:
+            pdf.savefig(fig, bbox_inches='tight')
+            plt.close(fig)
+            pages += 1
+    return pages
+
+
+def per_region(df):
+    return (bar_chart(group, 'Plan', 'Percent', f"Plan Mix – {region}", ylabel='Percentage of Organizations')
+            for region, group in df.groupby('Region', sort=False))
+
+
+def faceted(df):
+    return (faceted_bar_chart(**sheet) for sheet in
+            facet_sheets(df, 'Region', 'Plan Mix by Region', x_col='Plan', y_col='Percent',
+                         ylabel='Percentage of Organizations'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--regions', type=int, nargs='+', default=[10, 40], help="Region counts")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the best is kept")
+    args = parser.parse_args()
+
+    print(f"{'regions':>7} {'layout':<11} {'pages':>5} {'seconds':>8}")
+    for regions in args.regions:
+        df = regional_frame(regions)
+        for label, figures in (('per-region', per_region), ('faceted', faceted)):
+            pages = save_pages(figures(df))
+            seconds = best_of(args.repeat, lambda: save_pages(figures(df)))
+            print(f"{regions:>7} {label:<11} {pages:>5} {seconds:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
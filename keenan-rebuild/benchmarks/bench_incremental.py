@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Incremental aggregation versus full recomputation.
+
+Folds --history synthetic responses into a fresh IncrementalStore, then
+times folding new batches of each --batches size and writing the changed
+tables, against recomputing every table from all responses with
+aggregate.aggregate_responses. Also checks the store's tables match the
+full recomputation (apart from the order of tied categories).
+
+Usage:
+    python benchmarks/bench_incremental.py [--history 1000000] [--batches 10 100 1000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from aggregate import aggregate_responses
+from bench_aggregate import synthetic_responses
+from incremental import IncrementalStore
+
+
+def same_tables(expected, actual):
+    """Compare figure tables, ignoring the order of rows with equal values."""
+    for csv_name, df in expected.items():
+        columns = list(df.columns)
+        left = df.sort_values(columns).reset_index(drop=True)
+        right = actual[csv_name].sort_values(columns).reset_index(drop=True)
+        if not left.astype(str).equals(right.astype(str)):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--history', type=int, default=1_000_000, help="Responses already folded")
+    parser.add_argument('--batches', type=int, nargs='+', default=[10, 100, 1000], help="New batch sizes")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_incremental_')
+    try:
+        history = synthetic_responses(args.history)
+        store = IncrementalStore(os.path.join(work, 'aggregates.sqlite'))
+        start = time.perf_counter()
+        for offset in range(0, len(history), 100_000):
+            store.fold(history.iloc[offset:offset + 100_000])
+        store.write_tables(os.path.join(work, 'data'))
+        print(f"Folded {args.history:,} responses in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'batch':>7} {'fold ms':>9} {'write ms':>9} {'tables':>7} {'full recompute ms':>18}")
+        offset = args.history
+        for size in args.batches:
+            batch = synthetic_responses(size, seed=size)
+            batch['organization_id'] += offset
+            offset += size
+            start = time.perf_counter()
+            changed = store.fold(batch)
+            fold_s = time.perf_counter() - start
+            start = time.perf_counter()
+            written = store.write_tables(os.path.join(work, 'data'), changed)
+            write_s = time.perf_counter() - start
+            history = pd.concat([history, batch], ignore_index=True)
+            start = time.perf_counter()
+            expected = aggregate_responses(history)
+            full_s = time.perf_counter() - start
+            print(f"{size:>7,} {fold_s * 1000:9.1f} {write_s * 1000:9.1f} {len(written):7d} {full_s * 1000:18.1f}")
+
+        if not same_tables(expected, store.tables()):
+            print("Store tables differ from a full recomputation")
+            sys.exit(1)
+        store.close()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
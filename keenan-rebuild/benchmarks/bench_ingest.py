@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Peak memory and time of streaming ingestion (src/ingest.py).
+
+Writes synthetic response exports (see bench_aggregate.synthetic_responses)
+as a CSV and as an .xlsx workbook, then in a fresh interpreter per case
+times turning each into the figure tables and records the peak RSS:
+
+- read_csv    pd.read_csv of the whole CSV, then aggregate.aggregate_responses
+- csv         ingest.ingest_responses on the CSV, a chunk at a time
+- xlsx        ingest.ingest_responses on the workbook
+
+Streaming should keep the peak flat as the export grows. Exits 1 if the
+streamed tables differ from aggregate_responses on the same data.
+
+Usage:
+    python benchmarks/bench_ingest.py [--rows 100000 1000000] [--xlsx-rows 20000 200000]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_aggregate import synthetic_responses
+
+CHILD = r'''
+import json, resource, sys, time
+sys.path.insert(0, {src_dir!r})
+sys.path.insert(0, {bench_dir!r})
+import pandas as pd
+from aggregate import aggregate_responses
+from ingest import ingest_responses
+
+start = time.perf_counter()
+if {case!r} == 'read_csv':
+    tables = aggregate_responses(pd.read_csv({path!r}))
+else:
+    tables, _ = ingest_responses([{path!r}])
+elapsed = time.perf_counter() - start
+for csv_name, df in tables.items():
+    df.to_csv({out_dir!r} + '/' + csv_name, index=False)
+# ru_maxrss would include the parent's peak from before exec; VmHWM is this process's own
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+with open('/proc/self/status') as f:
+    peak = next((int(line.split()[1]) for line in f if line.startswith('VmHWM:')), peak)
+print(json.dumps([peak, elapsed]))
+'''
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>')
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>')
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Responses" sheetId="1" r:id="rId1"/></sheets></workbook>')
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+    '</Relationships>')
+
+
+def _cell(reference, value):
+    if hasattr(value, 'item'):
+        value = value.item()
+    # Like Excel, leave empty text and missing values out of the sheet
+    if value is None or value != value or value == '':
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    return f'<c r="{reference}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def write_xlsx(df, path):
+    """Write a DataFrame as a one-sheet .xlsx ("Responses") with inline strings."""
+    letters = [chr(ord('A') + i) for i in range(len(df.columns))]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+            rows = [list(df.columns)] + df.astype(object).values.tolist()
+            for number, row in enumerate(rows, start=1):
+                cells = ''.join(_cell(f'{letter}{number}', value) for letter, value in zip(letters, row))
+                sheet.write(f'<row r="{number}">{cells}</row>'.encode('utf-8'))
+            sheet.write(b'</sheetData></worksheet>')
+
+
+def run_case(case, path, out_dir):
+    """Run one case in a child interpreter; return (peak KiB, seconds)."""
+    os.makedirs(out_dir)
+    code = CHILD.format(src_dir=SRC_DIR, bench_dir=os.path.dirname(os.path.abspath(__file__)),
+                        case=case, path=path, out_dir=out_dir)
+    result = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def same_outputs(left, right):
+    """Compare two directories of figure CSVs, ignoring the order of tied rows."""
+    import pandas as pd
+    from bench_incremental import same_tables
+    names = sorted(os.listdir(left))
+    return same_tables({name: pd.read_csv(os.path.join(left, name)) for name in names},
+                       {name: pd.read_csv(os.path.join(right, name)) for name in names})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help="CSV export sizes")
+    parser.add_argument('--xlsx-rows', type=int, nargs='+', default=[20_000, 200_000],
+                        help="Workbook export sizes")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_ingest_')
+    failed = False
+    try:
+        print(f"{'case':<9} {'rows':>10} {'file MB':>8} {'peak MB':>8} {'seconds':>8}")
+        runs = [('csv', rows) for rows in args.rows] + [('xlsx', rows) for rows in args.xlsx_rows]
+        for kind, rows in runs:
+            responses = synthetic_responses(rows)
+            path = os.path.join(work, f'responses_{rows}.{kind}')
+            if kind == 'csv':
+                responses.to_csv(path, index=False)
+                # The whole-file baseline reads the same CSV
+                cases = ['read_csv', 'csv']
+            else:
+                write_xlsx(responses, path)
+                responses.to_csv(path + '.csv', index=False)
+                run_case('read_csv', path + '.csv', os.path.join(work, f'read_csv_{rows}_{kind}'))
+                cases = ['xlsx']
+            del responses
+            size = os.path.getsize(path) / 1e6
+            for case in cases:
+                peak, seconds = run_case(case, path, os.path.join(work, f'{case}_{rows}_{kind}'))
+                print(f"{case:<9} {rows:>10,} {size:8.1f} {peak / 1024:8.0f} {seconds:8.2f}")
+                if case != 'read_csv' and not same_outputs(os.path.join(work, f'read_csv_{rows}_{kind}'),
+                                                           os.path.join(work, f'{case}_{rows}_{kind}')):
+                    print(f"  {case} tables differ from aggregate_responses")
+                    failed = True
+            os.remove(path)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Peak-memory benchmark for the streaming report build.
+
+Builds synthetic reports of increasing page count (the bundled chart pages
+repeated) and prints the peak RSS of each build. Each build runs in a fresh
+interpreter so the numbers are independent. With the streaming pipeline the
+peak should stay roughly flat as the page count grows.
+
+Usage:
+    python benchmarks/bench_memory.py [--pages 15 60 240]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+CHILD = r'''
+import contextlib, io, os, resource, sys, time
+sys.path.insert(0, {src_dir!r})
+import build_report
+import registry
+
+n_pages = {n_pages}
+specs = [page for page in registry.load_manifest() if 'csv' in page]
+pages = []
+for i in range(n_pages):
+    page = dict(specs[i % len(specs)])
+    page['name'] = f"{{page['name']}}_{{i}}"
+    page['number'] = i + 1
+    pages.append(page)
+
+out_dir = {out_dir!r}
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    build_report.build_report_serial(os.path.join(out_dir, 'report.pdf'), out_dir, pages,
+                                     build_report.default_data_dir())
+elapsed = time.perf_counter() - start
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, elapsed)
+'''
+
+
+def run_build(n_pages):
+    """Build an n-page report in a child interpreter; return (peak KiB, seconds)."""
+    with tempfile.TemporaryDirectory() as out_dir:
+        code = CHILD.format(src_dir=SRC_DIR, n_pages=n_pages, out_dir=out_dir)
+        result = subprocess.run([sys.executable, '-c', code], check=True,
+                                capture_output=True, text=True)
+    peak_kib, elapsed = result.stdout.split()
+    return int(peak_kib), float(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[15, 60, 240])
+    args = parser.parse_args()
+
+    print(f"{'pages':>8} {'peak RSS (MiB)':>15} {'seconds':>10} {'ms/page':>10}")
+    for n_pages in args.pages:
+        peak_kib, elapsed = run_build(n_pages)
+        print(f"{n_pages:>8} {peak_kib / 1024:>15.1f} {elapsed:>10.2f} {elapsed / n_pages * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Disk use and render work of a batch with and without the page store
+(src/pagestore.py).
+
+Makes N client data directories from --data-dir in which the first
+--client-pages data pages differ per client and every other page is the
+same, then builds them all with batch.run_batch:
+
+- cache       shared render cache; every report writes its PDF and PNGs
+- store       shared page store; PNGs are hard links into the store
+- refs-only   shared page store; reports are pages.json plus PNG links
+
+Disk is the bytes of every report directory plus the cache or store, with
+hard-linked files counted once. Renders are the pages rendered by the jobs
+(the client-independent pages primed up front are not counted). With the
+store, both should grow with the number of distinct pages rather than with
+clients x pages. Every refs-only report is then assembled and must be
+byte-identical to the report.pdf the cache case wrote; exits 1 if not.
+
+Usage:
+    python benchmarks/bench_pagestore.py [--clients 5 20] [--client-pages 3]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+from batch import run_batch
+from build_report import default_data_dir
+from compact import format_bytes
+from pagestore import assemble
+from registry import load_manifest
+
+CASES = ('cache', 'store', 'refs-only')
+
+
+def perturb_csv(path, amount):
+    """Add amount to the first numeric cell of a CSV, so its page renders differently."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    for row in rows[1:]:
+        for i, cell in enumerate(row):
+            try:
+                row[i] = f'{float(cell) + amount:g}'
+            except ValueError:
+                continue
+            break
+        else:
+            continue
+        break
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+
+
+def make_clients(work, data_dir, pages, clients, client_pages):
+    """Create client data directories; return their paths."""
+    varying = [page['csv'] for page in pages if 'csv' in page][:client_pages]
+    dirs = []
+    for client in range(clients):
+        client_dir = os.path.join(work, 'data', f'client_{client:03d}')
+        shutil.copytree(data_dir, client_dir)
+        for csv_name in varying:
+            perturb_csv(os.path.join(client_dir, csv_name), client + 1)
+        dirs.append(client_dir)
+    return dirs
+
+
+def disk_usage(paths):
+    """Return the bytes of all files under paths, counting hard-linked files once."""
+    seen = set()
+    total = 0
+    for path in paths:
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                stat = os.stat(os.path.join(dirpath, filename))
+                if (stat.st_dev, stat.st_ino) not in seen:
+                    seen.add((stat.st_dev, stat.st_ino))
+                    total += stat.st_size
+    return total
+
+
+def count_renders(out_dirs):
+    """Count the pages the jobs rendered, from their build logs."""
+    count = 0
+    for out_dir in out_dirs:
+        with open(os.path.join(out_dir, 'build.log'), encoding='utf-8') as f:
+            count += sum(1 for line in f if line.startswith('Rendered page'))
+    return count
+
+
+def run_case(case, work, pages, data_dirs):
+    """Build every client's report; return (out dirs, disk bytes, renders, seconds)."""
+    case_dir = os.path.join(work, case)
+    out_dirs = [os.path.join(case_dir, 'out', os.path.basename(data_dir)) for data_dir in data_dirs]
+    shared_dir = os.path.join(case_dir, 'shared')
+    store_dir = shared_dir if case != 'cache' else None
+    start = time.perf_counter()
+    results = list(run_batch(list(zip(data_dirs, out_dirs)), pages, shared_dir,
+                             store_dir=store_dir, refs_only=case == 'refs-only'))
+    seconds = time.perf_counter() - start
+    errors = [result['error'] for result in results if result['error'] is not None]
+    if errors:
+        raise RuntimeError(f"{case}: {errors[0]}")
+    return out_dirs, disk_usage(out_dirs + [shared_dir]), count_renders(out_dirs), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=default_data_dir(), help="Directory holding the page CSV files")
+    parser.add_argument('--clients', type=int, nargs='+', default=[5, 20], help="Batch sizes")
+    parser.add_argument('--client-pages', type=int, default=3, help="Data pages that differ per client")
+    args = parser.parse_args()
+
+    pages = load_manifest()
+    mismatched = []
+    print(f"{'case':<10} {'clients':>7} {'distinct':>8} {'renders':>8} {'disk':>10} {'seconds':>8}")
+    for clients in args.clients:
+        work = tempfile.mkdtemp(prefix='bench_pagestore_')
+        try:
+            data_dirs = make_clients(work, args.data_dir, pages, clients, args.client_pages)
+            distinct = len(pages) + (clients - 1) * args.client_pages
+            reports = {}
+            for case in CASES:
+                out_dirs, disk, renders, seconds = run_case(case, work, pages, data_dirs)
+                reports[case] = out_dirs
+                print(f"{case:<10} {clients:>7} {distinct:>8} {renders:>8} {format_bytes(disk):>10} {seconds:8.2f}")
+            for expected_dir, out_dir in zip(reports['cache'], reports['refs-only']):
+                path, _ = assemble(out_dir)
+                with open(path, 'rb') as f, open(os.path.join(expected_dir, 'report.pdf'), 'rb') as g:
+                    if f.read() != g.read():
+                        mismatched.append(out_dir)
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+
+    for out_dir in mismatched:
+        print(f"  assembled report differs: {out_dir}")
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
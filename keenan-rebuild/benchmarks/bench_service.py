@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the report service (src/service.py).
+
+Starts the service on a free port with an empty render cache, then:
+
+- cold      --clients concurrent requests for the same uncached report; they
+            must share a single build (checked against /health)
+- warm      --requests requests for the cached report, --clients at a time
+            over keep-alive connections
+- 304       the same with If-None-Match set to the report's ETag
+- png       warm requests for one page's PNG
+
+and prints p50/p95/max latency for each. Exits 1 if the cold requests did
+not share one build.
+
+Usage:
+    python benchmarks/bench_service.py [--workers 2] [--clients 8] [--requests 400]
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'src', 'service.py')
+
+
+def start_service(work, workers):
+    """Start the service on a free port; return (process, port, log path)."""
+    log_path = os.path.join(work, 'service.log')
+    log = open(log_path, 'w', encoding='utf-8')
+    process = subprocess.Popen([sys.executable, SCRIPT, '--port', '0', '--workers', str(workers),
+                                '--cache-dir', os.path.join(work, 'cache')],
+                               stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        with open(log_path, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('Serving reports on'):
+                    return process, int(line.split()[3].rstrip('/').rsplit(':', 1)[1]), log_path
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    process.kill()
+    with open(log_path, encoding='utf-8') as f:
+        sys.exit(f"Service did not start:\n{f.read()}")
+
+
+def fetch(port, path, count=1, headers=None):
+    """
+    Request path count times over one keep-alive connection.
+
+    Returns:
+        List of (seconds, status, response headers) per request
+    """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+    results = []
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            connection.request('GET', path, headers=headers or {})
+            response = connection.getresponse()
+            response.read()
+            results.append((time.perf_counter() - start, response.status, dict(response.getheaders())))
+    finally:
+        connection.close()
+    return results
+
+
+def fetch_body(port, path):
+    """Return the body of one GET request."""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('GET', path)
+        return connection.getresponse().read()
+    finally:
+        connection.close()
+
+
+def concurrent_fetch(port, path, clients, requests, headers=None):
+    """Spread requests over clients concurrent connections; return every result."""
+    counts = [requests // clients + (i < requests % clients) for i in range(clients)]
+    with ThreadPoolExecutor(clients) as pool:
+        batches = pool.map(lambda count: fetch(port, path, count, headers), counts)
+    return [result for batch in batches for result in batch]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(label, results):
+    seconds = [result[0] * 1000 for result in results]
+    statuses = sorted({result[1] for result in results})
+    print(f"{label:<6} {len(results):6d} {percentile(seconds, 0.5):10.2f} {percentile(seconds, 0.95):10.2f} "
+          f"{max(seconds):10.2f}   {','.join(map(str, statuses))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2, help="Service render workers")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent connections")
+    parser.add_argument('--requests', type=int, default=400, help="Requests per warm scenario")
+    parser.add_argument('--keep', action='store_true', help="Keep the service log and cache")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_service_')
+    process, port, log_path = start_service(work, args.workers)
+    try:
+        print(f"{'case':<6} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}   status")
+        cold = concurrent_fetch(port, '/report.pdf', args.clients, args.clients)
+        report('cold', cold)
+        etag = cold[0][2]['ETag']
+        report('warm', concurrent_fetch(port, '/report.pdf', args.clients, args.requests))
+        report('304', concurrent_fetch(port, '/report.pdf', args.clients, args.requests,
+                                       {'If-None-Match': etag}))
+        report('png', concurrent_fetch(port, '/pages/stop_loss_attachment.png', args.clients,
+                                       args.requests))
+        health = json.loads(fetch_body(port, '/health'))
+        print(f"\nreports built: {health['reports_built']}, pages rendered: {health['pages_rendered']}, "
+              f"requests: {health['requests']}")
+        if health['reports_built'] != 1:
+            print(f"{args.clients} concurrent cold requests started {health['reports_built']} builds")
+            sys.exit(1)
+    finally:
+        process.terminate()
+        process.wait()
+        if args.keep:
+            print(f"Service log and cache kept in {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
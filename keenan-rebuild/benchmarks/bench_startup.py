@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for build_report.py.
+
+Times a few representative command lines in fresh interpreters and shows
+where their import time goes, using Python's ``-X importtime`` output:
+
+- ``--help``        argument parsing only
+- ``--list-pages``  argument parsing plus manifest validation
+- cached build      a full build where every page comes from the render cache
+- ``--no-cache``    a full render, paying pandas and matplotlib imports
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--top 8]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      'src', 'build_report.py')
+
+SCENARIOS = [
+    ('help', ['--help']),
+    ('list-pages', ['--list-pages']),
+    ('cached build', []),
+    ('no-cache build', ['--no-cache']),
+]
+
+
+def run(args, importtime=False):
+    """Run build_report.py once; return (wall seconds, stderr text)."""
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += [SCRIPT] + args
+    start = time.perf_counter()
+    result = subprocess.run(command, check=True, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    return time.perf_counter() - start, result.stderr
+
+
+def top_level_imports(importtime_output):
+    """
+    Parse ``-X importtime`` output into top-level imports.
+
+    Returns:
+        List of (module, cumulative microseconds), largest first
+    """
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented under the module that triggered them
+        if name.startswith(' ') and not name.startswith('  '):
+            imports.append((name.strip(), int(cumulative)))
+    return sorted(imports, key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per scenario (best is reported)")
+    parser.add_argument('--top', type=int, default=8, help="Top-level imports to show per scenario")
+    args = parser.parse_args()
+
+    # Make sure the render cache is populated for the cached scenario
+    run([])
+
+    for label, scenario_args in SCENARIOS:
+        best = min(run(scenario_args)[0] for _ in range(args.repeat))
+        _, importtime_output = run(scenario_args, importtime=True)
+        imports = top_level_imports(importtime_output)
+        total_ms = sum(us for _, us in imports) / 1000
+
+        print(f"\n{label}: best of {args.repeat} = {best * 1000:.0f} ms "
+              f"(imports {total_ms:.0f} ms)")
+        for name, us in imports[:args.top]:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
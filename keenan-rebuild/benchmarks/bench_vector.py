@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Vector renderer versus matplotlib: per-page PDF cost and layout agreement.
+
+For every manifest page the vector renderer supports, times producing the
+page's PDF both ways (matplotlib: build the figure and save it with
+bbox_inches='tight'; vector: vector.render_pdf) and checks the two PDFs
+against each other. No PDF rasteriser is required: every text run in the
+vector PDF (title, axis labels, tick labels, value labels, table cells)
+must appear in the matplotlib PDF with its centre within --tolerance of the
+page size, and the page sizes must agree to the same tolerance. Rectangles
+(bars, table cells) and straight lines (gridlines, spines, ticks) are
+compared the same way, by their corners and end points, in both directions.
+Exits 1 if any page fails. tests/test_vector.py runs the same checks.
+
+Usage:
+    python benchmarks/bench_vector.py [--data-dir data] [--repeat 5] [--tolerance 0.03]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from pypdf import PdfReader
+from pypdf.generic import ContentStream
+
+import vector
+from build_report import build_figures, load_page_data, warm_up
+from registry import load_manifest
+
+
+def matplotlib_pdf(page, data_dir):
+    """Render a page to PDF bytes the way the report does."""
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    buf = io.BytesIO()
+    with PdfPages(buf) as pdf:
+        for fig in build_figures(page, data_dir):
+            pdf.savefig(fig, bbox_inches='tight')
+            plt.close(fig)
+    return buf.getvalue()
+
+
+def _normalize(text):
+    """
+    Text as compared between the two PDFs.
+
+    Whitespace is dropped because matplotlib splits strings into pieces
+    wherever it kerns. Dollar signs are dropped and the minus sign mapped to
+    a hyphen because matplotlib reads a pair of '$' as mathtext ("$150k -
+    $199k" is drawn as math "150k − 199k"), which the vector renderer does not.
+    """
+    return ''.join(text.split()).replace('$', '').replace('\u2212', '-')
+
+
+def text_width(text, font_dict, size):
+    """
+    Width in points of text as drawn in the font named by a PDF font dict.
+
+    The vector PDF uses the standard Helvetica fonts; matplotlib embeds the
+    DejaVu fonts it drew with, so those are measured with matplotlib itself.
+    """
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.textpath import TextToPath
+
+    name = str(font_dict.get('/BaseFont', '')) if font_dict else ''
+    bold = 'Bold' in name
+    if 'Helvetica' in name:
+        return vector.text_width(text, size, bold=bold)
+    prop = FontProperties(family='DejaVu Sans', weight='bold' if bold else 'normal', size=size)
+    return TextToPath().get_text_width_height_descent(text, prop, ismath=False)[0]
+
+
+def text_lines(pdf_bytes):
+    """
+    Return the centre of every line of text on each page.
+
+    matplotlib splits a string into several pieces wherever it kerns, so
+    pieces continuing the same baseline are joined into one line, which runs
+    from the first piece's origin to the end of the last piece.
+
+    Returns:
+        List of (page width, page height, {normalized text: [(x, y), ...]})
+    """
+    pages = []
+    for pdf_page in PdfReader(io.BytesIO(pdf_bytes)).pages:
+        lines = []
+
+        def visit(text, cm, tm, font_dict, font_size):
+            if not text.strip():
+                return
+            # Text space origin through the text matrix, then the CTM
+            x, y = tm[4], tm[5]
+            ox, oy = cm[0] * x + cm[2] * y + cm[4], cm[1] * x + cm[3] * y + cm[5]
+            # Direction of the baseline in page space
+            dx, dy = cm[0] * tm[0] + cm[2] * tm[1], cm[1] * tm[0] + cm[3] * tm[1]
+            norm = (dx * dx + dy * dy) ** 0.5 or 1
+            ux, uy, size = dx / norm, dy / norm, (font_size or 10) * norm
+            end = text_width(text, font_dict, size)
+            end_x, end_y = ox + ux * end, oy + uy * end
+            if lines:
+                last = lines[-1]
+                across = abs((ox - last['x']) * -uy + (oy - last['y']) * ux)
+                if abs(ux - last['ux']) < 1e-3 and abs(uy - last['uy']) < 1e-3 and across < 0.5:
+                    last['text'] += text
+                    last['end'] = (end_x, end_y)
+                    return
+            lines.append({'text': text, 'x': ox, 'y': oy, 'ux': ux, 'uy': uy, 'end': (end_x, end_y)})
+
+        pdf_page.extract_text(visitor_text=visit)
+        centres = {}
+        for line in lines:
+            centres.setdefault(_normalize(line['text']), []).append(
+                ((line['x'] + line['end'][0]) / 2, (line['y'] + line['end'][1]) / 2))
+        box = pdf_page.mediabox
+        pages.append((float(box.width), float(box.height), centres))
+    return pages
+
+
+def compare_layout(reference, candidate):
+    """
+    Compare text placement of candidate against reference.
+
+    Returns:
+        (worst centre offset as a fraction of the page size, list of problems)
+    """
+    problems = []
+    worst = 0.0
+    if len(reference) != len(candidate):
+        return 1.0, [f"{len(candidate)} page(s) instead of {len(reference)}"]
+    for number, ((ref_w, ref_h, ref_lines), (w, h, lines)) in enumerate(zip(reference, candidate), start=1):
+        worst = max(worst, abs(w - ref_w) / ref_w, abs(h - ref_h) / ref_h)
+        for text, centres in lines.items():
+            if text not in ref_lines:
+                problems.append(f"page {number}: '{text}' missing from the matplotlib PDF")
+                continue
+            for cx, cy in centres:
+                worst = max(worst, min(max(abs(cx - rx) / ref_w, abs(cy - ry) / ref_h)
+                                       for rx, ry in ref_lines[text]))
+    return worst, problems
+
+
+# Path painting operators; 'n' ends a path without painting it (a clip)
+_PAINT_OPS = {b'S', b's', b'f', b'F', b'f*', b'B', b'B*', b'b', b'b*'}
+_STROKE_OPS = {b'S', b's', b'B', b'B*', b'b', b'b*'}
+
+
+def _concat(m, ctm):
+    """Return the matrix m x ctm, as the PDF cm operator applies it."""
+    return [m[0] * ctm[0] + m[1] * ctm[2], m[0] * ctm[1] + m[1] * ctm[3],
+            m[2] * ctm[0] + m[3] * ctm[2], m[2] * ctm[1] + m[3] * ctm[3],
+            m[4] * ctm[0] + m[5] * ctm[2] + ctm[4], m[4] * ctm[1] + m[5] * ctm[3] + ctm[5]]
+
+
+def shape_geometry(pdf_bytes):
+    """
+    Return the rectangles and straight lines painted on each page.
+
+    A rectangle is a closed four-point subpath or an 're'; a line is an open
+    two-point subpath. matplotlib's figure and axes backgrounds, which the
+    vector renderer doesn't draw, are white rectangles without an outline
+    and are left out, as are curves.
+
+    Returns:
+        List of (page width, page height, [(x0, y0, x1, y1) rectangle],
+        [((x0, y0), (x1, y1)) line])
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    pages = []
+    for pdf_page in reader.pages:
+        rects, lines, subpaths = [], [], []
+        ctm, fill, stack = [1, 0, 0, 1, 0, 0], None, []
+
+        def point(x, y):
+            x, y = float(x), float(y)
+            return ctm[0] * x + ctm[2] * y + ctm[4], ctm[1] * x + ctm[3] * y + ctm[5]
+
+        for operands, op in ContentStream(pdf_page.get_contents(), reader).operations:
+            if op == b'q':
+                stack.append((ctm, fill))
+            elif op == b'Q':
+                ctm, fill = stack.pop()
+            elif op == b'cm':
+                ctm = _concat([float(v) for v in operands], ctm)
+            elif op in (b'g', b'rg', b'k'):
+                fill = tuple(round(float(v), 4) for v in operands)
+            elif op == b'm':
+                subpaths.append({'points': [point(*operands)], 'closed': False, 'curved': False})
+            elif op == b'l':
+                subpaths[-1]['points'].append(point(*operands))
+            elif op in (b'c', b'v', b'y'):
+                subpaths[-1]['curved'] = True
+            elif op == b'h':
+                subpaths[-1]['closed'] = True
+            elif op == b're':
+                x, y, w, h = (float(v) for v in operands)
+                subpaths.append({'points': [point(x, y), point(x + w, y), point(x + w, y + h), point(x, y + h)],
+                                 'closed': True, 'curved': False})
+            elif op in _PAINT_OPS or op == b'n':
+                background = op not in _STROKE_OPS and fill is not None and all(v == 1 for v in fill)
+                for subpath in subpaths if op != b'n' else []:
+                    points = subpath['points']
+                    if subpath['curved']:
+                        continue
+                    if len(points) == 2 and not subpath['closed']:
+                        lines.append(tuple(points))
+                    elif len(points) == 4 and subpath['closed'] and not background:
+                        xs = [x for x, _ in points]
+                        ys = [y for _, y in points]
+                        rects.append((min(xs), min(ys), max(xs), max(ys)))
+                subpaths = []
+        box = pdf_page.mediabox
+        pages.append((float(box.width), float(box.height), rects, lines))
+    return pages
+
+
+def compare_geometry(reference, candidate):
+    """
+    Compare the rectangles and lines of candidate against reference.
+
+    Every shape on either side must have a counterpart of the same kind on
+    the other; its offset is the largest difference of a corner or end
+    point, as a fraction of the page size.
+
+    Returns:
+        (worst offset as a fraction of the page size, list of problems)
+    """
+    problems = []
+    worst = 0.0
+    if len(reference) != len(candidate):
+        return 1.0, [f"{len(candidate)} page(s) instead of {len(reference)}"]
+    for number, ((ref_w, ref_h, ref_rects, ref_lines), (_, _, rects, lines)) in enumerate(
+            zip(reference, candidate), start=1):
+
+        def rect_offset(a, b):
+            return max(abs(a[0] - b[0]) / ref_w, abs(a[2] - b[2]) / ref_w,
+                       abs(a[1] - b[1]) / ref_h, abs(a[3] - b[3]) / ref_h)
+
+        def line_offset(a, b):
+            def ends(p, q):
+                return max(abs(p[0][0] - q[0][0]) / ref_w, abs(p[1][0] - q[1][0]) / ref_w,
+                           abs(p[0][1] - q[0][1]) / ref_h, abs(p[1][1] - q[1][1]) / ref_h)
+            return min(ends(a, b), ends(a, b[::-1]))
+
+        for kind, ours, theirs, offset in (('rectangle', rects, ref_rects, rect_offset),
+                                           ('line', lines, ref_lines, line_offset)):
+            if len(ours) != len(theirs):
+                problems.append(f"page {number}: {len(ours)} {kind}s instead of {len(theirs)}")
+            for a, b in ((ours, theirs), (theirs, ours)):
+                for shape in a:
+                    worst = max(worst, min((offset(shape, other) for other in b), default=1.0))
+    return worst, problems
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'data'))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.03,
+                        help="Largest allowed text offset as a fraction of the page size")
+    args = parser.parse_args()
+
+    warm_up()
+    print(f"{'page':<28} {'matplotlib ms':>14} {'vector ms':>10} {'speedup':>8} {'offset':>7}")
+    failures = 0
+    total_mpl = total_vec = 0.0
+    for page in load_manifest():
+        if page['chart'] not in vector.SUPPORTED_ARGS:
+            continue
+        df = load_page_data(page, args.data_dir)
+        if vector.unsupported_reason(page, df):
+            continue
+        mpl_s, mpl_pdf = best_of(args.repeat, lambda: matplotlib_pdf(page, args.data_dir))
+        vec_s, vec_pdf = best_of(args.repeat, lambda: vector.render_pdf(page, load_page_data(page, args.data_dir)))
+        total_mpl += mpl_s
+        total_vec += vec_s
+        worst, problems = compare_layout(text_lines(mpl_pdf), text_lines(vec_pdf))
+        shape_worst, shape_problems = compare_geometry(shape_geometry(mpl_pdf), shape_geometry(vec_pdf))
+        worst = max(worst, shape_worst)
+        problems += shape_problems
+        status = '' if worst <= args.tolerance and not problems else '  FAIL'
+        failures += bool(status)
+        print(f"{page['name']:<28} {mpl_s * 1000:14.1f} {vec_s * 1000:10.2f} "
+              f"{mpl_s / vec_s:7.0f}x {worst:7.1%}{status}")
+        for problem in problems:
+            print(f"    {problem}")
+    if total_vec:
+        print(f"{'total':<28} {total_mpl * 1000:14.1f} {total_vec * 1000:10.2f} {total_mpl / total_vec:7.0f}x")
+    if failures:
+        print(f"\n{failures} page(s) differ from the matplotlib layout by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the report renderer, with saved baselines.
+
+``run`` times every chart helper and full ``build_report.main()`` builds on
+synthetic data shaped like data/*.csv at several scales, and saves the
+results as a JSON baseline. ``compare`` diffs two baselines case by case.
+
+Scales:
+    small   5 rows per chart, the 15-page report (what data/ holds today)
+    medium  50 rows per chart, the data pages repeated 5 times (67 pages)
+    large   500 rows per chart, the data pages repeated 100 times (1,302 pages)
+
+Each chart case is timed separately for building the figure and for saving
+it as PDF and as a 150-dpi PNG; the best of --repeat runs is kept.
+
+Usage:
+    python benchmarks/harness.py run --save baseline.json
+    python benchmarks/harness.py run --scales small large --cases bar_chart main --save new.json
+    python benchmarks/harness.py compare baseline.json new.json [--threshold 0.1]
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import build_report
+from charts import bar_chart, faceted_bar_chart, grouped_bar_chart, horizontal_bar_chart, table_page
+from pages import text_page
+from registry import DEFAULT_MANIFEST, load_manifest
+
+SCALES = {
+    'small': {'rows': 5, 'copies': 1, 'paragraphs': 3},
+    'medium': {'rows': 50, 'copies': 5, 'paragraphs': 10},
+    'large': {'rows': 500, 'copies': 100, 'paragraphs': 30},
+}
+
+CASES = ('bar_chart', 'horizontal_bar_chart', 'grouped_bar_chart', 'faceted_bar_chart', 'table_page',
+         'text_page', 'main')
+
+PARAGRAPH = ("Self-funded employers continue to shift toward regional networks while "
+             "holding employee contributions flat, and telemedicine access is now close "
+             "to universal among respondents of every size and region.")
+
+
+def category_frame(rows, value_cols=('Percent',), seed=0):
+    """Return a DataFrame of `rows` labelled categories with percent values."""
+    rng = np.random.default_rng(seed)
+    data = {'Category': [f'Category {i + 1}' for i in range(rows)]}
+    for col in value_cols:
+        data[col] = rng.uniform(1, 99, rows).round(1)
+    return pd.DataFrame(data)
+
+
+def facet_frame(rows, seed=0):
+    """Return a long-form Region, Category, Percent table: up to 40 regions of 5 categories."""
+    regions = min(rows, 40)
+    frame = category_frame(5 * regions, seed=seed)
+    frame['Category'] = [f'Category {i % 5 + 1}' for i in range(5 * regions)]
+    frame.insert(0, 'Region', [f'Region {i // 5 + 1}' for i in range(5 * regions)])
+    return frame
+
+
+def table_frame(rows, seed=0):
+    """Return a contribution table like appendix_ee_contributions.csv."""
+    rng = np.random.default_rng(seed)
+    data = {'Plan Type': [f'Plan {i + 1}' for i in range(rows)]}
+    for col in ('Employee Only', 'Employee + Spouse', 'Employee + Child(ren)', 'Employee + Family'):
+        data[col] = [f'${value}' for value in rng.integers(50, 600, rows)]
+    return pd.DataFrame(data)
+
+
+def chart_builders(scale):
+    """Return {case: zero-argument figure builder} for one scale."""
+    rows = SCALES[scale]['rows']
+    bars = category_frame(rows)
+    grouped = category_frame(rows, ('2021', '2022'))
+    facets = facet_frame(rows)
+    table = table_frame(rows)
+    body = '\n\n'.join([PARAGRAPH] * SCALES[scale]['paragraphs'])
+    return {
+        'bar_chart': lambda: bar_chart(bars, 'Category', 'Percent', 'Synthetic bar chart',
+                                       ylabel='Percent', rotation=45),
+        'horizontal_bar_chart': lambda: horizontal_bar_chart(bars, 'Category', 'Percent',
+                                                             'Synthetic horizontal bar chart'),
+        'grouped_bar_chart': lambda: grouped_bar_chart(grouped, ['Category'], ['2021', '2022'],
+                                                       'Synthetic grouped bar chart'),
+        'faceted_bar_chart': lambda: faceted_bar_chart(facets, 'Region', 'Category', 'Percent',
+                                                       'Synthetic faceted bar chart'),
+        'table_page': lambda: table_page(table, 'Synthetic table'),
+        'text_page': lambda: text_page('Synthetic Summary', body),
+    }
+
+
+def best_of(repeat, func):
+    """Run func repeat times and return the fastest wall time in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_chart(build, repeat):
+    """Time building a figure, then saving it as PDF and as PNG."""
+    results = {'build': float('inf'), 'pdf': float('inf'), 'png': float('inf')}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = build()
+        results['build'] = min(results['build'], time.perf_counter() - start)
+        for fmt, kwargs in (('pdf', {}), ('png', {'dpi': 150})):
+            start = time.perf_counter()
+            fig.savefig(io.BytesIO(), format=fmt, bbox_inches='tight', **kwargs)
+            results[fmt] = min(results[fmt], time.perf_counter() - start)
+        plt.close(fig)
+    return results
+
+
+def write_dataset(scale, data_dir, manifest_path):
+    """
+    Write a synthetic data directory and manifest for one scale.
+
+    Every data page in the real manifest is repeated `copies` times, each copy
+    reading its own CSV with `rows` rows in the page's columns.
+
+    Returns:
+        Number of pages in the synthetic manifest
+    """
+    rows, copies = SCALES[scale]['rows'], SCALES[scale]['copies']
+    os.makedirs(data_dir, exist_ok=True)
+    pages = []
+    for page in load_manifest(DEFAULT_MANIFEST):
+        page = {key: value for key, value in page.items() if key != 'number'}
+        if 'csv' not in page:
+            pages.append(page)
+            continue
+        for copy_number in range(copies):
+            spec = copy.deepcopy(page)
+            if copies > 1:
+                spec['name'] = f"{page['name']}_{copy_number + 1}"
+                spec['csv'] = f"{spec['name']}.csv"
+            if page['chart'] == 'table_page':
+                df = table_frame(rows, seed=copy_number)
+                df.columns = page['columns']
+            else:
+                df = category_frame(rows, seed=copy_number)
+                df.columns = page['columns']
+            df.to_csv(os.path.join(data_dir, spec['csv']), index=False)
+            pages.append(spec)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'pages': pages}, f)
+    return len(pages)
+
+
+def time_main(scale, repeat):
+    """Time full uncached build_report.main() runs on a synthetic dataset."""
+    work = tempfile.mkdtemp(prefix=f'bench_{scale}_')
+    try:
+        data_dir = os.path.join(work, 'data')
+        manifest = os.path.join(work, 'manifest.json')
+        page_count = write_dataset(scale, data_dir, manifest)
+        argv = ['--no-cache', '--data-dir', data_dir, '--out-dir', os.path.join(work, 'out'),
+                '--manifest', manifest]
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds = best_of(repeat, lambda: build_report.main(argv))
+        return {'total': seconds, 'per_page': seconds / page_count}
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def run(scales, cases, repeat):
+    """
+    Run the selected cases at the selected scales.
+
+    Returns:
+        Baseline dict with environment details and a flat results mapping
+        of 'case/scale/metric' to seconds
+    """
+    from importlib import metadata
+
+    build_report.warm_up()
+    results = {}
+    for scale in scales:
+        builders = chart_builders(scale)
+        for case in cases:
+            start = time.perf_counter()
+            if case == 'main':
+                timings = time_main(scale, repeat)
+            else:
+                timings = time_chart(builders[case], repeat)
+            for metric, seconds in timings.items():
+                results[f'{case}/{scale}/{metric}'] = seconds
+            print(f"{case:<22} {scale:<7} "
+                  + '  '.join(f"{metric} {seconds * 1000:9.1f} ms" for metric, seconds in timings.items())
+                  + f"   ({time.perf_counter() - start:.1f}s)")
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'versions': {name: metadata.version(name) for name in ('matplotlib', 'pandas', 'numpy')},
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(base, new, threshold):
+    """
+    Print a per-case comparison of two baselines.
+
+    Returns:
+        Number of cases at least `threshold` (a fraction) slower in `new`
+    """
+    regressions = 0
+    print(f"{'case':<36} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for key in sorted(set(base['results']) | set(new['results'])):
+        old_s, new_s = base['results'].get(key), new['results'].get(key)
+        if old_s is None or new_s is None:
+            print(f"{key:<36} {'-' if old_s is None else f'{old_s * 1000:10.1f}':>10} "
+                  f"{'-' if new_s is None else f'{new_s * 1000:10.1f}':>10}")
+            continue
+        change = new_s / old_s - 1
+        flag = ''
+        if change >= threshold:
+            flag = '  slower'
+            regressions += 1
+        elif change <= -threshold:
+            flag = '  faster'
+        print(f"{key:<36} {old_s * 1000:10.1f} {new_s * 1000:10.1f} {change:+8.1%}{flag}")
+    for label, baseline in (('base', base), ('new', new)):
+        print(f"{label}: {baseline['created']}  " + ', '.join(f"{k} {v}" for k, v in baseline['versions'].items()))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the report renderer and compare baselines.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run benchmarks and save a baseline")
+    run_parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small', 'medium'],
+                            help="Dataset scales to run (default: small medium)")
+    run_parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES),
+                            help="Cases to run (default: all)")
+    run_parser.add_argument('--repeat', type=int, default=3, help="Runs per case; the fastest is kept")
+    run_parser.add_argument('--save', metavar='FILE', help="Write the results as a JSON baseline")
+
+    compare_parser = commands.add_parser('compare', help="Diff two saved baselines")
+    compare_parser.add_argument('base', help="Baseline JSON")
+    compare_parser.add_argument('new', help="JSON to compare against the baseline")
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="Fractional change reported as slower/faster (default: 0.10)")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        if args.repeat < 1:
+            parser.error("--repeat must be >= 1")
+        baseline = run(args.scales, args.cases, args.repeat)
+        if args.save:
+            with open(args.save, 'w', encoding='utf-8') as f:
+                json.dump(baseline, f, indent=2)
+            print(f"Saved {len(baseline['results'])} results to {args.save}")
+        return
+
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print(f"\n{regressions} case(s) slower by {args.threshold:.0%} or more")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Aggregate raw survey responses into the per-figure tables in data/.
+
+Each row of the input is one organisation's response, flattened to one
+column per question (see RESPONSE_COLUMNS). Multi-select answers hold the
+selected options separated by ';'. The aggregation is done with pandas
+value_counts/groupby over whole columns, never per row in Python, so it
+scales to millions of responses.
+
+Usage:
+    python src/aggregate.py responses.csv --out-dir data/
+
+Only responses with status 'completed' or 'submitted' are counted when a
+status column is present. The appendix contribution table is maintained by
+hand and is not produced here.
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+# Flattened response columns read by FIGURES, with what each holds
+RESPONSE_COLUMNS = {
+    'organization_id': "Responding organisation",
+    'region': "Organisation's region",
+    'plans_offered': "Medical plan types offered (multi-select)",
+    'funding': "Funding approach",
+    'network': "Network used by self-funded plans",
+    'own_hospital_cost_method': "How services at the organisation's own hospital are costed",
+    'pepm': "Medical cost per employee per month, in dollars",
+    'no_cost_ee_only': "Offers a no-cost employee-only plan (bool)",
+    'telemedicine_access': "Offers telemedicine (bool)",
+    'teletherapy_access': "Offers teletherapy (bool)",
+    'tele_copay_relationship': "Telemedicine copay relative to the PCP copay",
+    'stop_loss_attachment': "Specific stop-loss attachment point, in dollars",
+    'hdhp_offering': "'HDHP Only', 'HDHP + Traditional' or 'No HDHP'",
+    'dental_plans': "Dental plan types offered (multi-select)",
+    'union_representation': "Has union-represented employees (bool)",
+}
+
+COUNTED_STATUSES = ('completed', 'submitted')
+
+REGIONS = ['Northern California', 'Southern California', 'Central Valley', 'Bay Area']
+
+# How each data/ CSV is computed. Kinds:
+#   single_choice  percent of respondents giving each answer
+#   multi_select   percent of respondents selecting each option
+#   flags          percent of respondents with each boolean column true
+#   group_percent  percent of respondents with a boolean true, per group
+#   group_mean     mean of a numeric column, per group
+#   buckets        percent of respondents whose numeric answer falls in each bin
+FIGURES = {
+    'product_mix_offered.csv': {
+        'kind': 'multi_select', 'question': 'plans_offered', 'columns': ['Plan', 'Percent'],
+        'order': ['PPO', 'HMO', 'HDHP', 'POS'],
+    },
+    'funding.csv': {
+        'kind': 'single_choice', 'question': 'funding', 'columns': ['Type', 'Percent'],
+    },
+    'network.csv': {
+        'kind': 'single_choice', 'question': 'network', 'columns': ['Network', 'Percent'],
+        'where': ('funding', 'Self-funded'),
+    },
+    'own_hospital_cost.csv': {
+        'kind': 'single_choice', 'question': 'own_hospital_cost_method', 'columns': ['Method', 'Percent'],
+    },
+    'monthly_cost_pepm.csv': {
+        'kind': 'group_mean', 'question': 'pepm', 'group': 'region', 'columns': ['Region', 'PEPM'],
+        'order': REGIONS, 'decimals': 0,
+    },
+    'no_cost_ee_only.csv': {
+        'kind': 'group_percent', 'question': 'no_cost_ee_only', 'group': 'region',
+        'columns': ['Region', 'Percent'], 'order': REGIONS,
+    },
+    'tele_access.csv': {
+        'kind': 'flags', 'columns': ['Benefit', 'Percent'],
+        'flags': {'Telemedicine Access': 'telemedicine_access',
+                  'Teletherapy Access': 'teletherapy_access'},
+    },
+    'tele_copay_relationship.csv': {
+        'kind': 'single_choice', 'question': 'tele_copay_relationship',
+        'columns': ['Relationship', 'Percent'],
+    },
+    'stop_loss_attachment_points.csv': {
+        'kind': 'buckets', 'question': 'stop_loss_attachment', 'columns': ['Attachment Point', 'Percent'],
+        'bins': [100_000, 150_000, 200_000, 250_000, 300_000, float('inf')],
+        'labels': ['$100k - $149k', '$150k - $199k', '$200k - $249k', '$250k - $299k', '$300k+'],
+    },
+    'hdhp_offering.csv': {
+        'kind': 'single_choice', 'question': 'hdhp_offering', 'columns': ['Category', 'Percent'],
+        'totals': {'Offer HDHP': ['HDHP Only', 'HDHP + Traditional']},
+        'order': ['HDHP Only', 'HDHP + Traditional'], 'drop': ['No HDHP'],
+    },
+    'dental_offerings.csv': {
+        'kind': 'multi_select', 'question': 'dental_plans', 'columns': ['Plan', 'Percent'],
+        'order': ['DPPO', 'DHMO', 'Dental Indemnity', 'Discount Plans'],
+    },
+    'union_rep.csv': {
+        'kind': 'single_choice', 'question': 'union_representation', 'columns': ['Category', 'Percent'],
+        'labels': {True: 'Union Representation', False: 'No Union Representation'},
+    },
+}
+
+
+def percent_table(percents, spec):
+    """
+    Turn a Series of percentages indexed by category into a figure table.
+
+    Categories listed in spec['order'] come first in that order (missing ones
+    as 0); any others follow, largest first.
+    """
+    percents = percents.drop(spec.get('drop', []), errors='ignore')
+    order = spec.get('order')
+    if order:
+        rest = percents.drop(order, errors='ignore').sort_values(ascending=False, kind='stable')
+        percents = pd.concat([percents.reindex(order, fill_value=0.0), rest])
+    else:
+        percents = percents.sort_values(ascending=False, kind='stable')
+
+    totals = spec.get('totals', {})
+    if totals:
+        total_rows = pd.Series({label: percents.reindex(parts, fill_value=0.0).sum()
+                                for label, parts in totals.items()})
+        percents = pd.concat([total_rows, percents])
+
+    decimals = spec.get('decimals', 1)
+    label_col, value_col = spec['columns']
+    return pd.DataFrame({label_col: percents.index, value_col: percents.to_numpy().round(decimals)})
+
+
+def answer_counts(responses, spec):
+    """
+    Count the answers to a question reported as a share of respondents.
+
+    Used for the single_choice, multi_select and buckets kinds, both here and
+    by incremental.py, so both count the same responses the same way.
+
+    Args:
+        responses: DataFrame of counted responses
+        spec: Entry from FIGURES
+
+    Returns:
+        (Series of counts by answer, option or bin label, number of
+        respondents) tuple
+    """
+    answers = responses[spec['question']].dropna()
+    kind = spec['kind']
+    if kind == 'single_choice':
+        if 'labels' in spec:
+            answers = answers.map(spec['labels']).dropna()
+        return answers.value_counts(sort=False), len(answers)
+    if kind == 'multi_select':
+        # There are only a handful of distinct option combinations however many
+        # responses there are, so count combinations first and split just those
+        selected = {}
+        for combination, count in answers.value_counts(sort=False).items():
+            for option in {option.strip() for option in combination.split(';')} - {''}:
+                selected[option] = selected.get(option, 0) + count
+        return pd.Series(selected, dtype=float), len(answers)
+    answers = pd.to_numeric(answers)
+    bucketed = pd.cut(answers, bins=spec['bins'], labels=spec['labels'], right=False)
+    # Answers outside the bins are still respondents, so they stay in the base
+    return bucketed.value_counts(sort=False), len(answers)
+
+
+def _shares(responses, spec):
+    counts, respondents = answer_counts(responses, spec)
+    return counts / respondents * 100
+
+
+def _flags(responses, spec):
+    return pd.Series({label: responses[column].dropna().astype(bool).mean() * 100
+                      for label, column in spec['flags'].items()})
+
+
+def _group_percent(responses, spec):
+    answers = responses[[spec['group'], spec['question']]].dropna()
+    return answers[spec['question']].astype(bool).groupby(answers[spec['group']]).mean() * 100
+
+
+def _group_mean(responses, spec):
+    answers = responses[[spec['group'], spec['question']]].dropna()
+    return pd.to_numeric(answers[spec['question']]).groupby(answers[spec['group']]).mean()
+
+
+_KINDS = {
+    'single_choice': _shares,
+    'multi_select': _shares,
+    'flags': _flags,
+    'group_percent': _group_percent,
+    'group_mean': _group_mean,
+    'buckets': _shares,
+}
+
+
+def counted_responses(responses):
+    """Return the responses that count towards the figures."""
+    if 'status' in responses.columns:
+        responses = responses[responses['status'].isin(COUNTED_STATUSES)]
+    return responses
+
+
+def aggregate_figure(responses, spec):
+    """
+    Compute one figure table.
+
+    Args:
+        responses: DataFrame of flattened responses (already status-filtered)
+        spec: Entry from FIGURES
+
+    Returns:
+        DataFrame with the figure's two columns
+    """
+    where = spec.get('where')
+    if where is not None:
+        column, value = where
+        responses = responses[responses[column] == value]
+    values = _KINDS[spec['kind']](responses, spec)
+    values.index = values.index.astype(object)
+    return percent_table(values.astype(float), spec)
+
+
+def required_columns(figures=FIGURES):
+    """Return the response columns the given figure specs read."""
+    columns = set()
+    for spec in figures.values():
+        for key in ('question', 'group'):
+            if key in spec:
+                columns.add(spec[key])
+        columns.update(spec.get('flags', {}).values())
+        if 'where' in spec:
+            columns.add(spec['where'][0])
+    return sorted(columns)
+
+
+def aggregate_responses(responses, figures=FIGURES):
+    """
+    Compute every figure table from raw responses.
+
+    Args:
+        responses: DataFrame with one row per response (see RESPONSE_COLUMNS)
+        figures: Figure specs to compute (default: FIGURES)
+
+    Returns:
+        Dict mapping data/ CSV file name to DataFrame
+
+    Raises:
+        ValueError: If response columns needed by the figures are missing
+    """
+    missing = [col for col in required_columns(figures) if col not in responses.columns]
+    if missing:
+        raise ValueError(f"Missing required response columns: {missing}")
+
+    responses = counted_responses(responses)
+    return {csv_name: aggregate_figure(responses, spec) for csv_name, spec in figures.items()}
+
+
+def write_tables(tables, out_dir):
+    """Write figure tables as CSVs into out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    for csv_name, df in tables.items():
+        df.to_csv(os.path.join(out_dir, csv_name), index=False)
+
+
+def main(argv=None):
+    """Aggregate a responses CSV into figure CSVs."""
+    parser = argparse.ArgumentParser(description="Aggregate raw survey responses into figure tables.")
+    parser.add_argument('responses', help="CSV of flattened responses, one row per organisation")
+    parser.add_argument('--out-dir', required=True, help="Directory to write the figure CSVs into")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.responses):
+        parser.error(f"Responses file not found: {args.responses}")
+
+    responses = pd.read_csv(args.responses)
+    try:
+        tables = aggregate_responses(responses)
+    except ValueError as e:
+        print(f"Error aggregating responses: {e}")
+        sys.exit(1)
+
+    write_tables(tables, args.out_dir)
+    print(f"Aggregated {len(counted_responses(responses)):,} responses into "
+          f"{len(tables)} tables in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Build the report for many clients from one long-lived process.
+
+Each job pairs a client's data directory with an output directory. Jobs run
+across a pool of worker processes that load matplotlib once and share one
+render cache, so pages that are identical for every client (the cover and
+executive summary) are rendered a single time for the whole batch. A failed
+job is reported and the batch carries on.
+
+With --page-store the jobs share a content-addressed page store instead
+(see pagestore.py): each distinct page is kept once however many reports
+use it, and with --refs-only reports are written as page references
+rather than PDFs.
+
+Usage:
+    python src/batch.py jobs.json [--workers 4]
+    python src/batch.py --job clients/acme/data out/acme --job clients/beta/data out/beta
+
+jobs.json is a list of {"data_dir": ..., "out_dir": ...} objects; relative
+paths are resolved against the file's directory.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache import DEFAULT_MAX_BYTES, RenderCache
+from compact import format_bytes
+from pagestore import PageStore
+from registry import DEFAULT_MANIFEST, load_manifest, select_pages
+
+
+def load_jobs(path):
+    """
+    Load a jobs file.
+
+    Args:
+        path: Path to a JSON list of {"data_dir", "out_dir"} objects
+
+    Returns:
+        List of (data_dir, out_dir) tuples with absolute paths
+
+    Raises:
+        FileNotFoundError: If the jobs file doesn't exist
+        ValueError: If an entry is malformed
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Jobs file not found: {path}")
+
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"Jobs file {path} must contain a list")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for i, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict) or not entry.get('data_dir') or not entry.get('out_dir'):
+            raise ValueError(f"Job {i} in {path} needs 'data_dir' and 'out_dir'")
+        jobs.append((os.path.join(base_dir, entry['data_dir']),
+                     os.path.join(base_dir, entry['out_dir'])))
+    return jobs
+
+
+def run_job(task):
+    """
+    Build one client's report. Runs inside pool workers.
+
+    The job's progress output goes to ``build.log`` in its output directory.
+
+    Args:
+        task: (pages, data_dir, out_dir, cache_dir, cache_bytes, compact,
+            store_dir, refs_only) tuple; store_dir None uses the render cache
+
+    Returns:
+        Dict with data_dir, out_dir, pages, seconds, error (None on success)
+        and, for compact builds, sizes: (bytes before, bytes after)
+    """
+    from build_report import build_report_files
+    from compact import Compactor
+
+    pages, data_dir, out_dir, cache_dir, cache_bytes, compact, store_dir, refs_only = task
+    result = {'data_dir': data_dir, 'out_dir': out_dir, 'pages': 0, 'error': None, 'sizes': None}
+    compactor = Compactor() if compact else None
+    failed = []
+    start = time.perf_counter()
+    try:
+        if not os.path.isdir(data_dir):
+            raise FileNotFoundError(f"Data directory not found: {data_dir}")
+        os.makedirs(out_dir, exist_ok=True)
+        cache = PageStore(store_dir) if store_dir else RenderCache(cache_dir, cache_bytes)
+        with open(os.path.join(out_dir, 'build.log'), 'w', encoding='utf-8') as log, \
+                contextlib.redirect_stdout(log):
+            _, result['pages'] = build_report_files(pages, data_dir, out_dir, 1, cache, compactor=compactor,
+                                                    refs_only=refs_only, failed=failed)
+            if compactor is not None:
+                result['sizes'] = compactor.totals()
+        if failed:
+            result['error'] = (f"{len(failed)} of {len(pages)} pages failed ({', '.join(failed)}); "
+                               f"see {os.path.join(out_dir, 'build.log')}")
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def prime_static_pages(pages, cache):
+    """
+    Render the pages that don't depend on client data into the cache.
+
+    Doing this once up front means workers all find them cached instead of
+    several rendering the same cover page at the same time. It also loads
+    matplotlib in the parent, which forked workers then inherit warm.
+    """
+    from build_report import DEFAULT_PNG, cached_outputs, page_key, render_page, store_outputs, warm_up
+
+    warm_up()
+    outputs = ('pdf',) + DEFAULT_PNG
+    for page in pages:
+        if 'csv' in page:
+            continue
+        key = page_key(page, None)
+        found = cached_outputs(cache, key, outputs)
+        missing = [output for output in outputs if output not in found]
+        if missing:
+            _, rendered, _ = render_page((page, None, missing))
+            if rendered is not None:
+                store_outputs(cache, key, rendered)
+
+
+def run_batch(jobs, pages, cache_dir, cache_bytes=DEFAULT_MAX_BYTES, workers=1, compact=False,
+              store_dir=None, refs_only=False):
+    """
+    Build every job's report, continuing past failures.
+
+    Args:
+        jobs: List of (data_dir, out_dir) tuples
+        pages: Ordered page specs from the manifest
+        cache_dir: Render cache shared by all jobs
+        cache_bytes: Size bound for the shared cache
+        workers: Number of worker processes
+        compact: Shrink each report's outputs (see compact.py)
+        store_dir: Page store shared by all jobs in place of the render
+            cache, or None
+        refs_only: With store_dir, write each report's pages.json instead
+            of its PDF
+
+    Yields:
+        Result dicts from run_job, in completion order
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from build_report import warm_up
+
+    prime_static_pages(pages, PageStore(store_dir) if store_dir else RenderCache(cache_dir, cache_bytes))
+    tasks = [(pages, data_dir, out_dir, cache_dir, cache_bytes, compact, store_dir, refs_only)
+             for data_dir, out_dir in jobs]
+    if workers == 1:
+        yield from map(run_job, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up) as pool:
+        futures = [pool.submit(run_job, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Build the report for many clients in one process.")
+    parser.add_argument('jobs_file', nargs='?',
+                        help="JSON list of {\"data_dir\": ..., \"out_dir\": ...} jobs")
+    parser.add_argument('--job', nargs=2, action='append', default=[], metavar=('DATA_DIR', 'OUT_DIR'),
+                        help="Add a job on the command line (repeatable)")
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                        help="Worker processes (0 = one per CPU, default: 1)")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help="Page manifest to build from (default: manifest.json)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Render cache shared by all jobs (default: out/.cache)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        metavar='MB', help="Evict least recently used cached pages above this size")
+    parser.add_argument('--compact', action='store_true',
+                        help="Shrink each report's PDF and PNGs (see build_report.py --compact)")
+    parser.add_argument('--page-store', default=None, metavar='DIR',
+                        help="Page store shared by all jobs, in place of the render cache "
+                             "(see build_report.py --page-store)")
+    parser.add_argument('--refs-only', action='store_true',
+                        help="With --page-store, write each report's pages.json instead of its PDF")
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error("--workers must be >= 0")
+    if args.refs_only and not args.page_store:
+        parser.error("--refs-only needs --page-store")
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+
+    try:
+        args.jobs = load_jobs(args.jobs_file) if args.jobs_file else []
+        args.pages = select_pages(load_manifest(args.manifest))
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    args.jobs += [(os.path.abspath(data_dir), os.path.abspath(out_dir)) for data_dir, out_dir in args.job]
+    if not args.jobs:
+        parser.error("no jobs given; pass a jobs file or --job DATA_DIR OUT_DIR")
+    return args
+
+
+def main(argv=None):
+    """Run a batch and print per-job timings."""
+    args = parse_args(argv)
+    cache_dir = args.cache_dir or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'out', '.cache')
+
+    print(f"Building {len(args.jobs)} report(s) with {args.workers} worker(s)...")
+    start = time.perf_counter()
+    failures = 0
+    before = after = 0
+    for result in run_batch(args.jobs, args.pages, cache_dir, args.cache_size * 1024 * 1024,
+                            args.workers, args.compact, args.page_store, args.refs_only):
+        status = 'ok' if result['error'] is None else 'FAILED'
+        sizes = ''
+        if result['sizes'] is not None:
+            before += result['sizes'][0]
+            after += result['sizes'][1]
+            sizes = f"  {format_bytes(result['sizes'][0]):>9} -> {format_bytes(result['sizes'][1]):>9}"
+        print(f"{status:>6}  {result['seconds']:7.2f}s  {result['pages']:3d} pages{sizes}  {result['out_dir']}")
+        if result['error'] is not None:
+            failures += 1
+            print(f"        {result['error']}")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(args.jobs) - failures} succeeded, {failures} failed in {elapsed:.2f}s")
+    if args.compact:
+        print(f"Output size: {format_bytes(before)} -> {format_bytes(after)}"
+              + (f" ({(after - before) / before:+.0%})" if before else ""))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,51 @@
 """
 Main entry point for building the Health Care Benefits Strategy Survey report.
 Loads CSV data and generates a multi-page PDF with charts and tables.
+
+pandas, matplotlib and pypdf are imported on first use rather than at module
+import, so argument and manifest errors are reported before paying for them
+and fully cached rebuilds never load pandas or matplotlib at all.
 """
+import argparse
+import contextlib
+import csv
+import gc
+import io
 import os
 import sys
-import pandas as pd
-from matplotlib.backends.backend_pdf import PdfPages
-import matplotlib.pyplot as plt
+
+# Reports are only ever written to files; never probe for a GUI backend.
+# Set before matplotlib is imported here or in any worker process.
+os.environ.setdefault('MPLBACKEND', 'Agg')
 
 # Add the src directory to Python path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from charts import bar_chart, horizontal_bar_chart, table_page
-from pages import create_cover_page, create_executive_summary
+from cache import DEFAULT_MAX_BYTES, RenderCache, page_key
+from compact import Compactor, format_bytes
+from instrument import NULL_RECORDER, Recorder, make_recorder, write_records
+from pagestore import REFS_FILE, PageStore, page_refs, write_refs
+from registry import DEFAULT_MANIFEST, RENDERERS, is_compiled_dir, load_manifest, page_inputs, select_pages
+from watch import DEFAULT_INTERVAL, watch
+
+# PNG exports selectable with --png: resolution and directory under figures/
+PNG_VARIANTS = {
+    '150': {'dpi': 150, 'dir': ''},
+    '300': {'dpi': 300, 'dir': '300dpi'},
+    'thumb': {'dpi': 30, 'dir': 'thumbs'},
+}
+DEFAULT_PNG = ('150',)
+
+# PDF document info for PdfPages. Without a creation date, rendering a page
+# twice gives the same bytes, which the page store relies on.
+PDF_METADATA = {'CreationDate': None}
+
+
+def cache_format(output):
+    """Return the RenderCache format name for 'pdf' or a PNG variant."""
+    if output == 'pdf':
+        return 'pdf'
+    return f"{PNG_VARIANTS[output]['dpi']}.png"
 
 
 def load_csv_data(csv_path, required_columns):
@@ -34,226 +67,871 @@ def load_csv_data(csv_path, required_columns):
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV file not found: {csv_path}")
     
-    df = pd.read_csv(csv_path)
-    
-    missing_cols = [col for col in required_columns if col not in df.columns]
+    # Check the header before importing pandas so bad inputs fail fast
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), [])
+    missing_cols = [col for col in required_columns if col not in header]
     if missing_cols:
         raise ValueError(f"Missing required columns in {csv_path}: {missing_cols}")
     
-    return df
+    import pandas as pd
+    return pd.read_csv(csv_path)
+
+
+_page_builders = None
+
+
+def page_builders():
+    """
+    Return the chart and page helpers by manifest chart name.
+    
+    The helpers (and with them pandas and matplotlib) are imported on the
+    first call.
+    """
+    global _page_builders
+    if _page_builders is None:
+        from charts import bar_chart, benchmark_chart, faceted_bar_chart, horizontal_bar_chart, table_page
+        from pages import create_cover_page, create_executive_summary
+        _page_builders = {
+            'bar_chart': bar_chart,
+            'horizontal_bar_chart': horizontal_bar_chart,
+            'table_page': table_page,
+            'benchmark_chart': benchmark_chart,
+            'faceted_bar_chart': faceted_bar_chart,
+            'cover_page': create_cover_page,
+            'executive_summary': create_executive_summary,
+        }
+    return _page_builders
+
+
+def warm_up():
+    """
+    Pay matplotlib's one-off startup costs now.
+    
+    Imports the renderer, builds matplotlib's font list cache if this is a
+    fresh environment, and resolves the regular and bold fonts used by every
+    page so the first real page renders at steady-state speed.
+    """
+    page_builders()
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager
+    from matplotlib.font_manager import FontProperties
+    for weight in ('normal', 'bold'):
+        font_manager.findfont(FontProperties(weight=weight))
+    plt.switch_backend('Agg')
+
+
+def default_data_dir():
+    """Return the bundled data directory next to src/."""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+def default_out_dir():
+    """Return the default output directory next to src/."""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'out')
+
+
+def load_page_data(page, data_dir, recorder=NULL_RECORDER):
+    """
+    Load the DataFrame a data page is drawn from.
+    
+    Args:
+        page: Page spec dict from the manifest (see registry.py)
+        data_dir: Directory holding the page CSV files, or a compiled
+            data directory (see compiled.py)
+        recorder: instrument.Recorder timing the load
+    
+    Returns:
+        pandas DataFrame
+    """
+    with recorder.stage(page['name'], 'load'):
+        if is_compiled_dir(data_dir):
+            from compiled import load_compiled
+            return load_compiled(data_dir, page['csv'], page['columns'])
+        return load_csv_data(os.path.join(data_dir, page['csv']), page['columns'])
+
+
+def sheet_args(page, df):
+    """
+    Return the builder arguments for each PDF page a data page produces.
+    
+    Table pages too long for one page are split across several (see
+    charts.table_sheets), as are faceted charts with too many panels (see
+    charts.facet_sheets); every other page is a single sheet.
+    """
+    if page['chart'] == 'table_page':
+        from charts import table_sheets
+        return table_sheets(df, **page['args'])
+    if page['chart'] == 'faceted_bar_chart':
+        from charts import facet_sheets
+        return facet_sheets(df, **page['args'])
+    return [dict(page['args'], df=df)]
+
+
+def build_figures(page, data_dir, recorder=NULL_RECORDER):
+    """
+    Lazily build the matplotlib figures for a single page spec.
+    
+    Most pages are one figure; long tables are one figure per sheet. Each
+    figure is only built when the consumer asks for it.
+    
+    Args:
+        page: Page spec dict from the manifest (see registry.py)
+        data_dir: Directory holding the page CSV files, or a compiled
+            data directory (see compiled.py)
+        recorder: instrument.Recorder timing the load and build stages
+    
+    Yields:
+        matplotlib Figure objects
+    """
+    builder = page_builders()[page['chart']]
+    name = page['name']
+    if 'csv' not in page:
+        with recorder.stage(name, 'build'), recorder.tight_layout_hook(name):
+            fig = builder()
+        yield fig
+        return
+    df = load_page_data(page, data_dir, recorder)
+    for kwargs in sheet_args(page, df):
+        with recorder.stage(name, 'build'), recorder.tight_layout_hook(name):
+            fig = builder(**kwargs)
+        yield fig
+
+
+def iter_figures(pages, data_dir):
+    """
+    Lazily build the figures for each page spec.
+    
+    Each figure is only created when the consumer asks for the next one, so a
+    consumer that saves and closes every figure before advancing keeps at most
+    one page in memory regardless of report length.
+    
+    Args:
+        pages: Iterable of page specs
+        data_dir: Directory holding the page CSV files
+    
+    Yields:
+        (figure, page) tuples, several per page for long tables; pages that
+        fail to build are reported and skipped
+    """
+    for page in pages:
+        try:
+            for fig in build_figures(page, data_dir):
+                yield fig, page
+        except Exception as e:
+            print(f"Error creating {page['name']} chart: {e}")
 
 
 def create_all_charts():
     """
-    Create all chart figures and return as a list.
+    Create all chart figures lazily.
     
     Returns:
-        List of (figure, title) tuples
+        Iterator of (figure, title) tuples; the caller is responsible for
+        closing each figure before requesting the next
     """
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-    figures = []
+    chart_pages = [page for page in load_manifest() if 'csv' in page]
+    return ((fig, page['name']) for fig, page in iter_figures(chart_pages, default_data_dir()))
+
+
+def render_page(task):
+    """
+    Render one page's outputs to bytes. Runs inside pool workers.
     
-    # 1. Product Mix – Types of Plans Offered (Fig 1.5)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'product_mix_offered.csv'), ['Plan', 'Percent'])
-        fig = bar_chart(df, 'Plan', 'Percent', 
-                       'Product Mix – Types of Plans Offered (Fig 1.5)',
-                       ylabel='Percentage of Organizations', 
-                       value_fmt='percent')
-        figures.append((fig, 'product_mix_offered'))
-    except Exception as e:
-        print(f"Error creating product mix chart: {e}")
+    Pages using the vector renderer get their PDF from vector.py; matplotlib
+    then only draws their PNGs, if any are wanted. A long table page renders
+    to several sheets: a multi-page PDF fragment and one PNG per sheet. Sheets are written to the PDF as they are built
+    and closed before the next is built. PNGs are cropped with tight_bbox,
+    which skips the dry-run draw of a bbox_inches='tight' save.
     
-    # 2. Funding Approaches (Fig 1.9)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'funding.csv'), ['Type', 'Percent'])
-        fig = bar_chart(df, 'Type', 'Percent',
-                       'Funding Approaches (Fig 1.9)',
-                       ylabel='Percentage of Organizations',
-                       value_fmt='percent')
-        figures.append((fig, 'funding_approaches'))
-    except Exception as e:
-        print(f"Error creating funding chart: {e}")
+    Args:
+        task: (page spec, data directory, outputs) tuple, optionally followed
+            by instrumentation options from Recorder.options(). outputs lists
+            'pdf' and/or PNG variant names from PNG_VARIANTS.
     
-    # 3. Self-funded Network (Fig 1.11)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'network.csv'), ['Network', 'Percent'])
-        fig = horizontal_bar_chart(df, 'Network', 'Percent',
-                                  'Self-funded Network (Fig 1.11)',
-                                  xlabel='Percentage of Organizations',
-                                  value_fmt='percent')
-        figures.append((fig, 'self_funded_network'))
-    except Exception as e:
-        print(f"Error creating network chart: {e}")
+    Returns:
+        (name, {output: data}, records) tuple. The PDF is bytes and each PNG
+        variant a list of bytes, one per sheet. The dict is None if the page
+        could not be built, and records is the list of stage records (empty
+        unless instrumentation options were given)
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
     
-    # 4. Cost of Services at Own Hospital (Fig 1.12)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'own_hospital_cost.csv'), ['Method', 'Percent'])
-        fig = bar_chart(df, 'Method', 'Percent',
-                       'Cost of Services at Own Hospital (Fig 1.12)',
-                       ylabel='Percentage of Organizations',
-                       rotation=45, value_fmt='percent')
-        figures.append((fig, 'own_hospital_cost'))
-    except Exception as e:
-        print(f"Error creating hospital cost chart: {e}")
+    page, data_dir, outputs = task[:3]
+    recorder = make_recorder(task[3] if len(task) > 3 else None)
+    name = page['name']
+    rendered = {output: [] for output in outputs if output != 'pdf'}
+    pdf_buf = io.BytesIO()
+    with recorder.profile(name), contextlib.ExitStack() as stack:
+        vector_pdf = None
+        if 'pdf' in outputs and page.get('renderer') == 'vector':
+            try:
+                vector_pdf = render_vector_pdf(page, data_dir, recorder)
+            except Exception as e:
+                print(f"Error creating {name} chart: {e}")
+                return name, None, list(recorder.records)
+            if vector_pdf is not None and not rendered:
+                return name, {'pdf': vector_pdf}, list(recorder.records)
+        pdf = None
+        if 'pdf' in outputs and vector_pdf is None:
+            pdf = stack.enter_context(PdfPages(pdf_buf, metadata=PDF_METADATA))
+        sheets = build_figures(page, data_dir, recorder)
+        while True:
+            try:
+                fig = next(sheets, None)
+            except Exception as e:
+                print(f"Error creating {name} chart: {e}")
+                return name, None, list(recorder.records)
+            if fig is None:
+                break
+            try:
+                if pdf is not None:
+                    with recorder.stage(name, 'pdf'):
+                        pdf.savefig(fig, bbox_inches='tight')
+                for variant in rendered:
+                    dpi = PNG_VARIANTS[variant]['dpi']
+                    buf = io.BytesIO()
+                    with recorder.stage(name, f'png:{variant}'):
+                        fig.savefig(buf, format='png', bbox_inches=tight_bbox(fig, dpi), dpi=dpi)
+                    rendered[variant].append(buf.getvalue())
+            finally:
+                plt.close(fig)
+                del fig
+                gc.collect()
+    if vector_pdf is not None:
+        rendered['pdf'] = vector_pdf
+    elif pdf is not None:
+        rendered['pdf'] = pdf_buf.getvalue()
+    return name, rendered, list(recorder.records)
+
+
+def render_vector_pdf(page, data_dir, recorder=NULL_RECORDER):
+    """
+    Draw a page's PDF with the vector renderer (see vector.py).
     
-    # 5. 2022 Medical Cost PEPM by Region (Fig 1.13)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'monthly_cost_pepm.csv'), ['Region', 'PEPM'])
-        fig = bar_chart(df, 'Region', 'PEPM',
-                       '2022 Medical Cost PEPM by Region (Fig 1.13)',
-                       ylabel='Cost Per Employee Per Month',
-                       rotation=45, value_fmt='currency')
-        figures.append((fig, 'monthly_cost_pepm'))
-    except Exception as e:
-        print(f"Error creating PEPM chart: {e}")
+    Returns:
+        PDF bytes, or None if the page has to be drawn with matplotlib
+    """
+    import vector
     
-    # 6. No-cost Plan Prevalence – EE Only (Fig 1.14)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'no_cost_ee_only.csv'), ['Region', 'Percent'])
-        fig = bar_chart(df, 'Region', 'Percent',
-                       'No-cost Plan Prevalence – EE Only (Fig 1.14)',
-                       ylabel='Percentage of Organizations',
-                       rotation=45, value_fmt='percent')
-        figures.append((fig, 'no_cost_ee_only'))
-    except Exception as e:
-        print(f"Error creating no-cost plan chart: {e}")
+    if page['chart'] not in vector.SUPPORTED_ARGS:
+        return None
+    df = load_page_data(page, data_dir, recorder)
+    reason = vector.unsupported_reason(page, df)
+    if reason:
+        print(f"Drawing {page['name']} with matplotlib: {reason}")
+        return None
+    with recorder.stage(page['name'], 'pdf'):
+        return vector.render_pdf(page, df)
+
+
+def _init_worker():
+    """Pool initializer: load matplotlib and fonts once per worker."""
+    warm_up()
+
+
+def render_pages_parallel(tasks, jobs):
+    """
+    Render pages across a process pool.
     
-    # 7. Telemedicine & Teletherapy Access (Fig 1.21-1.22)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'tele_access.csv'), ['Benefit', 'Percent'])
-        fig = bar_chart(df, 'Benefit', 'Percent',
-                       'Telemedicine & Teletherapy Access (Fig 1.21-1.22)',
-                       ylabel='Percentage of Organizations',
-                       value_fmt='percent')
-        figures.append((fig, 'tele_access'))
-    except Exception as e:
-        print(f"Error creating telemedicine access chart: {e}")
+    Args:
+        tasks: Ordered list of render_page tasks
+        jobs: Number of worker processes
     
-    # 8. Telemedicine Copay vs PCP Relationship (Fig 1.21)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'tele_copay_relationship.csv'), ['Relationship', 'Percent'])
-        fig = horizontal_bar_chart(df, 'Relationship', 'Percent',
-                                  'Telemedicine Copay vs PCP Relationship (Fig 1.21)',
-                                  xlabel='Percentage of Organizations',
-                                  value_fmt='percent')
-        figures.append((fig, 'tele_copay_relationship'))
-    except Exception as e:
-        print(f"Error creating copay relationship chart: {e}")
+    Yields:
+        render_page results in task order
+    """
+    from concurrent.futures import ProcessPoolExecutor
     
-    # 9. Stop-loss Specific Attachment Points (Fig 1.24)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'stop_loss_attachment_points.csv'), ['Attachment Point', 'Percent'])
-        fig = horizontal_bar_chart(df, 'Attachment Point', 'Percent',
-                                  'Stop-loss Specific Attachment Points (Fig 1.24)',
-                                  xlabel='Percentage of Organizations',
-                                  value_fmt='percent')
-        figures.append((fig, 'stop_loss_attachment'))
-    except Exception as e:
-        print(f"Error creating stop-loss chart: {e}")
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        yield from pool.map(render_page, tasks)
+
+
+def merge_pdf_pages(fragments, pdf_path, compactor=None):
+    """
+    Concatenate per-page PDF documents into one file, in order.
     
-    # 10. HDHP Offering (Fig 1.42)
-    try:
-        df = load_csv_data(os.path.join(data_dir, 'hdhp_offering.csv'), ['Category', 'Percent'])
-        fig = bar_chart(df, 'Category', 'Percent',
-                       'HDHP Offering (Fig 1.42)',
-                       ylabel='Percentage of Organizations',
-                       rotation=15, value_fmt='percent')
-        figures.append((fig, 'hdhp_offering'))
-    except Exception as e:
-        print(f"Error creating HDHP chart: {e}")
+    Args:
+        fragments: Iterable of PDF documents as bytes
+        pdf_path: Output path for the merged PDF
+        compactor: compact.Compactor to shrink the merged PDF, or None
+    
+    Returns:
+        Number of pages in the merged PDF
+    """
+    data, page_count = merge_pdf_bytes(fragments)
+    if compactor is not None:
+        data = compactor.pdf(data)
+    # Replace the old report in one step so viewers never open a partial file
+    tmp_path = pdf_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, pdf_path)
+    return page_count
+
+
+def merge_pdf_bytes(fragments):
+    """
+    Concatenate per-page PDF documents in memory, in order.
     
-    # 11. Dental Options Offered (Fig 1.49)
+    Returns:
+        (merged PDF bytes, number of pages) tuple
+    """
+    from pypdf import PdfReader, PdfWriter
+    
+    writer = PdfWriter()
+    for data in fragments:
+        writer.append(PdfReader(io.BytesIO(data)))
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue(), len(writer.pages)
+
+
+def count_pdf_pages(fragments):
+    """Return the total number of pages in per-page PDF documents."""
+    from pypdf import PdfReader
+    
+    return sum(len(PdfReader(io.BytesIO(data)).pages) for data in fragments)
+
+
+def write_if_changed(path, data):
+    """
+    Write bytes to path unless it already holds exactly those bytes.
+    
+    The file is replaced rather than written in place: it may be a hard link
+    into a page store, which must not change.
+    """
     try:
-        df = load_csv_data(os.path.join(data_dir, 'dental_offerings.csv'), ['Plan', 'Percent'])
-        fig = bar_chart(df, 'Plan', 'Percent',
-                       'Dental Options Offered (Fig 1.49)',
-                       ylabel='Percentage of Organizations',
-                       value_fmt='percent')
-        figures.append((fig, 'dental_offerings'))
-    except Exception as e:
-        print(f"Error creating dental chart: {e}")
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def tight_bbox(fig, dpi):
+    """
+    Return the box a bbox_inches='tight' save at dpi would crop to.
+    
+    Passing the result to savefig skips the full dry-run draw that 'tight'
+    does first. Text extents depend on the resolution, so the box is
+    measured with a renderer at the save's dpi; it then matches the plain
+    'tight' crop pixel for pixel.
+    """
+    import matplotlib
     
-    # 12. Union Representation Mix (Fig 1.3)
+    figure_dpi = fig.dpi
+    fig.dpi = dpi
     try:
-        df = load_csv_data(os.path.join(data_dir, 'union_rep.csv'), ['Category', 'Percent'])
-        fig = bar_chart(df, 'Category', 'Percent',
-                       'Union Representation Mix (Fig 1.3)',
-                       ylabel='Percentage of Organizations',
-                       value_fmt='percent')
-        figures.append((fig, 'union_representation'))
-    except Exception as e:
-        print(f"Error creating union representation chart: {e}")
+        bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+    finally:
+        fig.dpi = figure_dpi
+    return bbox.padded(matplotlib.rcParams['savefig.pad_inches'])
+
+
+def parse_png_variants(value):
+    """
+    Parse a --png value such as '150', '150,thumb' or 'none'.
+    
+    Returns:
+        Tuple of PNG_VARIANTS names, empty for 'none'
     
-    # 13. Appendix EE Contributions Table (Optional)
+    Raises:
+        ValueError: If a name is not a known variant
+    """
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if names == ['none']:
+        return ()
+    unknown = [name for name in names if name not in PNG_VARIANTS]
+    if unknown or not names:
+        raise ValueError(f"--png takes 'none' or a comma-separated list of "
+                         f"{', '.join(PNG_VARIANTS)}; got {value!r}")
+    return tuple(dict.fromkeys(names))
+
+
+def page_png_path(figures_dir, page, variant=DEFAULT_PNG[0], sheet=1):
+    """
+    Return the PNG path for a page, numbered by its position in the report.
+    
+    Continuation sheets of a long table add a suffix: page_16_appendix_p2.png.
+    """
+    suffix = f'_p{sheet}' if sheet > 1 else ''
+    return os.path.join(figures_dir, PNG_VARIANTS[variant]['dir'],
+                        f"page_{page['number']:02d}_{page['name']}{suffix}.png")
+
+
+def write_page_pngs(figures_dir, page, variant, sheets, compactor=None, store=None):
+    """
+    Write a page's PNG sheets, leaving unchanged files alone.
+    
+    Continuation sheets left over from a previously longer table are removed.
+    Sheets are compacted first if a compact.Compactor is given. With a
+    pagestore.PageStore, each sheet is put in the store and written as a
+    hard link to it.
+    
+    Returns:
+        The store digest of each sheet, empty without a store
+    """
+    digests = []
+    for sheet, data in enumerate(sheets, start=1):
+        if compactor is not None:
+            data = compactor.png(variant, data)
+        path = page_png_path(figures_dir, page, variant, sheet)
+        if store is None:
+            write_if_changed(path, data)
+        else:
+            digests.append(store.put_object(data, 'png'))
+            store.link(digests[-1], 'png', path)
+    sheet = len(sheets) + 1
+    while os.path.exists(page_png_path(figures_dir, page, variant, sheet)):
+        os.remove(page_png_path(figures_dir, page, variant, sheet))
+        sheet += 1
+    return digests
+
+
+def cached_outputs(cache, key, outputs):
+    """
+    Look up a page's outputs in the render cache.
+    
+    Returns:
+        Dict of the outputs found, in render_page's format
+    """
+    found = {}
+    for output in outputs:
+        if output == 'pdf':
+            data = cache.get(key, cache_format(output))
+        else:
+            data = cache.get_sheets(key, cache_format(output))
+        if data is not None:
+            found[output] = data
+    return found
+
+
+def store_outputs(cache, key, rendered):
+    """Store render_page outputs in the render cache."""
+    for output, data in rendered.items():
+        if output == 'pdf':
+            cache.put(key, cache_format(output), data)
+        else:
+            cache.put_sheets(key, cache_format(output), data)
+
+
+def build_report_serial(pdf_path, figures_dir, pages, data_dir, png=DEFAULT_PNG,
+                        recorder=NULL_RECORDER, compactor=None, failed=None):
+    """
+    Build the report in this process, streaming one page at a time.
+    
+    Every page (and every sheet of a long table) is built, written to the
+    PDF and its PNGs, and closed before the next is built, so peak memory
+    does not grow with page count.
+    
+    Args:
+        pdf_path: Output path for the PDF
+        figures_dir: Output directory for page PNGs
+        pages: Ordered page specs from the manifest
+        data_dir: Directory holding the page CSV files
+        png: PNG variants to write for each page (see PNG_VARIANTS)
+        recorder: instrument.Recorder timing each page's stages
+        compactor: compact.Compactor to shrink the PDF and PNGs as they are
+            written, or None
+        failed: List to append the names of pages that could not be built
+            to, or None
+    
+    Returns:
+        Number of PDF pages written
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+    
+    page_count = 0
+    with PdfPages(pdf_path, metadata=PDF_METADATA) as pdf:
+        for page in pages:
+            name = page['name']
+            with recorder.profile(name):
+                sheets = build_figures(page, data_dir, recorder)
+                sheet = 0
+                while True:
+                    try:
+                        fig = next(sheets, None)
+                    except Exception as e:
+                        print(f"Error creating {name} chart: {e}")
+                        if failed is not None:
+                            failed.append(name)
+                        break
+                    if fig is None:
+                        break
+                    sheet += 1
+                    page_count += 1
+                    if sheet == 1:
+                        print(f"Creating page {page['number']}: {name}")
+                    try:
+                        with recorder.stage(name, 'pdf'):
+                            pdf.savefig(fig, bbox_inches='tight')
+                        for variant in png:
+                            path = page_png_path(figures_dir, page, variant, sheet)
+                            dpi = PNG_VARIANTS[variant]['dpi']
+                            buf = io.BytesIO()
+                            with recorder.stage(name, f'png:{variant}'):
+                                fig.savefig(buf, format='png', bbox_inches=tight_bbox(fig, dpi), dpi=dpi)
+                                data = buf.getvalue()
+                                if compactor is not None:
+                                    data = compactor.png(variant, data)
+                                # Not in place: the old file may be linked into a page store
+                                write_if_changed(path, data)
+                    finally:
+                        plt.close(fig)
+                    # Figures and their renderers form reference cycles; collect them
+                    # now rather than letting several pages' buffers pile up first.
+                    del fig
+                    gc.collect()
+    
+    if compactor is not None:
+        # Pages written by one PdfPages already share their fonts, so this
+        # gains less than on a merged report, but the PDF is still rewritten
+        with open(pdf_path, 'rb') as f:
+            data = compactor.pdf(f.read())
+        # As in merge_pdf_pages: an interrupted rewrite must not truncate the report
+        tmp_path = pdf_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, pdf_path)
+    return page_count
+
+
+def build_report_fragments(pdf_path, figures_dir, pages, data_dir, jobs=1, cache=None,
+                           png=DEFAULT_PNG, recorder=NULL_RECORDER, compactor=None, refs_only=False,
+                           failed=None):
+    """
+    Build the report from per-page PDF fragments.
+    
+    Each page's PDF and each requested PNG variant are looked up in the
+    render cache separately, so a page whose PDF is cached but which lacks a
+    PNG at the requested resolution is only rasterised, and --png none never
+    rasterises anything. Whatever is missing is rendered (in worker processes
+    when jobs > 1) and stored back. The PDF is then reassembled from the
+    fragments in report order.
+    
+    When the cache is a pagestore.PageStore, the pages are also recorded as
+    references into the store (pages.json next to the PDF) and the PNGs are
+    hard links to stored objects.
+    
+    Args:
+        pdf_path: Output path for the PDF
+        figures_dir: Output directory for page PNGs
+        pages: Ordered page specs from the manifest
+        data_dir: Directory holding the page CSV files
+        jobs: Number of worker processes for pages that need rendering
+        cache: RenderCache or PageStore instance, or None to render every page
+        png: PNG variants to write for each page (see PNG_VARIANTS)
+        recorder: instrument.Recorder timing each page's stages; pages
+            rendered in workers send their records back with the result
+        compactor: compact.Compactor to shrink the PDF and PNGs as they are
+            written, or None. The cache keeps the pages as rendered.
+        refs_only: With a PageStore, write pages.json but not the PDF (see
+            pagestore.assemble), removing any PDF left from an earlier build
+        failed: List to append the names of pages that could not be built
+            to, or None
+    
+    Returns:
+        Number of PDF pages written
+    """
+    outputs = ('pdf',) + tuple(png)
+    rendered = {}
+    keys = {}
+    tasks = []
+    for page in pages:
+        name = page['name']
+        found = {}
+        if cache is not None:
+            with recorder.stage(name, 'cache'):
+                try:
+                    keys[name] = page_key(page, data_dir)
+                except FileNotFoundError:
+                    # Let the render report the missing input like any other failure
+                    keys[name] = None
+                if keys[name]:
+                    found = cached_outputs(cache, keys[name], outputs)
+        rendered[name] = found
+        missing = [output for output in outputs if output not in found]
+        if missing:
+            tasks.append((page, data_dir, missing, recorder.options()))
+    
+    if jobs > 1 and len(tasks) > 1:
+        results = render_pages_parallel(tasks, min(jobs, len(tasks)))
+    else:
+        results = map(render_page, tasks)
+    if failed is None:
+        failed = []
+    for task, (name, outputs_rendered, records) in zip(tasks, results):
+        if records:
+            recorder.records.extend(records)
+        if outputs_rendered is None:
+            failed.append(name)
+            continue
+        page = task[0]
+        print(f"Rendered page {page['number']}: {name}"
+              + ('' if 'pdf' in outputs_rendered else f" ({', '.join(outputs_rendered)} only)"))
+        rendered[name].update(outputs_rendered)
+        if cache is not None and keys.get(name):
+            store_outputs(cache, keys[name], outputs_rendered)
+    
+    store = cache if isinstance(cache, PageStore) else None
+    fragments = []
+    refs = []
+    for page in pages:
+        if page['name'] in failed:
+            continue
+        outputs_found = rendered[page['name']]
+        png_digests = {}
+        for variant in png:
+            png_digests[variant] = write_page_pngs(figures_dir, page, variant, outputs_found[variant],
+                                                   compactor, store)
+        fragments.append(outputs_found['pdf'])
+        if store is not None:
+            refs.append(page_refs(page, outputs_found, png_digests))
+    if store is not None:
+        write_refs(os.path.dirname(pdf_path), store, refs, compactor is not None)
+    if refs_only:
+        total_pages = count_pdf_pages(fragments)
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+    else:
+        with recorder.stage('(report)', 'merge'):
+            total_pages = merge_pdf_pages(fragments, pdf_path, compactor)
+    
+    if cache is not None:
+        pdf_renders = sum(1 for task in tasks if 'pdf' in task[2])
+        png_only = len(tasks) - pdf_renders
+        evicted = cache.prune()
+        print(f"Cache: {len(pages) - len(tasks)} page(s) reused, {pdf_renders} rendered"
+              + (f", {png_only} rasterised" if png_only else "")
+              + (f", {evicted} evicted" if evicted else ""))
+    return total_pages
+
+
+def build_report_files(pages, data_dir, out_dir, jobs=1, cache=None, png=DEFAULT_PNG,
+                       recorder=NULL_RECORDER, compactor=None, refs_only=False, failed=None):
+    """
+    Build one report from a data directory into an output directory.
+    
+    Writes ``report.pdf`` and ``figures/`` under out_dir, creating them as
+    needed, and ``pages.json`` when the cache is a pagestore.PageStore.
+    
+    Args:
+        pages: Ordered page specs from the manifest
+        data_dir: Directory holding the page CSV files
+        out_dir: Output directory
+        jobs: Number of worker processes for pages that need rendering
+        cache: RenderCache or PageStore instance, or None to render every page
+        png: PNG variants to write for each page (see PNG_VARIANTS)
+        recorder: instrument.Recorder to collect per-page stage timings
+        compactor: compact.Compactor to shrink the outputs and tally their
+            sizes, or None to write them as rendered
+        refs_only: With a PageStore, write pages.json instead of report.pdf
+        failed: List to append the names of pages that could not be built
+            to, or None. One manifest page may make several PDF pages, so
+            the page count alone doesn't tell whether any failed.
+    
+    Returns:
+        (path, number of pages written) tuple; the path is report.pdf's, or
+        pages.json's with refs_only
+    """
+    figures_dir = os.path.join(out_dir, 'figures')
+    for variant in png:
+        os.makedirs(os.path.join(figures_dir, PNG_VARIANTS[variant]['dir']), exist_ok=True)
+    os.makedirs(out_dir, exist_ok=True)
+    pdf_path = os.path.join(out_dir, 'report.pdf')
+    
+    # The streaming build writes every page through matplotlib's PdfPages
+    vector_pages = any(page.get('renderer') == 'vector' for page in pages)
+    if cache is None and jobs == 1 and not vector_pages:
+        total_pages = build_report_serial(pdf_path, figures_dir, pages, data_dir, png, recorder,
+                                          compactor, failed)
+    else:
+        total_pages = build_report_fragments(pdf_path, figures_dir, pages, data_dir, jobs, cache,
+                                             png, recorder, compactor, refs_only, failed)
+    if refs_only:
+        return os.path.join(out_dir, REFS_FILE), total_pages
+    return pdf_path, total_pages
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Build the Health Care Benefits Strategy Survey report.")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Render pages in N worker processes (0 = one per CPU, default: 1)")
+    parser.add_argument('--data-dir', default=None,
+                        help="Directory holding the page CSV files (default: data/)")
+    parser.add_argument('--out-dir', default=None,
+                        help="Directory for report.pdf and figures/ (default: out/)")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help="Page manifest to build from (default: manifest.json)")
+    parser.add_argument('--only', type=lambda value: [name.strip() for name in value.split(',') if name.strip()],
+                        metavar='PAGE[,PAGE...]',
+                        help="Build only the named pages, e.g. --only stop_loss_attachment,funding_approaches")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Rendered page cache directory (default: out/.cache)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        metavar='MB', help="Evict least recently used cached pages above this size")
+    parser.add_argument('--page-store', default=None, metavar='DIR',
+                        help="Keep rendered pages in a content-addressed store shared between reports "
+                             "instead of the page cache, and record the report's pages in pages.json")
+    parser.add_argument('--refs-only', action='store_true',
+                        help="With --page-store, write pages.json and figures/ but not report.pdf "
+                             "(build it later with: python src/pagestore.py assemble OUT_DIR)")
+    parser.add_argument('--png', default=','.join(DEFAULT_PNG), metavar='none|150|300|thumb',
+                        help="PNG exports to write under figures/, comma-separated: 150 (default), "
+                             "300 (figures/300dpi/), thumb (figures/thumbs/) or none for the PDF only")
+    parser.add_argument('--compact', action='store_true',
+                        help="Shrink the outputs: store objects repeated across PDF pages once and write "
+                             "PNGs as 256-colour palette images; prints sizes before and after")
+    parser.add_argument('--renderer', choices=RENDERERS, default=None,
+                        help="Draw every data page with this renderer, overriding the manifest; "
+                             "'vector' writes simple charts and tables straight to PDF "
+                             "(pages it can't draw fall back to matplotlib)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Render every page and stream straight into the PDF")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and rebuild changed pages whenever a data CSV or the manifest changes")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_INTERVAL, metavar='SECONDS',
+                        help=f"How often --watch checks for changes (default: {DEFAULT_INTERVAL})")
+    parser.add_argument('--warm-up', action='store_true',
+                        help="Import matplotlib and build its font cache, then exit "
+                             "(run once when preparing a batch environment)")
+    parser.add_argument('--list-pages', action='store_true',
+                        help="List the pages in the manifest and exit")
+    parser.add_argument('--profile-out', default=None, metavar='FILE',
+                        help="Write per-page stage timings to FILE (.json or .csv)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="Also record peak Python allocations per stage in --profile-out "
+                             "(slows the build)")
+    parser.add_argument('--pstats-dir', default=None, metavar='DIR',
+                        help="Write a cProfile .pstats file per rendered page into DIR")
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be >= 0")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    if args.watch and args.no_cache:
+        parser.error("--watch needs the page cache; drop --no-cache")
+    if args.page_store and args.no_cache:
+        parser.error("--page-store replaces the page cache; drop --no-cache")
+    if args.refs_only and not args.page_store:
+        parser.error("--refs-only needs --page-store")
     try:
-        df = load_csv_data(os.path.join(data_dir, 'appendix_ee_contributions.csv'), 
-                          ['Plan Type', 'Employee Only', 'Employee + Spouse', 'Employee + Child(ren)', 'Employee + Family'])
-        fig = table_page(df, 'Employee Contributions by Plan Type (Appendix A)')
-        figures.append((fig, 'appendix_ee_contributions'))
-    except Exception as e:
-        print(f"Error creating appendix table: {e}")
+        args.png = parse_png_variants(args.png)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.profile_memory and not args.profile_out:
+        parser.error("--profile-memory needs --profile-out")
+    if args.watch and (args.profile_out or args.pstats_dir):
+        parser.error("--profile-out and --pstats-dir profile a single build; drop --watch")
     
-    return figures
+    try:
+        args.pages = select_pages(load_manifest(args.manifest), args.only)
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    apply_renderer(args.pages, args.renderer)
+    return args
 
 
-def main():
+def apply_renderer(pages, renderer):
+    """Set the renderer of every data page, if one was given on the command line."""
+    if renderer is None:
+        return
+    for page in pages:
+        if 'csv' in page:
+            page['renderer'] = renderer
+
+
+def main(argv=None):
     """Main function to build the complete report."""
-    # Setup paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
-    out_dir = os.path.join(project_root, 'out')
-    figures_dir = os.path.join(out_dir, 'figures')
+    args = parse_args(argv)
+    if args.warm_up:
+        warm_up()
+        return
+    if args.list_pages:
+        for page in args.pages:
+            print(f"{page['number']:3d}  {page['name']}")
+        return
     
-    # Ensure output directories exist
-    os.makedirs(out_dir, exist_ok=True)
-    os.makedirs(figures_dir, exist_ok=True)
+    data_dir = args.data_dir or default_data_dir()
+    out_dir = args.out_dir or default_out_dir()
+    cache = None
+    if args.page_store:
+        cache = PageStore(args.page_store)
+    elif not args.no_cache:
+        cache = RenderCache(args.cache_dir or os.path.join(out_dir, '.cache'),
+                            args.cache_size * 1024 * 1024)
     
-    # Create the PDF report
-    pdf_path = os.path.join(out_dir, 'report.pdf')
+    recorder = NULL_RECORDER
+    if args.profile_out or args.pstats_dir:
+        recorder = Recorder(trace_memory=args.profile_memory, profile_dir=args.pstats_dir)
     
     print("Building Health Care Benefits Strategy Survey Report...")
     
+    compactor = Compactor() if args.compact else None
     try:
-        with PdfPages(pdf_path) as pdf:
-            page_num = 1
-            
-            # Cover page
-            print(f"Creating page {page_num}: Cover page")
-            cover_fig = create_cover_page()
-            pdf.savefig(cover_fig, bbox_inches='tight')
-            cover_fig.savefig(os.path.join(figures_dir, f'page_{page_num:02d}_cover.png'), 
-                             bbox_inches='tight', dpi=150)
-            plt.close(cover_fig)
-            page_num += 1
-            
-            # Executive summary
-            print(f"Creating page {page_num}: Executive summary")
-            exec_fig = create_executive_summary()
-            pdf.savefig(exec_fig, bbox_inches='tight')
-            exec_fig.savefig(os.path.join(figures_dir, f'page_{page_num:02d}_executive_summary.png'), 
-                            bbox_inches='tight', dpi=150)
-            plt.close(exec_fig)
-            page_num += 1
-            
-            # All charts
-            figures = create_all_charts()
-            for fig, name in figures:
-                print(f"Creating page {page_num}: {name}")
-                pdf.savefig(fig, bbox_inches='tight')
-                fig.savefig(os.path.join(figures_dir, f'page_{page_num:02d}_{name}.png'), 
-                           bbox_inches='tight', dpi=150)
-                plt.close(fig)
-                page_num += 1
+        pdf_path, total_pages = build_report_files(args.pages, data_dir, out_dir, args.jobs, cache,
+                                                   args.png, recorder, compactor, args.refs_only)
         
         print(f"\nReport generated successfully!")
-        print(f"PDF saved to: {pdf_path}")
-        print(f"Individual pages saved to: {figures_dir}")
-        print(f"Total pages: {page_num - 1}")
+        print(f"{'Page references' if args.refs_only else 'PDF'} saved to: {pdf_path}")
+        if args.png:
+            print(f"Individual pages saved to: {os.path.join(out_dir, 'figures')}")
+        print(f"Total pages: {total_pages}")
+        if compactor is not None:
+            print("\nOutput size before -> after --compact:")
+            for line in compactor.report():
+                print(f"  {line}")
+        if args.profile_out:
+            write_records(recorder.records, args.profile_out)
+            print(f"Stage timings saved to: {args.profile_out}")
         
     except Exception as e:
         print(f"Error generating report: {e}")
-        sys.exit(1)
+        if not args.watch:
+            sys.exit(1)
+    
+    if args.watch:
+        watch_report(args, data_dir, out_dir, cache)
+
+
+def watch_report(args, data_dir, out_dir, cache):
+    """
+    Rebuild the report in this warm process whenever its inputs change.
+    
+    Pages whose CSV changed miss the cache and are re-rendered; everything
+    else is reassembled from cached pages. Edits to the manifest reload it.
+    """
+    state = {'pages': args.pages}
+    
+    def watched_paths():
+        paths = [args.manifest]
+        for page in state['pages']:
+            paths.extend(page_inputs(page, data_dir))
+        return paths
+    
+    def rebuild(changed):
+        if args.manifest in changed:
+            state['pages'] = select_pages(load_manifest(args.manifest), args.only)
+            apply_renderer(state['pages'], args.renderer)
+        compactor = Compactor() if args.compact else None
+        pdf_path, total_pages = build_report_files(state['pages'], data_dir, out_dir, args.jobs, cache,
+                                                   args.png, compactor=compactor, refs_only=args.refs_only)
+        if compactor is not None:
+            before, after = compactor.totals()
+            print(f"Updated {pdf_path} ({total_pages} pages, {format_bytes(before)} -> {format_bytes(after)})")
+        else:
+            print(f"Updated {pdf_path} ({total_pages} pages)")
+    
+    watch(watched_paths, rebuild, args.poll_interval)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+"""
+On-disk cache of rendered report pages.
+
+Each entry holds one page's PDF and its PNGs at every resolution rendered
+so far, each stored as its own file so they can be produced and reused
+independently. Entries are keyed by a hash of
+everything that determines how the page looks: the page spec from the
+manifest, the contents of its input files, the renderer source and the
+versions of the libraries doing the drawing. Unchanged pages are therefore
+reused across runs and only pages whose inputs changed are re-rendered.
+
+The cache is bounded in size; least recently used entries are evicted first.
+"""
+import hashlib
+import json
+import os
+import platform
+import tempfile
+
+from registry import page_inputs
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bump to invalidate every existing entry after a change to how pages are saved
+CACHE_FORMAT = 4
+
+# Settings passed to savefig; part of the key so changing them invalidates entries.
+# PNG resolution is part of each PNG's file name instead.
+RENDER_SETTINGS = {'bbox_inches': 'tight'}
+
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+_RENDERER_SOURCES = ('charts.py', 'pages.py', 'vector.py')
+_LIBRARIES = ('matplotlib', 'pandas', 'numpy')
+
+_environment_digest = None
+
+
+def _file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def environment_digest():
+    """
+    Hash the parts of the environment that affect rendering output.
+
+    Covers library versions, the Python version and the chart/page helper
+    and vector renderer sources. Computed once per process.
+    """
+    global _environment_digest
+    if _environment_digest is None:
+        from importlib import metadata
+
+        parts = {'format': CACHE_FORMAT, 'python': platform.python_version()}
+        for name in _LIBRARIES:
+            try:
+                parts[name] = metadata.version(name)
+            except metadata.PackageNotFoundError:
+                parts[name] = None
+        for name in _RENDERER_SOURCES:
+            parts[name] = _file_digest(os.path.join(_SRC_DIR, name))
+        _environment_digest = hashlib.sha256(
+            json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+    return _environment_digest
+
+
+def page_key(page, data_dir):
+    """
+    Compute the cache key for a page.
+
+    Args:
+        page: Page spec from the manifest
+        data_dir: Directory holding the page CSV files
+
+    Returns:
+        Hex digest string
+
+    Raises:
+        FileNotFoundError: If one of the page's input files is missing
+    """
+    # The page's position in the report does not change how it is drawn
+    spec = {k: v for k, v in page.items() if k != 'number'}
+    parts = {
+        'environment': environment_digest(),
+        'render': RENDER_SETTINGS,
+        'spec': spec,
+        'inputs': [_file_digest(path) for path in page_inputs(page, data_dir)],
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _write_atomic(path, data):
+    """Write bytes so concurrent readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class RenderCache:
+    """Size-bounded LRU store of rendered page PDF and PNG bytes."""
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            root: Cache directory (created if missing)
+            max_bytes: Total size above which prune() evicts old entries
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key, fmt):
+        return os.path.join(self.root, key[:2], f'{key}.{fmt}')
+
+    def get(self, key, fmt):
+        """
+        Look up one rendered output of a page.
+
+        Args:
+            key: Page key from page_key()
+            fmt: Output format name, e.g. 'pdf' or '150.png'
+
+        Returns:
+            The stored bytes, or None on a miss
+        """
+        path = self._path(key, fmt)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Refresh the access time used for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key, fmt, data):
+        """Store one rendered output of a page."""
+        path = self._path(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, data)
+
+    def get_sheets(self, key, fmt):
+        """
+        Look up an output stored with one file per sheet, such as the PNGs
+        of a table that spans several pages.
+
+        Returns:
+            List of bytes in sheet order, or None on a miss
+        """
+        first = self.get(key, fmt)
+        if first is None:
+            return None
+        sheets = [first]
+        while True:
+            data = self.get(key, f'p{len(sheets) + 1}.{fmt}')
+            if data is None:
+                return sheets
+            sheets.append(data)
+
+    def put_sheets(self, key, fmt, sheets):
+        """Store an output with one file per sheet."""
+        # Continuation sheets first: get_sheets() treats the output as
+        # present once the first sheet exists
+        for number, data in reversed(list(enumerate(sheets, start=1))):
+            self.put(key, fmt if number == 1 else f'p{number}.{fmt}', data)
+
+    def prune(self):
+        """
+        Evict least recently used pages until the cache fits max_bytes.
+
+        All of a page's outputs are evicted together.
+
+        Returns:
+            Number of pages evicted
+        """
+        entries = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue
+                key = filename.split('.', 1)[0]
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                size, mtime, paths = entries.get(key, (0, 0, []))
+                paths.append(path)
+                entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime), paths)
+
+        total = sum(size for size, _, _ in entries.values())
+        evicted = 0
+        for key, (size, _, paths) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for path in paths:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            evicted += 1
+        return evicted
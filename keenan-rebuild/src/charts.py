@@ -115,10 +115,22 @@ def horizontal_bar_chart(df, x_col, y_col, title, xlabel=None, value_fmt="percen
     return fig
 
 
+# Share of each category slot taken up by a grouped chart's bars
+GROUP_WIDTH = 0.8
+SERIES_COLORS = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D']
+# Most panels drawn on one faceted page before it continues onto another
+FACET_PANELS_PER_SHEET = 48
+# Space between faceted panels, in bar slots
+FACET_GAP = 0.6
+
+
 def grouped_bar_chart(df, categories, values, title, ylabel=None, value_fmt="percent", figsize=(12, 8)):
     """
     Create a grouped bar chart for multiple series.
     
+    The series share each category's slot, so bars narrow as series are
+    added rather than overlapping their neighbours.
+    
     Args:
         df: DataFrame with data
         categories: List of category names
@@ -134,20 +146,15 @@ def grouped_bar_chart(df, categories, values, title, ylabel=None, value_fmt="per
     fig, ax = setup_figure(figsize)
     
     x = np.arange(len(df))
-    width = 0.35
-    colors = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D']
+    width = GROUP_WIDTH / len(values)
     
     for i, col in enumerate(values):
         offset = (i - len(values)/2 + 0.5) * width
-        bars = ax.bar(x + offset, df[col], width, label=col, 
-                     color=colors[i % len(colors)], alpha=0.8)
-        
-        # Add value labels
-        for bar, value in zip(bars, df[col]):
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                    format_value(value, value_fmt),
-                    ha='center', va='bottom', fontweight='bold', fontsize=9)
+        bars = ax.bar(x + offset, df[col], width, label=col,
+                     color=SERIES_COLORS[i % len(SERIES_COLORS)], alpha=0.8)
+        # One label artist per bar, all positioned by matplotlib in one call
+        ax.bar_label(bars, labels=[format_value(value, value_fmt) for value in df[col]],
+                     padding=2, fontweight='bold', fontsize=9)
     
     ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
     ax.set_xticks(x)
@@ -165,7 +172,257 @@ def grouped_bar_chart(df, categories, values, title, ylabel=None, value_fmt="per
     return fig
 
 
-def table_page(df, title, figsize=(10, 8)):
+def facet_grid(n_panels, figsize=(10, 8)):
+    """Return (rows, cols) for n_panels laid out roughly square on the page."""
+    cols = max(1, min(n_panels, int(np.ceil(np.sqrt(n_panels * figsize[0] / figsize[1])))))
+    return int(np.ceil(n_panels / cols)), cols
+
+
+def faceted_bar_chart(df, facet_col, x_col, y_col, title, ylabel=None, rotation=0,
+                      value_fmt="percent", value_labels=True, figsize=(10, 8)):
+    """
+    Create small multiples: one bar panel per facet, on shared axes.
+    
+    df is in long form, one row per (facet, category) pair; for example one
+    row per region and plan type. Every panel gets the same categories in the
+    same positions and the same value scale, so panels compare at a glance,
+    and a breakdown by 40 regions is one page rather than 40.
+    
+    The panels are laid out as regions of a single Axes rather than as one
+    Axes each: every bar is drawn by one bar() call and every value label by
+    one bar_label() call, and gridlines and panel edges are one line
+    collection each. Axes are costly to create and lay out, so a page of 40
+    panels builds and saves about as fast as a single bar chart page.
+    
+    Args:
+        df: DataFrame with data in long form
+        facet_col: Column whose values each get a panel, in order of appearance
+        x_col: Column name for each panel's categories
+        y_col: Column name for the values
+        title: Chart title
+        ylabel: Y-axis label (optional)
+        rotation: X-axis label rotation in degrees
+        value_fmt: Format for value labels ("percent", "currency", "raw")
+        value_labels: Label every bar with its value
+        figsize: Figure size tuple
+    
+    Returns:
+        matplotlib Figure object
+    
+    Raises:
+        ValueError: If a (facet, category) pair appears more than once
+    """
+    from matplotlib.ticker import MaxNLocator
+    
+    facets = pd.unique(df[facet_col])
+    categories = pd.unique(df[x_col])
+    if df.duplicated([facet_col, x_col]).any():
+        raise ValueError(f"Each ({facet_col}, {x_col}) pair must appear once")
+    values = df.pivot(index=facet_col, columns=x_col, values=y_col).reindex(
+        index=facets, columns=categories).to_numpy(dtype=float)
+    
+    fig, ax = plt.subplots(figsize=figsize)
+    n_rows, n_cols = facet_grid(len(facets), figsize)
+    # Smaller type as panels shrink
+    fontsize = max(6, 11 - n_rows)
+    
+    # Panel geometry in data units: each category is one unit wide, and each
+    # row leaves room above its panels' tops for their titles
+    y_max = np.nanmax(values) if np.isfinite(values).any() else 0
+    y_top = y_max * 1.15 or 1
+    panel_width = len(categories) + 0.2
+    title_inches = (fontsize + 1) * 2 / 72
+    row_inches = figsize[1] * 0.8 / n_rows
+    row_pitch = y_top * row_inches / max(row_inches - title_inches, title_inches)
+    rows, cols = np.divmod(np.arange(len(facets)), n_cols)
+    lefts = cols * (panel_width + FACET_GAP) - 0.6
+    bases = (n_rows - 1 - rows) * row_pitch
+    
+    x = (lefts[:, None] + 0.6 + np.arange(len(categories))).ravel()
+    bars = ax.bar(x, values.ravel(), bottom=np.repeat(bases, len(categories)),
+                  color='#2E86AB', alpha=0.8)
+    if value_labels:
+        ax.bar_label(bars, labels=['' if np.isnan(value) else format_value(value, value_fmt)
+                                   for value in values.ravel()],
+                     padding=1, fontweight='bold', fontsize=fontsize - 1)
+    
+    # Gridlines at the shared value ticks, then each panel's left and bottom edge
+    y_ticks = np.array([tick for tick in MaxNLocator(nbins=4).tick_values(0, y_top) if 0 <= tick <= y_top])
+    grid_y = (bases[:, None] + y_ticks).ravel()
+    ax.hlines(grid_y, np.repeat(lefts, len(y_ticks)), np.repeat(lefts + panel_width, len(y_ticks)),
+              color='#B0B0B0', linewidth=0.8, alpha=0.3, zorder=0.5)
+    ax.vlines(lefts, bases, bases + y_top, color='#CCCCCC', linewidth=0.8)
+    ax.hlines(bases, lefts, lefts + panel_width, color='#CCCCCC', linewidth=0.8)
+    
+    for facet, left, base in zip(facets, lefts, bases):
+        ax.annotate(str(facet), (left + panel_width / 2, base + y_top), xytext=(0, 2),
+                    textcoords='offset points', ha='center', va='bottom',
+                    fontsize=fontsize + 1, fontweight='bold')
+    # Category labels under the lowest panel of each column
+    for left, base in zip(lefts[-n_cols:], bases[-n_cols:]):
+        for i, category in enumerate(categories):
+            ax.annotate(str(category), (left + 0.6 + i, base), xytext=(0, -3),
+                        textcoords='offset points', ha='right' if rotation else 'center', va='top',
+                        rotation=rotation, rotation_mode='anchor' if rotation else 'default',
+                        fontsize=fontsize)
+    
+    # Value ticks along the left column's panels; the panels draw their own frames
+    left_column = bases[cols == 0]
+    ax.set_yticks((left_column[:, None] + y_ticks).ravel(),
+                  [f"{tick:,.10g}" for tick in y_ticks] * len(left_column))
+    ax.tick_params(axis='y', labelsize=fontsize, length=3, color='#CCCCCC')
+    ax.set_xticks([])
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.set_xlim(lefts.min(), lefts.max() + panel_width)
+    ax.set_ylim(0, n_rows * row_pitch)
+    
+    ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+    if ylabel:
+        ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+    
+    plt.tight_layout()
+    return fig
+
+
+def facet_sheets(df, facet_col, title, panels_per_sheet=FACET_PANELS_PER_SHEET, **args):
+    """
+    Split a faceted chart into pages of at most panels_per_sheet panels.
+    
+    Args:
+        df: DataFrame with data in long form (see faceted_bar_chart)
+        facet_col: Column whose values each get a panel
+        title: Chart title; later pages are titled "(continued)"
+        panels_per_sheet: Most panels on one page
+        **args: Other faceted_bar_chart arguments, passed to every page
+    
+    Returns:
+        List of faceted_bar_chart keyword-argument dicts, one per page
+    """
+    facets = pd.unique(df[facet_col])
+    if len(facets) <= panels_per_sheet:
+        return [dict(args, df=df, facet_col=facet_col, title=title)]
+    return [dict(args, df=df[df[facet_col].isin(facets[start:start + panels_per_sheet])],
+                 facet_col=facet_col, title=title if start == 0 else f"{title} (continued)")
+            for start in range(0, len(facets), panels_per_sheet)]
+
+
+def _ordinal(number):
+    """Return 1st, 2nd, 3rd, 4th, ... for a whole number."""
+    number = int(number)
+    suffix = 'th' if 10 <= number % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(number % 10, 'th')
+    return f"{number}{suffix}"
+
+
+def benchmark_chart(df, label_col, title, xlabel=None, value_fmt="currency", client_col='Client',
+                    rank_col='Client Rank', quantile_cols=('p25', 'median', 'p75', 'p90'),
+                    client_label="Your organization", figsize=(10, 8)):
+    """
+    Create a peer benchmark chart: each group's distribution with the client's value marked.
+    
+    Each row shows the 25th-75th percentile range as a bar, the median as a
+    tick across it and a line out to the 90th percentile, with the client's
+    own value drawn as a marker on every row. Tables from
+    benchmarking.client_benchmark have the expected columns.
+    
+    Args:
+        df: DataFrame with one row per peer group
+        label_col: Column name for the peer group labels (y-axis)
+        title: Chart title
+        xlabel: X-axis label (optional)
+        value_fmt: Format for values ("percent", "currency", "raw")
+        client_col: Column with the client's value; no marker if absent
+        rank_col: Column with the client's percentile rank in each group,
+            added to the marker labels if present
+        quantile_cols: Columns holding the p25, median, p75 and p90 values
+        client_label: Legend label for the client marker
+        figsize: Figure size tuple
+    
+    Returns:
+        matplotlib Figure object
+    """
+    from matplotlib.ticker import FuncFormatter
+    
+    fig, ax = setup_figure(figsize)
+    ax.grid(False)
+    ax.grid(True, alpha=0.3, axis='x')
+    
+    p25, median, p75, p90 = (df[col].to_numpy(dtype=float) for col in quantile_cols)
+    y = np.arange(len(df))
+    ax.hlines(y, p25, p90, color='#2E86AB', linewidth=1.5, zorder=1)
+    ax.barh(y, p75 - p25, left=p25, height=0.45, color='#2E86AB', alpha=0.35, zorder=2,
+            label='25th-75th percentile')
+    ax.vlines(median, y - 0.225, y + 0.225, color='#2E86AB', linewidth=3, zorder=3, label='Median')
+    ax.scatter(p90, y, marker='|', s=250, linewidths=2, color='#2E86AB', zorder=3,
+               label='90th percentile')
+    
+    lows, highs = [p25], [p90]
+    if client_col in df.columns:
+        client = df[client_col].to_numpy(dtype=float)
+        ax.scatter(client, y, marker='D', s=80, color='#C73E1D', zorder=4, label=client_label)
+        ranks = df[rank_col] if rank_col in df.columns else [None] * len(df)
+        for row, value, rank in zip(y, client, ranks):
+            label = format_value(value, value_fmt)
+            if rank is not None and not pd.isna(rank):
+                label += f" ({_ordinal(rank)} pct)"
+            ax.text(value, row - 0.3, label, ha='center', va='bottom', fontweight='bold',
+                    fontsize=10, color='#C73E1D')
+        lows.append(client)
+        highs.append(client)
+    
+    low, high = np.nanmin(np.concatenate(lows)), np.nanmax(np.concatenate(highs))
+    margin = (high - low) * 0.15 or abs(high) * 0.1 or 1
+    ax.set_xlim(low - margin, high + margin)
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda value, _: format_value(value, value_fmt)))
+    
+    ax.set_yticks(y)
+    ax.set_yticklabels(df[label_col])
+    # First row at the top, with room above it for the marker label
+    ax.set_ylim(len(df) - 0.5, -0.8)
+    
+    ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
+    ax.set_ylabel(label_col, fontsize=12, fontweight='bold')
+    if xlabel:
+        ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.1 if xlabel else -0.06), ncol=4,
+              frameon=False, fontsize=10)
+    
+    plt.tight_layout()
+    return fig
+
+
+def table_cell_text(df):
+    """
+    Return the table's cell text, one list per row.
+    
+    Columns with a display format in ``df.attrs['formats']`` (set when loading
+    compiled data, where text such as "$125" is stored as a number) are
+    formatted with format_value; other cells are shown as they are.
+    """
+    formats = df.attrs.get('formats', {})
+    if not formats:
+        return df.values
+    columns = [[format_value(value, formats[col]) for value in df[col]] if col in formats
+               else list(df[col]) for col in df.columns]
+    return [list(row) for row in zip(*columns)]
+
+
+# Table area in axes coordinates (left, bottom, width, height)
+TABLE_BBOX = (0.1, 0.1, 0.8, 0.7)
+TABLE_FONT_SIZE = 11
+# Row height of a paginated table, as a multiple of the font size
+TABLE_ROW_SPACING = 2.0
+TABLE_HEADER_COLOR = '#2E86AB'
+TABLE_ZEBRA_COLORS = ('white', '#F5F5F5')
+
+
+def table_rows_per_sheet(figsize=(10, 8), fontsize=TABLE_FONT_SIZE):
+    """Return how many data rows fit on one table page below the header."""
+    row_height = fontsize * TABLE_ROW_SPACING / 72
+    return max(1, int(figsize[1] * TABLE_BBOX[3] / row_height) - 1)
+
+
+def table_page(df, title, figsize=(10, 8), first_row=0, fitted_rows=False):
     """
     Create a formatted table page.
     
@@ -173,6 +430,11 @@ def table_page(df, title, figsize=(10, 8)):
         df: DataFrame with table data
         title: Table title
         figsize: Figure size tuple
+        first_row: Position of df's first row in the full table, so zebra
+            striping continues across pages
+        fitted_rows: Draw rows at a fixed height from the top of the table
+            area instead of stretching them to fill it (used for all pages of
+            a table split by table_sheets)
     
     Returns:
         matplotlib Figure object
@@ -180,30 +442,57 @@ def table_page(df, title, figsize=(10, 8)):
     fig, ax = setup_figure(figsize)
     ax.axis('off')
     
-    # Create table
-    table = ax.table(cellText=df.values,
+    left, bottom, width, height = TABLE_BBOX
+    if fitted_rows:
+        row_height = TABLE_FONT_SIZE * TABLE_ROW_SPACING / 72 / figsize[1]
+        fitted = row_height * (len(df) + 1)
+        bottom, height = bottom + height - fitted, fitted
+    
+    # Style every cell through the constructor rather than cell by cell
+    n_cols = len(df.columns)
+    row_colors = [[TABLE_ZEBRA_COLORS[(first_row + i + 1) % 2 == 0]] * n_cols for i in range(len(df))]
+    table = ax.table(cellText=table_cell_text(df),
+                    cellColours=row_colors,
                     colLabels=df.columns,
+                    colColours=[TABLE_HEADER_COLOR] * n_cols,
                     cellLoc='center',
                     loc='center',
-                    bbox=[0.1, 0.1, 0.8, 0.7])
+                    bbox=[left, bottom, width, height])
     
     table.auto_set_font_size(False)
-    table.set_fontsize(11)
+    table.set_fontsize(TABLE_FONT_SIZE)
     table.scale(1.2, 1.8)
     
-    # Style header row
-    for i in range(len(df.columns)):
-        table[(0, i)].set_facecolor('#2E86AB')
+    # Header text
+    for i in range(n_cols):
         table[(0, i)].set_text_props(weight='bold', color='white')
     
-    # Style data rows with alternating colors
-    for i in range(1, len(df) + 1):
-        for j in range(len(df.columns)):
-            if i % 2 == 0:
-                table[(i, j)].set_facecolor('#F5F5F5')
-            else:
-                table[(i, j)].set_facecolor('white')
-    
     ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
     plt.tight_layout()
-    return fig
\ No newline at end of file
+    return fig
+
+
+def table_sheets(df, title, figsize=(10, 8)):
+    """
+    Split a table into pages of rows that fit.
+    
+    A table that fits on one page is drawn exactly as table_page draws it.
+    Longer tables continue onto further pages of fitted-height rows, each
+    repeating the header and titled "(continued)". Row slices are views, so
+    splitting costs nothing per row.
+    
+    Args:
+        df: DataFrame with table data
+        title: Table title
+        figsize: Figure size tuple
+    
+    Returns:
+        List of table_page keyword-argument dicts, one per page
+    """
+    per_sheet = table_rows_per_sheet(figsize)
+    if len(df) <= per_sheet:
+        return [{'df': df, 'title': title, 'figsize': figsize}]
+    return [{'df': df.iloc[start:start + per_sheet],
+             'title': title if start == 0 else f"{title} (continued)",
+             'figsize': figsize, 'first_row': start, 'fitted_rows': True}
+            for start in range(0, len(df), per_sheet)]
@@ -0,0 +1,312 @@
+"""
+Size reduction for report outputs (--compact).
+
+Pages are rendered exactly as usual, and the render cache keeps their
+standard outputs; compaction is applied to the bytes as they are written
+out, so every run knows each output's size before and after:
+
+- PDF: pages share their fonts, and identical objects are stored once.
+  Matplotlib embeds only the glyphs a page uses (a font subset) and
+  Flate-compresses its content streams, but pages rendered separately (from
+  the cache or by --jobs workers) each carry their own subsets, so a merged
+  report repeats the same glyphs, font descriptors and width tables page
+  after page. Merging the subsets brings it back to about the size of a
+  report written in one pass.
+- PNG: charts are flat colours plus anti-aliasing, so they are re-encoded
+  as 256-colour palette images (Pillow, which matplotlib depends on) with
+  zlib's best compression. A file that would come out larger is kept as it
+  was.
+
+A Compactor is passed down the build like an instrument.Recorder and
+tallies the bytes of each kind of output for the size report.
+"""
+import io
+import re
+
+# Palette size for PNGs; enough for chart colours and their anti-aliasing
+PNG_COLORS = 256
+
+
+def _differences(font):
+    """Return a Type 3 font's encoding as {code: glyph name}."""
+    codes = {}
+    code = 0
+    for item in font['/Encoding'].get_object().get('/Differences', []):
+        if isinstance(item, int):
+            code = item
+        else:
+            codes[code] = str(item)
+            code += 1
+    return codes
+
+
+def _to_unicode(font):
+    """Return a font's ToUnicode CMap as {code: UTF-16BE hex string}, empty if it has none."""
+    if '/ToUnicode' not in font:
+        return {}
+    text = font['/ToUnicode'].get_object().get_data().decode('latin-1')
+    mapping = {}
+    for block in re.findall(r'beginbfchar(.*?)endbfchar', text, re.S):
+        for code, target in re.findall(r'<(\w+)>\s*<(\w+)>', block):
+            mapping[int(code, 16)] = target
+    for block in re.findall(r'beginbfrange(.*?)endbfrange', text, re.S):
+        for low, high, targets in re.findall(r'<(\w+)>\s*<(\w+)>\s*(\[[^\]]*\]|<\w+>)', block):
+            codes = range(int(low, 16), int(high, 16) + 1)
+            if targets.startswith('['):
+                mapping.update(zip(codes, re.findall(r'<(\w+)>', targets)))
+            else:
+                start = int(targets[1:-1], 16)
+                mapping.update((code, f'{start + offset:0{len(targets) - 2}x}')
+                               for offset, code in enumerate(codes))
+    return mapping
+
+
+def _cmap_stream(mapping):
+    """Build a ToUnicode CMap stream for {code: UTF-16BE hex string}."""
+    from pypdf.generic import StreamObject
+
+    lines = ['/CIDInit /ProcSet findresource begin', '12 dict begin', 'begincmap',
+             '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def',
+             '/CMapName /Adobe-Identity-UCS def', '/CMapType 2 def',
+             '1 begincodespacerange', '<00> <ff>', 'endcodespacerange']
+    codes = sorted(mapping)
+    # A bfchar block may hold at most 100 entries
+    for offset in range(0, len(codes), 100):
+        block = codes[offset:offset + 100]
+        lines.append(f'{len(block)} beginbfchar')
+        lines.extend(f'<{code:02x}> <{mapping[code]}>' for code in block)
+        lines.append('endbfchar')
+    lines += ['endcmap', 'CMapName currentdict /CMap defineresource pop', 'end', 'end']
+    stream = StreamObject()
+    stream.set_data('\n'.join(lines).encode('ascii'))
+    return stream.flate_encode()
+
+
+def _glyphs(font):
+    """
+    Return what a Type 3 subset maps each code to, or None if its glyphs
+    use resources of their own.
+
+    Returns:
+        Dict with 'names', 'widths' and 'unicode' keyed by code, and 'procs'
+        mapping glyph name to glyph program
+    """
+    if '/Resources' in font:
+        return None
+    widths = dict(enumerate(font['/Widths'].get_object(), start=font['/FirstChar']))
+    names = _differences(font)
+    return {'names': names,
+            'widths': {code: widths[code] for code in names if code in widths},
+            'unicode': _to_unicode(font),
+            'procs': dict(font['/CharProcs'].get_object())}
+
+
+def _agrees(merged, glyphs):
+    """Return whether a subset's codes, widths and glyphs all agree with a merged font's."""
+    for field in ('names', 'widths', 'unicode'):
+        known = merged[field]
+        if any(known.get(code, value) != value for code, value in glyphs[field].items()):
+            return False
+    return all(merged['procs'][name].get_object().get_data() == proc.get_object().get_data()
+               for name, proc in glyphs['procs'].items() if name in merged['procs'])
+
+
+def _font_dict(template, merged):
+    """Build a Type 3 font dictionary holding a merged set of glyphs."""
+    from pypdf.generic import ArrayObject, DictionaryObject, FloatObject, NameObject, NumberObject
+
+    names = merged['names']
+    first, last = min(names), max(names)
+    differences = ArrayObject()
+    previous = None
+    for code in sorted(names):
+        if code != previous:
+            differences.append(NumberObject(code))
+        differences.append(NameObject(names[code]))
+        previous = code + 1
+    font = DictionaryObject(template)
+    font[NameObject('/Encoding')] = DictionaryObject({NameObject('/Type'): NameObject('/Encoding'),
+                                                      NameObject('/Differences'): differences})
+    font[NameObject('/FirstChar')] = NumberObject(first)
+    font[NameObject('/LastChar')] = NumberObject(last)
+    font[NameObject('/Widths')] = ArrayObject(FloatObject(merged['widths'].get(code, 0))
+                                              for code in range(first, last + 1))
+    font[NameObject('/CharProcs')] = DictionaryObject((NameObject(name), proc)
+                                                      for name, proc in merged['procs'].items())
+    if merged['unicode']:
+        font[NameObject('/ToUnicode')] = _cmap_stream(merged['unicode'])
+    return font
+
+
+def share_type3_fonts(writer):
+    """
+    Replace the per-page subsets of each Type 3 font with shared fonts.
+
+    Matplotlib embeds text as Type 3 fonts holding only the glyphs a page
+    uses, so pages rendered separately each carry their own subset. Subsets
+    of one font give printable characters their own codes, and so can be
+    merged into a font every page refers to. Codes below 32 are handed out
+    per subset (to ligatures, dashes and the like), so subsets that use one
+    of them differently go into another merged font.
+
+    Args:
+        writer: pypdf.PdfWriter, changed in place
+
+    Returns:
+        Number of font dictionaries replaced
+    """
+    from pypdf.generic import NameObject
+
+    # (font name, matrix) -> merged fonts, each {'fonts': [subset ids], field: {...}}
+    groups = {}
+    placed = {}
+    uses = []
+    templates = {}
+    for page in writer.pages:
+        resources = page.get('/Resources')
+        fonts = resources.get_object().get('/Font') if resources is not None else None
+        if fonts is None:
+            continue
+        fonts = fonts.get_object()
+        for key, ref in fonts.items():
+            font = ref.get_object()
+            if font.get('/Subtype') != '/Type3' or '/Encoding' not in font:
+                continue
+            uses.append((fonts, key, id(font)))
+            if id(font) in placed:
+                continue
+            glyphs = _glyphs(font)
+            if glyphs is None:
+                continue
+            # Subset fonts are named 'ABCDEF+DejaVuSans'
+            merged_fonts = groups.setdefault((str(font['/BaseFont']).split('+', 1)[-1],
+                                              tuple(font['/FontMatrix'])), [])
+            merged = next((merged for merged in merged_fonts if _agrees(merged, glyphs)), None)
+            if merged is None:
+                merged = {'fonts': [], 'names': {}, 'widths': {}, 'unicode': {}, 'procs': {}}
+                merged_fonts.append(merged)
+                templates[id(merged)] = font
+            for field in ('names', 'widths', 'unicode', 'procs'):
+                merged[field].update(glyphs[field])
+            merged['fonts'].append(id(font))
+            placed[id(font)] = merged
+
+    shared = {}
+    for merged_fonts in groups.values():
+        for merged in merged_fonts:
+            if len(merged['fonts']) > 1:
+                ref = writer._add_object(_font_dict(templates[id(merged)], merged))
+                shared.update((font_id, ref) for font_id in merged['fonts'])
+    for fonts, key, font_id in uses:
+        if font_id in shared:
+            fonts[NameObject(key)] = shared[font_id]
+    return len(shared)
+
+
+def compact_pdf(data):
+    """
+    Rewrite a PDF with its Type 3 font subsets merged (see
+    share_type3_fonts) and every duplicated object stored once.
+
+    Args:
+        data: PDF document as bytes
+
+    Returns:
+        The smaller of the rewritten and the original document
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(io.BytesIO(data))
+    shared = PdfWriter(clone_from=reader)
+    share_type3_fonts(shared)
+    buf = io.BytesIO()
+    shared.write(buf)
+    # Appending copies only what the pages still use, dropping the replaced
+    # subsets along with their descriptors and width arrays
+    writer = PdfWriter()
+    writer.append(PdfReader(buf))
+    if reader.metadata:
+        writer.add_metadata(reader.metadata)
+    writer.compress_identical_objects()
+    buf = io.BytesIO()
+    writer.write(buf)
+    return min(buf.getvalue(), data, key=len)
+
+
+def compact_png(data):
+    """
+    Re-encode a PNG as a palette image.
+
+    Fully opaque images (every chart page) are quantised as RGB, which gives
+    the palette more room for the colours actually drawn. The resolution
+    stored in the file is kept.
+
+    Args:
+        data: PNG image as bytes
+
+    Returns:
+        The smaller of the palette and the original image
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        dpi = image.info.get('dpi')
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        if image.mode == 'RGBA' and image.getextrema()[3][0] == 255:
+            image = image.convert('RGB')
+        palette = image.quantize(colors=PNG_COLORS, method=Image.Quantize.FASTOCTREE)
+    buf = io.BytesIO()
+    palette.save(buf, format='png', optimize=True, **({'dpi': dpi} if dpi else {}))
+    return min(buf.getvalue(), data, key=len)
+
+
+def format_bytes(size):
+    """Format a byte count as B, KB or MB."""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+class Compactor:
+    """Compacts outputs as they are written and tallies their sizes."""
+
+    def __init__(self):
+        # Output label -> [files, bytes before, bytes after]
+        self.sizes = {}
+
+    def _tally(self, label, before, after):
+        totals = self.sizes.setdefault(label, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += len(before)
+        totals[2] += len(after)
+        return after
+
+    def pdf(self, data):
+        """Compact a report PDF; returns the bytes to write."""
+        return self._tally('PDF', data, compact_pdf(data))
+
+    def png(self, variant, data):
+        """Compact one PNG of a variant (see build_report.PNG_VARIANTS); returns the bytes to write."""
+        return self._tally(f'PNG {variant}', data, compact_png(data))
+
+    def totals(self):
+        """Return (bytes before, bytes after) over every output."""
+        return (sum(before for _, before, _ in self.sizes.values()),
+                sum(after for _, _, after in self.sizes.values()))
+
+    def report(self):
+        """
+        Return the size report as lines of text, one per kind of output
+        plus a total.
+        """
+        rows = [(f"{label} ({files} file{'s' if files != 1 else ''})", before, after)
+                for label, (files, before, after) in self.sizes.items()]
+        if len(rows) > 1:
+            rows.append(('Total', *self.totals()))
+        width = max((len(label) for label, _, _ in rows), default=0)
+        return [f"{label:<{width}}  {format_bytes(before):>9} -> {format_bytes(after):>9}  "
+                f"({(after - before) / before:+.0%})" if before else f"{label:<{width}}  empty"
+                for label, before, after in rows]
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Compiled, typed, columnar form of a report data directory.
+
+``python src/compiled.py data/ --out data.compiled/`` converts every CSV the
+manifest uses into one NumPy ``.npy`` file per column plus a JSON schema
+sidecar, checking each page's required columns as it goes. Number-like text
+such as ``$125`` or ``12%`` is parsed into numbers and the schema remembers
+how to display it again.
+
+A compiled directory can be passed anywhere a data directory is accepted
+(``build_report.py --data-dir data.compiled``). Numeric columns are then
+memory-mapped instead of parsed.
+
+The schema records the size, modification time and SHA-256 of the source
+CSV and of every column file. Loading compares sizes and times only, so it
+reads nothing but the schema; a file is hashed only when its stamp differs
+(a copied directory, say). A table whose source CSV (when it is still where
+it was compiled from) or column files have changed is read from the CSV
+instead, with a warning; without a source it is an error. Either way,
+recompile to get the fast path back. ``--verify`` hashes every file:
+
+    python src/compiled.py data.compiled --verify
+
+Layout:
+    data.compiled/
+        compiled.json            marker and index: source directory, CSV name -> table directory
+        funding/schema.json      columns, dtypes, display formats, file hashes
+        funding/0.npy, 1.npy     one array per column
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from registry import COMPILED_INDEX, DEFAULT_MANIFEST, compiled_source, load_manifest
+
+FORMAT_VERSION = 1
+
+_CURRENCY = re.compile(r'^\s*-?\$\s*-?[\d,]+(\.\d+)?\s*$')
+_PERCENT = re.compile(r'^\s*-?[\d,]+(\.\d+)?\s*%\s*$')
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stamp(path):
+    """Return a file's [modification time in ns, size], as recorded in schema.json."""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _unchanged(path, stamp, sha256, verify=False):
+    """
+    Return whether a file still has the contents it was compiled with.
+
+    A matching stamp is trusted unless verify is set; otherwise the file is
+    hashed.
+    """
+    if not os.path.exists(path):
+        return False
+    if not verify and stamp is not None and _stamp(path) == stamp:
+        return True
+    return _sha256(path) == sha256
+
+
+def parse_column(values):
+    """
+    Convert one CSV column to a typed array.
+
+    Args:
+        values: pandas Series as read by read_csv
+
+    Returns:
+        (numpy array, display format or None) tuple. Currency and percent
+        text becomes float64 with format 'currency' or 'percent'; other text
+        becomes a fixed-width unicode array.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(), None
+    if pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=bool), None
+
+    text = values.fillna('').astype(str)
+    present = text[text.str.strip() != '']
+    for fmt, pattern in (('currency', _CURRENCY), ('percent', _PERCENT)):
+        if len(present) and present.str.match(pattern).all():
+            cleaned = text.str.replace(r'[$,%\s]', '', regex=True)
+            return pd.to_numeric(cleaned.replace('', np.nan)).to_numpy(dtype=np.float64), fmt
+    return text.to_numpy(dtype=str), None
+
+
+def compile_table(csv_path, table_dir, required_columns):
+    """
+    Compile one CSV into a table directory.
+
+    Args:
+        csv_path: Source CSV
+        table_dir: Output directory for the column files and schema
+        required_columns: Columns the pages using this CSV need
+
+    Returns:
+        The schema dict written to schema.json
+
+    Raises:
+        FileNotFoundError: If the CSV doesn't exist
+        ValueError: If required columns are missing
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+    df = pd.read_csv(csv_path)
+    missing_cols = [col for col in required_columns if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns in {csv_path}: {missing_cols}")
+
+    os.makedirs(table_dir, exist_ok=True)
+    columns = []
+    for i, name in enumerate(df.columns):
+        array, fmt = parse_column(df[name])
+        file_name = f'{i}.npy'
+        path = os.path.join(table_dir, file_name)
+        np.save(path, array, allow_pickle=False)
+        columns.append({'name': name, 'file': file_name, 'dtype': array.dtype.str,
+                        'format': fmt, 'sha256': _sha256(path), 'stamp': _stamp(path)})
+
+    schema = {
+        'version': FORMAT_VERSION,
+        'source': os.path.basename(csv_path),
+        'source_sha256': _sha256(csv_path),
+        'source_stamp': _stamp(csv_path),
+        'rows': len(df),
+        'columns': columns,
+    }
+    with open(os.path.join(table_dir, 'schema.json'), 'w', encoding='utf-8') as f:
+        json.dump(schema, f, indent=2)
+    return schema
+
+
+def compile_data_dir(data_dir, out_dir, pages):
+    """
+    Compile every CSV used by the given pages.
+
+    All pages are validated before anything is reported as compiled; the
+    index file is written last, so a failed compile never leaves a directory
+    that looks complete.
+
+    Args:
+        data_dir: Directory of source CSVs
+        out_dir: Compiled output directory
+        pages: Page specs from the manifest
+
+    Returns:
+        Dict mapping CSV name to its schema
+
+    Raises:
+        FileNotFoundError: If a CSV is missing
+        ValueError: If a CSV lacks a page's required columns
+    """
+    required = {}
+    for page in pages:
+        if 'csv' in page:
+            required.setdefault(page['csv'], set()).update(page['columns'])
+
+    os.makedirs(out_dir, exist_ok=True)
+    index_path = os.path.join(out_dir, COMPILED_INDEX)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+
+    schemas = {}
+    tables = {}
+    for csv_name, columns in sorted(required.items()):
+        table = os.path.splitext(csv_name)[0]
+        schemas[csv_name] = compile_table(os.path.join(data_dir, csv_name),
+                                          os.path.join(out_dir, table), sorted(columns))
+        tables[csv_name] = table
+
+    # Relative, so the source check survives moving both directories together
+    source_dir = os.path.relpath(os.path.abspath(data_dir), os.path.abspath(out_dir))
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': FORMAT_VERSION, 'source_dir': source_dir, 'tables': tables}, f, indent=2)
+    return schemas
+
+
+def _stale_reason(data_dir, csv_name, schema, verify=False):
+    """
+    Check a compiled table against the stamps and hashes in its schema.
+
+    Args:
+        data_dir: Compiled data directory
+        csv_name: Name of the source CSV
+        schema: The table's schema.json contents
+        verify: Hash every file even where its stamp matches
+
+    Returns:
+        Why the table is out of date, or None if its source CSV (when
+        present) and every column file are unchanged
+    """
+    source = compiled_source(data_dir, csv_name)
+    if source is not None and not _unchanged(source, schema.get('source_stamp'), schema['source_sha256'], verify):
+        return f"{source} has changed since it was compiled"
+    table_dir = os.path.join(data_dir, os.path.splitext(csv_name)[0])
+    changed = [column['file'] for column in schema['columns']
+               if not _unchanged(os.path.join(table_dir, column['file']), column.get('stamp'),
+                                 column['sha256'], verify)]
+    if changed:
+        return f"column files {', '.join(changed)} don't match schema.json"
+    return None
+
+
+def load_compiled(data_dir, csv_name, required_columns):
+    """
+    Load a compiled table as a DataFrame.
+
+    Numeric columns are memory-mapped rather than read. Display formats for
+    parsed number-like text are returned in ``df.attrs['formats']``. A table
+    that is out of date (see _stale_reason) is read from its source CSV
+    instead, with a warning.
+
+    Args:
+        data_dir: Compiled data directory
+        csv_name: Name of the source CSV, as used in the manifest
+        required_columns: List of required column names
+
+    Returns:
+        pandas DataFrame
+
+    Raises:
+        FileNotFoundError: If the table isn't in the compiled directory
+        ValueError: If required columns are missing, or the table is out of
+            date and its source CSV isn't available
+    """
+    table_dir = os.path.join(data_dir, os.path.splitext(csv_name)[0])
+    schema_path = os.path.join(table_dir, 'schema.json')
+    if not os.path.exists(schema_path):
+        raise FileNotFoundError(f"Compiled table not found for {csv_name} in {data_dir}")
+    with open(schema_path, encoding='utf-8') as f:
+        schema = json.load(f)
+
+    reason = _stale_reason(data_dir, csv_name, schema)
+    if reason is not None:
+        source = compiled_source(data_dir, csv_name)
+        if source is None:
+            raise ValueError(f"Compiled {csv_name} in {data_dir} is out of date ({reason}); "
+                             f"recompile it with src/compiled.py")
+        print(f"Warning: compiled {csv_name} in {data_dir} is out of date ({reason}); "
+              f"reading {source} instead. Recompile with src/compiled.py")
+        df = pd.read_csv(source)
+        missing_cols = [col for col in required_columns if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Missing required columns in {source}: {missing_cols}")
+        return df
+
+    names = [column['name'] for column in schema['columns']]
+    missing_cols = [col for col in required_columns if col not in names]
+    if missing_cols:
+        raise ValueError(f"Missing required columns in compiled {csv_name}: {missing_cols}")
+
+    data = {column['name']: np.load(os.path.join(table_dir, column['file']), mmap_mode='r')
+            for column in schema['columns']}
+    df = pd.DataFrame(data, copy=False)
+    df.attrs['formats'] = {column['name']: column['format']
+                           for column in schema['columns'] if column['format']}
+    return df
+
+
+def verify_compiled(data_dir):
+    """
+    Hash every file of a compiled directory against its schemas.
+
+    Returns:
+        Dict mapping each CSV name to why its table is out of date, or None
+
+    Raises:
+        FileNotFoundError: If data_dir isn't a compiled directory
+    """
+    index_path = os.path.join(data_dir, COMPILED_INDEX)
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(f"Not a compiled data directory: {data_dir}")
+    with open(index_path, encoding='utf-8') as f:
+        tables = json.load(f)['tables']
+    results = {}
+    for csv_name, table in tables.items():
+        with open(os.path.join(data_dir, table, 'schema.json'), encoding='utf-8') as f:
+            results[csv_name] = _stale_reason(data_dir, csv_name, json.load(f), verify=True)
+    return results
+
+
+def main(argv=None):
+    """Compile a data directory, or verify a compiled one."""
+    parser = argparse.ArgumentParser(description="Compile a report data directory into typed column files.")
+    parser.add_argument('data_dir', help="Directory of source CSVs, or with --verify a compiled directory")
+    parser.add_argument('--out', default=None, help="Compiled output directory")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help="Page manifest whose CSVs to compile (default: manifest.json)")
+    parser.add_argument('--verify', action='store_true',
+                        help="Hash every file of the compiled directory DATA_DIR against its schemas "
+                             "instead of compiling; exits 1 if any table is out of date")
+    args = parser.parse_args(argv)
+    if not args.verify and not args.out:
+        parser.error("--out is required unless --verify is given")
+
+    if args.verify:
+        try:
+            results = verify_compiled(args.data_dir)
+        except FileNotFoundError as e:
+            print(f"Error verifying data: {e}")
+            sys.exit(1)
+        for csv_name, reason in results.items():
+            print(f"{csv_name:<36} {reason or 'ok'}")
+        stale = sum(1 for reason in results.values() if reason)
+        print(f"\n{len(results) - stale} of {len(results)} tables up to date")
+        if stale:
+            sys.exit(1)
+        return
+
+    try:
+        pages = load_manifest(args.manifest)
+        schemas = compile_data_dir(args.data_dir, args.out, pages)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error compiling data: {e}")
+        sys.exit(1)
+
+    for csv_name, schema in schemas.items():
+        types = ', '.join(f"{c['name']}:{c['format'] or np.dtype(c['dtype']).kind}" for c in schema['columns'])
+        print(f"{csv_name:<36} {schema['rows']:>6} rows  {types}")
+    print(f"\nCompiled {len(schemas)} tables into {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Incremental aggregation: fold new responses into the figure tables.
+
+aggregate.py recomputes every table in data/ from all responses. Every
+figure kind it supports reduces to running counts and sums, though: how many
+respondents answered, how many chose each answer or option, how many had a
+flag set, and the sum of a numeric answer per group. An IncrementalStore
+keeps those counters in a SQLite file, so a batch of new responses is folded
+in with work proportional to the batch, and the store survives restarts
+without replaying history.
+
+Each counted response is also kept (just the columns the figures read), keyed
+by organization_id. When an organisation submits again its previous
+contribution is subtracted before the new one is added, and a response that
+moves to a status that isn't counted is taken out.
+
+Only tables whose counters changed are recomputed, and a table file is
+rewritten only if its contents differ, so the render cache and --watch
+rebuild just the pages whose figures actually moved.
+
+Usage:
+    python src/incremental.py --store data/aggregates.sqlite --out-dir data batch1.csv [batch2.csv ...]
+    python src/incremental.py --store data/aggregates.sqlite --out-dir clients/acme/data --all
+
+Tables match aggregate.py's, except that categories with equal percentages
+are listed in name order rather than in order of first appearance.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aggregate import FIGURES, answer_counts, counted_responses, percent_table, required_columns
+
+# Item holding the number of respondents for kinds reported as a share of them
+BASE = ''
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS stats (
+    figure TEXT NOT NULL,
+    item TEXT NOT NULL,
+    count REAL NOT NULL,
+    sum REAL NOT NULL,
+    PRIMARY KEY (figure, item)
+);
+CREATE TABLE IF NOT EXISTS responses (organization_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+"""
+
+# SQLite's default limit on parameters in one statement is 999 on old builds
+_LOOKUP_CHUNK = 500
+
+
+def _where(responses, spec):
+    where = spec.get('where')
+    if where is None:
+        return responses
+    column, value = where
+    return responses[responses[column] == value]
+
+
+def figure_counters(responses, spec):
+    """
+    Compute one figure's counters for a set of responses.
+
+    Kinds reported as a share of respondents (single_choice, multi_select,
+    buckets) count each answer plus the respondents under BASE. The other
+    kinds keep, per item, the number answering and the sum of the answers
+    (true flags for flags and group_percent, values for group_mean).
+
+    Returns:
+        DataFrame with item, count and sum columns
+    """
+    responses = _where(responses, spec)
+    kind = spec['kind']
+    if kind in ('single_choice', 'multi_select', 'buckets'):
+        counts, respondents = answer_counts(responses, spec)
+        items = [BASE] + [str(item) for item in counts.index]
+        return pd.DataFrame({'item': items, 'count': [respondents] + list(counts.to_numpy(dtype=float)),
+                             'sum': 0.0})
+
+    if kind == 'flags':
+        rows = []
+        for label, column in spec['flags'].items():
+            answers = responses[column].dropna().astype(bool)
+            rows.append((label, len(answers), float(answers.sum())))
+        return pd.DataFrame(rows, columns=['item', 'count', 'sum'])
+
+    answers = responses[[spec['group'], spec['question']]].dropna()
+    if kind == 'group_percent':
+        values = answers[spec['question']].astype(bool)
+    else:
+        values = pd.to_numeric(answers[spec['question']])
+    grouped = values.groupby(answers[spec['group']])
+    counts, sums = grouped.size(), grouped.sum()
+    return pd.DataFrame({'item': counts.index.astype(str), 'count': counts.to_numpy(dtype=float),
+                         'sum': sums.to_numpy(dtype=float)})
+
+
+def figure_from_counters(counters, spec):
+    """
+    Build a figure table from its counters.
+
+    Args:
+        counters: DataFrame with item, count and sum columns
+        spec: Entry from aggregate.FIGURES
+
+    Returns:
+        DataFrame with the figure's two columns, as aggregate.aggregate_figure
+    """
+    counters = counters.set_index('item').sort_index()
+    kind = spec['kind']
+    if kind in ('single_choice', 'multi_select', 'buckets'):
+        base = counters['count'].get(BASE, 0.0)
+        counts = counters['count'].drop(BASE, errors='ignore')
+        if kind == 'buckets':
+            # Empty buckets are still shown, as pd.cut's categories are
+            counts = counts.reindex(spec['labels'], fill_value=0.0)
+        else:
+            counts = counts[counts > 0]
+        values = counts / base * 100 if base else counts.iloc[:0]
+    else:
+        counters = counters[counters['count'] > 0]
+        values = counters['sum'] / counters['count']
+        if kind != 'group_mean':
+            values = values * 100
+    values.index = values.index.astype(object)
+    return percent_table(values.astype(float), spec)
+
+
+def aggregate_chunks(chunks, figures=FIGURES):
+    """
+    Compute figure tables from responses arriving in chunks.
+
+    Each chunk's counters are added to running totals and the chunk is
+    dropped, so memory holds one chunk plus the counters however many
+    responses there are. Unlike IncrementalStore.fold, every response is
+    counted, as aggregate.py counts them; nothing is replaced.
+
+    Args:
+        chunks: Iterable of DataFrames of flattened responses
+        figures: Figure specs to compute (default: aggregate.FIGURES)
+
+    Returns:
+        (tables, counted): dict mapping CSV name to DataFrame, as
+        aggregate.aggregate_responses (categories with equal percentages are
+        listed in name order), and the number of responses counted
+    """
+    totals = pd.DataFrame({'figure': [], 'item': [], 'count': [], 'sum': []})
+    counted = 0
+    for chunk in chunks:
+        chunk = counted_responses(chunk)
+        counted += len(chunk)
+        if chunk.empty:
+            continue
+        parts = [figure_counters(chunk, spec).assign(figure=csv_name) for csv_name, spec in figures.items()]
+        if len(totals):
+            parts.append(totals)
+        totals = pd.concat(parts).groupby(['figure', 'item'], as_index=False)[['count', 'sum']].sum()
+
+    tables = {csv_name: figure_from_counters(totals.loc[totals['figure'] == csv_name, ['item', 'count', 'sum']],
+                                             spec)
+              for csv_name, spec in figures.items()}
+    return tables, counted
+
+
+class IncrementalStore:
+    """Running figure counters persisted in SQLite."""
+
+    def __init__(self, path, figures=FIGURES):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            figures: Figure specs to maintain (default: aggregate.FIGURES)
+
+        Raises:
+            ValueError: If the store was built for different figure specs
+        """
+        self.figures = figures
+        self.columns = required_columns(figures)
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        digest = hashlib.sha256(json.dumps(figures, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'figures'").fetchone()
+        if row is None:
+            with self.db:
+                self.db.execute("INSERT INTO meta VALUES ('figures', ?)", (digest,))
+        elif row[0] != digest:
+            raise ValueError(f"{path} was built for different figure definitions; "
+                             f"delete it and fold all responses again")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def response_count(self):
+        """Return the number of responses currently counted."""
+        return self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _stored(self, organization_ids):
+        """Return the stored responses of the given organisations as a DataFrame."""
+        records = []
+        for start in range(0, len(organization_ids), _LOOKUP_CHUNK):
+            chunk = organization_ids[start:start + _LOOKUP_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            records.extend(json.loads(data) for (data,) in self.db.execute(
+                f"SELECT data FROM responses WHERE organization_id IN ({placeholders})", chunk))
+        return pd.DataFrame.from_records(records, columns=self.columns)
+
+    def fold(self, responses):
+        """
+        Fold a batch of responses into the counters.
+
+        Responses from organisations already in the store replace their
+        earlier response; within the batch, the last response per
+        organisation wins. Responses whose status isn't counted remove the
+        organisation's earlier response, if any.
+
+        Args:
+            responses: DataFrame of flattened responses with organization_id
+
+        Returns:
+            Set of figure CSV names whose counters changed
+
+        Raises:
+            ValueError: If response columns needed by the figures are missing
+        """
+        missing = [col for col in ['organization_id'] + self.columns if col not in responses.columns]
+        if missing:
+            raise ValueError(f"Missing required response columns: {missing}")
+
+        responses = responses.drop_duplicates('organization_id', keep='last').reset_index(drop=True)
+        ids = responses['organization_id'].astype(str)
+        previous = self._stored(list(ids))
+        counted = counted_responses(responses)[self.columns]
+        counted_ids = ids[counted.index]
+
+        deltas = []
+        for csv_name, spec in self.figures.items():
+            for batch, sign in ((counted, 1), (previous, -1)):
+                if len(batch):
+                    counters = figure_counters(batch, spec)
+                    counters[['count', 'sum']] *= sign
+                    counters.insert(0, 'figure', csv_name)
+                    deltas.append(counters)
+        if not deltas:
+            return set()
+        delta = pd.concat(deltas).groupby(['figure', 'item'], as_index=False)[['count', 'sum']].sum()
+        delta = delta[(delta['count'] != 0) | (delta['sum'] != 0)]
+
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO stats VALUES (?, ?, ?, ?) ON CONFLICT (figure, item) "
+                "DO UPDATE SET count = count + excluded.count, sum = sum + excluded.sum",
+                delta.itertuples(index=False, name=None))
+            self.db.executemany("DELETE FROM responses WHERE organization_id = ?",
+                                ((organization_id,) for organization_id in ids))
+            self.db.executemany(
+                "INSERT INTO responses VALUES (?, ?)",
+                zip(counted_ids, (json.dumps(record) for record in
+                                  json.loads(counted.to_json(orient='records')))))
+        return set(delta['figure'])
+
+    def tables(self, names=None):
+        """
+        Compute figure tables from the counters.
+
+        Args:
+            names: Figure CSV names to compute (default: all)
+
+        Returns:
+            Dict mapping CSV name to DataFrame
+        """
+        tables = {}
+        for csv_name in names if names is not None else self.figures:
+            counters = pd.DataFrame(self.db.execute(
+                "SELECT item, count, sum FROM stats WHERE figure = ?", (csv_name,)).fetchall(),
+                columns=['item', 'count', 'sum'])
+            tables[csv_name] = figure_from_counters(counters, self.figures[csv_name])
+        return tables
+
+    def write_tables(self, out_dir, names=None):
+        """
+        Write figure tables whose file contents changed.
+
+        Args:
+            out_dir: Directory to write the CSVs into
+            names: Figure CSV names to consider (default: all)
+
+        Returns:
+            Sorted list of the CSV names written
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        written = []
+        for csv_name, df in self.tables(names).items():
+            path = os.path.join(out_dir, csv_name)
+            data = df.to_csv(index=False).encode('utf-8')
+            try:
+                with open(path, 'rb') as f:
+                    if f.read() == data:
+                        continue
+            except FileNotFoundError:
+                pass
+            # Write then rename, so a watching build never reads half a table
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+            written.append(csv_name)
+        return sorted(written)
+
+
+def main(argv=None):
+    """Fold response batches into a store and write the changed tables."""
+    parser = argparse.ArgumentParser(description="Fold new survey responses into the figure tables.")
+    parser.add_argument('batches', nargs='*', help="CSV files of new flattened responses, in arrival order")
+    parser.add_argument('--store', required=True, help="SQLite file holding the running counters")
+    parser.add_argument('--out-dir', required=True, help="Directory to write changed figure CSVs into")
+    parser.add_argument('--all', action='store_true',
+                        help="Write every table that differs from the store, not just those the batches changed")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.batches if not os.path.exists(path)]
+    if missing:
+        parser.error(f"Responses file not found: {missing[0]}")
+    if not args.batches and not args.all:
+        parser.error("no response batches given; pass CSV files or --all")
+
+    try:
+        with IncrementalStore(args.store) as store:
+            changed = set()
+            for path in args.batches:
+                changed |= store.fold(pd.read_csv(path))
+            written = store.write_tables(args.out_dir, None if args.all else sorted(changed))
+            total = store.response_count()
+    except ValueError as e:
+        print(f"Error folding responses: {e}")
+        sys.exit(1)
+
+    print(f"{total:,} responses counted; {len(written)} table(s) updated in {args.out_dir}")
+    for csv_name in written:
+        print(f"  {csv_name}")
+
+
+if __name__ == "__main__":
+    main()
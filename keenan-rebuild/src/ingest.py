@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Streaming ingestion of spreadsheet exports (XLSX and CSV) into the report.
+
+Two kinds of export are read:
+
+responses
+    Raw survey responses, one row per organisation (see
+    aggregate.RESPONSE_COLUMNS), as a CSV or one sheet of a workbook. Rows
+    are read a chunk at a time and folded into the figure counters of
+    incremental.py, so the figure tables are produced without ever holding
+    the whole export in memory.
+
+pages
+    Figure tables ready to chart, one sheet (or CSV file) per report page.
+    Each sheet is matched to a manifest page and written to the page's CSV
+    in a data directory, a chunk at a time.
+
+Either way the sheet header is checked for every required column before any
+row is read, so a wrongly mapped export fails in moments rather than after
+reading a 500 MB workbook. Only the required columns are kept from each row.
+Workbooks are streamed by xlsx.Workbook a row at a time, holding just the
+shared string table, and a chunk of rows is only turned into a DataFrame
+once it is full.
+
+Export headers rarely match the names the report uses, so a mapping file can
+rename columns and say which sheet holds what:
+
+    {
+      "responses": {"sheet": "Responses", "columns": {"Org ID": "organization_id"}},
+      "pages": {
+        "monthly_cost_pepm": {"sheet": "PEPM by Region", "columns": {"Area": "Region"}}
+      }
+    }
+
+Without a mapping, responses come from the first sheet, and a page is read
+from the sheet named after the page or its CSV file (for a CSV export, the
+file's name). Sheets that match no page are ignored.
+
+Usage:
+    python src/ingest.py responses export.xlsx --out-dir data/ [--mapping mapping.json]
+    python src/ingest.py pages tables.xlsx --out-dir clients/acme/data [--mapping mapping.json]
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from registry import DEFAULT_MANIFEST, load_manifest
+from xlsx import Workbook
+
+# Rows read and converted to a DataFrame at a time
+CHUNK_ROWS = 50_000
+
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def is_workbook(path):
+    """Return True if path is an Excel workbook rather than a CSV."""
+    return os.path.splitext(path)[1].lower() in WORKBOOK_EXTENSIONS
+
+
+def sheet_names(path):
+    """Return the sheet names of a workbook, or the file name (without extension) of a CSV."""
+    if not is_workbook(path):
+        return [os.path.splitext(os.path.basename(path))[0]]
+    with Workbook(path) as workbook:
+        return workbook.sheetnames
+
+
+def load_mapping(path):
+    """
+    Load and check a sheet and column mapping file (see the module docstring).
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        ValueError: If it isn't a mapping of the expected shape
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Mapping file not found: {path}")
+    with open(path, encoding='utf-8') as f:
+        try:
+            mapping = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}") from e
+
+    if not isinstance(mapping, dict):
+        raise ValueError(f"Mapping {path} must be a JSON object")
+    entries = [('responses', mapping.get('responses', {}))]
+    pages = mapping.get('pages', {})
+    if not isinstance(pages, dict):
+        raise ValueError(f"Mapping {path}: 'pages' must be an object")
+    entries += [(f"pages.{name}", entry) for name, entry in pages.items()]
+    for label, entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get('columns', {}), dict):
+            raise ValueError(f"Mapping {path}: '{label}' must be an object with an optional "
+                             f"'sheet' name and 'columns' object")
+    return mapping
+
+
+def _header_names(row):
+    """Return a header row's column names, with trailing empty cells dropped."""
+    names = ['' if value is None else str(value).strip() for value in row]
+    while names and not names[-1]:
+        names.pop()
+    return names
+
+
+def _column_positions(header, required, optional, columns, source):
+    """
+    Find each wanted column in a header, after renaming.
+
+    Args:
+        header: Column names as they appear in the export
+        required: Report column names that must be present
+        optional: Report column names to keep if present
+        columns: Mapping of export column name to report column name
+        source: Description of the sheet for error messages
+
+    Returns:
+        Dict mapping report column name to its position in the header
+
+    Raises:
+        ValueError: If a required column is missing
+    """
+    renamed = [columns.get(name, name) for name in header]
+    missing = [col for col in required if col not in renamed]
+    if missing:
+        raise ValueError(f"Missing required columns in {source}: {missing} "
+                         f"(header has {header})")
+    return {col: renamed.index(col) for col in list(required) + list(optional) if col in renamed}
+
+
+def _csv_chunks(path, positions, header, chunk_rows):
+    import pandas as pd
+
+    names = {header[position]: col for col, position in positions.items()}
+    reader = pd.read_csv(path, usecols=list(names), chunksize=chunk_rows, encoding='utf-8-sig')
+    with reader:
+        for chunk in reader:
+            yield chunk.rename(columns=names)[list(positions)]
+
+
+def _sheet_header(workbook, sheet):
+    """Return a sheet's header: its first stored row."""
+    rows = workbook.rows(sheet)
+    try:
+        return _header_names(next(rows, ()))
+    finally:
+        rows.close()
+
+
+def _sheet_chunks(workbook, sheet, positions, chunk_rows, on_close=None):
+    """Yield DataFrames of the given columns from a sheet's rows below the header."""
+    import pandas as pd
+
+    rows = workbook.rows(sheet, list(positions.values()))
+    try:
+        next(rows, None)
+        while True:
+            batch = list(itertools.islice(rows, chunk_rows))
+            if not batch:
+                break
+            # Formatted but empty rows below the data come through as all None
+            records = [row for row in batch if any(value is not None for value in row)]
+            if records:
+                yield pd.DataFrame.from_records(records, columns=list(positions))
+    finally:
+        rows.close()
+        if on_close is not None:
+            on_close()
+
+
+def iter_chunks(path, required, sheet=None, columns=None, optional=(), chunk_rows=CHUNK_ROWS):
+    """
+    Read an export's rows a chunk at a time.
+
+    The header is checked when this is called, before any row is read.
+
+    Args:
+        path: CSV or .xlsx file
+        required: Report column names that must be present
+        sheet: Worksheet to read (default: the first); ignored for CSVs
+        columns: Mapping of export column name to report column name
+        optional: Report column names to keep if present
+        chunk_rows: Rows per chunk
+
+    Returns:
+        Iterator of DataFrames of at most chunk_rows rows, holding the
+        required columns and any optional ones present, named as in the report
+
+    Raises:
+        FileNotFoundError: If path doesn't exist
+        ValueError: If a required column is missing, the sheet doesn't exist
+            or a workbook can't be read
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Export not found: {path}")
+    columns = columns or {}
+    if not is_workbook(path):
+        # Excel writes CSVs with a byte order mark, which utf-8-sig strips
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            header = _header_names(next(csv.reader(f), []))
+        positions = _column_positions(header, required, optional, columns, path)
+        return _csv_chunks(path, positions, header, chunk_rows)
+
+    workbook = Workbook(path)
+    try:
+        sheet = workbook.sheetnames[0] if sheet is None else sheet
+        positions = _column_positions(_sheet_header(workbook, sheet), required, optional, columns,
+                                      f"{path} [{sheet}]")
+    except Exception:
+        workbook.close()
+        raise
+    return _sheet_chunks(workbook, sheet, positions, chunk_rows, on_close=workbook.close)
+
+
+def ingest_responses(paths, sheet=None, columns=None, chunk_rows=CHUNK_ROWS):
+    """
+    Compute every figure table from response exports, a chunk at a time.
+
+    Chunks are folded into figure counters as they are read (see
+    incremental.aggregate_chunks), so memory holds one chunk plus the
+    counters however long the export. Every export's header is checked
+    before any rows are read.
+
+    Args:
+        paths: CSV or .xlsx response exports, read in order
+        sheet: Worksheet holding the responses (default: the first)
+        columns: Mapping of export column name to response column name
+        chunk_rows: Rows per chunk
+
+    Returns:
+        (tables, counted): dict mapping data/ CSV file name to DataFrame, as
+        aggregate.aggregate_responses (categories with equal percentages are
+        listed in name order), and the number of responses counted
+
+    Raises:
+        FileNotFoundError: If an export doesn't exist
+        ValueError: If response columns needed by the figures are missing,
+            or an export can't be read
+    """
+    from aggregate import required_columns
+    from incremental import aggregate_chunks
+
+    readers = [iter_chunks(path, required_columns(), sheet, columns, optional=('status',),
+                           chunk_rows=chunk_rows) for path in paths]
+    return aggregate_chunks(itertools.chain.from_iterable(readers))
+
+
+def match_pages(names, pages, page_mapping=None):
+    """
+    Match an export's sheets to report pages.
+
+    Args:
+        names: Sheet names in the export (see sheet_names)
+        pages: Page specs from registry.load_manifest
+        page_mapping: The mapping file's "pages" entries
+
+    Returns:
+        List of (page spec, sheet name, column mapping) for the data pages
+        found in the export, in report order
+
+    Raises:
+        ValueError: If the mapping names a page not in the manifest, or a
+            sheet not in the export
+    """
+    page_mapping = page_mapping or {}
+    unknown = set(page_mapping) - {page['name'] for page in pages}
+    if unknown:
+        raise ValueError(f"Mapping names unknown page(s): {', '.join(sorted(unknown))}")
+
+    matches = []
+    for page in pages:
+        if 'csv' not in page:
+            continue
+        entry = page_mapping.get(page['name'], {})
+        sheet = entry.get('sheet')
+        if sheet is not None and sheet not in names:
+            raise ValueError(f"Sheet '{sheet}' mapped to page '{page['name']}' not found "
+                             f"(sheets: {names})")
+        if sheet is None:
+            candidates = (page['name'], os.path.splitext(page['csv'])[0])
+            sheet = next((name for name in names if name in candidates), None)
+        if sheet is not None:
+            matches.append((page, sheet, entry.get('columns', {})))
+    return matches
+
+
+def read_page(path, page, sheet=None, columns=None, chunk_rows=CHUNK_ROWS):
+    """
+    Read one page's table from an export, ready for the page's chart helper.
+
+    Args:
+        path: CSV or .xlsx file
+        page: Page spec from registry.load_manifest
+        sheet: Worksheet holding the table (default: the first)
+        columns: Mapping of export column name to the page's column names
+        chunk_rows: Rows per chunk while reading
+
+    Returns:
+        DataFrame with the page's required columns, in manifest order
+    """
+    import pandas as pd
+
+    chunks = list(iter_chunks(path, page['columns'], sheet, columns, chunk_rows=chunk_rows))
+    if not chunks:
+        return pd.DataFrame(columns=page['columns'])
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _write_chunks(chunks, path):
+    """Write DataFrame chunks to one CSV via a temporary file; return the row count."""
+    rows = 0
+    with open(path + '.tmp', 'w', newline='', encoding='utf-8') as f:
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=rows == 0)
+            rows += len(chunk)
+    os.replace(path + '.tmp', path)
+    return rows
+
+
+def ingest_pages(paths, pages, out_dir, page_mapping=None, chunk_rows=CHUNK_ROWS):
+    """
+    Write the page tables found in exports into a data directory.
+
+    Every matched sheet's header is checked before any sheet's rows are
+    read, so nothing is written if one is missing a column. Each table is
+    then copied a chunk at a time, keeping just the page's required columns.
+
+    Args:
+        paths: CSV or .xlsx exports
+        pages: Page specs from registry.load_manifest
+        out_dir: Data directory to write page CSVs into
+        page_mapping: The mapping file's "pages" entries
+        chunk_rows: Rows per chunk
+
+    Returns:
+        List of (page name, rows written) in report order
+
+    Raises:
+        FileNotFoundError: If an export doesn't exist
+        ValueError: If no sheet matches a page, two exports hold the same
+            page, a matched sheet is missing a page's column, or an export
+            can't be read
+    """
+    workbooks = []
+    readers = {}
+    try:
+        for path in paths:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Export not found: {path}")
+            workbook = Workbook(path) if is_workbook(path) else None
+            if workbook is not None:
+                workbooks.append(workbook)
+            names = workbook.sheetnames if workbook is not None else sheet_names(path)
+            for page, sheet, columns in match_pages(names, pages, page_mapping):
+                if page['name'] in readers:
+                    raise ValueError(f"Page '{page['name']}' found in more than one export ({path})")
+                if workbook is None:
+                    readers[page['name']] = (page, iter_chunks(path, page['columns'], columns=columns,
+                                                               chunk_rows=chunk_rows))
+                    continue
+                positions = _column_positions(_sheet_header(workbook, sheet), page['columns'], (), columns,
+                                              f"{path} [{sheet}]")
+                readers[page['name']] = (page, _sheet_chunks(workbook, sheet, positions, chunk_rows))
+        if not readers:
+            raise ValueError(f"No sheet in {', '.join(paths)} matches a manifest page")
+
+        os.makedirs(out_dir, exist_ok=True)
+        written = []
+        for page in pages:
+            if page['name'] in readers:
+                _, chunks = readers[page['name']]
+                written.append((page['name'], _write_chunks(chunks, os.path.join(out_dir, page['csv']))))
+        return written
+    finally:
+        for workbook in workbooks:
+            workbook.close()
+
+
+def main(argv=None):
+    """Ingest spreadsheet exports into figure tables."""
+    parser = argparse.ArgumentParser(description="Ingest XLSX or CSV exports into the report's data directory.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    responses_parser = subparsers.add_parser('responses', help="Aggregate raw response exports into figure tables")
+    responses_parser.add_argument('--sheet', default=None,
+                                  help="Worksheet holding the responses (default: the mapping's, else the first)")
+    pages_parser = subparsers.add_parser('pages', help="Copy page tables, one sheet per page")
+    pages_parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help="Page manifest to match sheets against")
+    for subparser in (responses_parser, pages_parser):
+        subparser.add_argument('exports', nargs='+', help="CSV or .xlsx export files")
+        subparser.add_argument('--out-dir', required=True, help="Directory to write the figure CSVs into")
+        subparser.add_argument('--mapping', default=None, help="JSON file mapping sheets and columns")
+        subparser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                               help=f"Rows read at a time (default: {CHUNK_ROWS:,})")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.exports if not os.path.exists(path)]
+    if missing:
+        parser.error(f"Export not found: {missing[0]}")
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows must be at least 1")
+
+    try:
+        mapping = load_mapping(args.mapping) if args.mapping else {}
+        if args.command == 'responses':
+            from aggregate import write_tables
+            entry = mapping.get('responses', {})
+            tables, counted = ingest_responses(args.exports, args.sheet or entry.get('sheet'),
+                                               entry.get('columns'), args.chunk_rows)
+            write_tables(tables, args.out_dir)
+            print(f"Ingested {counted:,} responses into {len(tables)} tables in {args.out_dir}")
+        else:
+            written = ingest_pages(args.exports, load_manifest(args.manifest), args.out_dir,
+                                   mapping.get('pages'), args.chunk_rows)
+            print(f"Ingested {len(written)} page table(s) into {args.out_dir}")
+            for name, rows in written:
+                print(f"  {name}: {rows:,} rows")
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Error ingesting exports: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Per-page, per-stage timing and memory instrumentation for report builds.
+
+A Recorder collects one record for each stage of each page:
+
+    load          reading the page's data (CSV or compiled)
+    build         running the chart helper, including its tight_layout
+    tight_layout  tight_layout calls made while building (also inside build)
+    pdf           saving the PDF page, including the bbox_inches='tight' pass
+    png:<variant> saving one PNG variant, e.g. png:150 or png:thumb
+    cache         looking the page up in the render cache
+    merge         assembling the final PDF (page '(report)')
+
+Each record has wall and CPU seconds, the process's peak RSS so far, and
+optionally the peak Python heap allocation during the stage (tracemalloc,
+which slows rendering noticeably, so it is off unless asked for). A Recorder
+can also dump a cProfile .pstats file per page.
+
+Records are plain dicts so they can cross process boundaries and be written
+as JSON or CSV by write_records().
+"""
+import contextlib
+import cProfile
+import csv
+import json
+import os
+import platform
+import resource
+import time
+import tracemalloc
+
+FIELDS = ('page', 'stage', 'wall_s', 'cpu_s', 'peak_rss_kib', 'py_peak_bytes')
+
+
+class NullRecorder:
+    """Recorder stand-in that records nothing; the default everywhere."""
+
+    enabled = False
+    records = ()
+
+    def options(self):
+        return None
+
+    @contextlib.contextmanager
+    def stage(self, page, stage):
+        yield
+
+    @contextlib.contextmanager
+    def profile(self, page):
+        yield
+
+    @contextlib.contextmanager
+    def tight_layout_hook(self, page):
+        yield
+
+
+NULL_RECORDER = NullRecorder()
+
+
+class Recorder(NullRecorder):
+    """Collects stage records for a build."""
+
+    enabled = True
+
+    def __init__(self, trace_memory=False, profile_dir=None):
+        """
+        Args:
+            trace_memory: Record peak Python allocations per stage (slow)
+            profile_dir: Directory to write one cProfile .pstats file per page
+        """
+        self.trace_memory = trace_memory
+        self.profile_dir = profile_dir
+        self.records = []
+        self._depth = 0
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def options(self):
+        """Return the settings needed to build an equivalent recorder in a worker."""
+        return {'trace_memory': self.trace_memory, 'profile_dir': self.profile_dir}
+
+    @contextlib.contextmanager
+    def stage(self, page, stage):
+        """Time the enclosed block as one stage of a page."""
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # A nested stage (tight_layout inside build) must not clear the
+            # enclosing stage's peak, so only outermost stages reset it
+            if not self._depth:
+                tracemalloc.reset_peak()
+        self._depth += 1
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            record = {
+                'page': page,
+                'stage': stage,
+                'wall_s': time.perf_counter() - wall_start,
+                'cpu_s': time.process_time() - cpu_start,
+                'peak_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                'py_peak_bytes': tracemalloc.get_traced_memory()[1] if self.trace_memory else None,
+            }
+            self.records.append(record)
+
+    @contextlib.contextmanager
+    def profile(self, page):
+        """Write a cProfile dump for the enclosed block if profile_dir is set."""
+        if not self.profile_dir:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(self.profile_dir, f'{page}.pstats'))
+
+    @contextlib.contextmanager
+    def tight_layout_hook(self, page):
+        """Record every Figure.tight_layout call in the block as its own stage."""
+        from matplotlib.figure import Figure
+
+        original = Figure.tight_layout
+        recorder = self
+
+        def timed_tight_layout(fig, *args, **kwargs):
+            with recorder.stage(page, 'tight_layout'):
+                return original(fig, *args, **kwargs)
+
+        Figure.tight_layout = timed_tight_layout
+        try:
+            yield
+        finally:
+            Figure.tight_layout = original
+
+
+def make_recorder(options):
+    """Return a Recorder for the given options dict, or NULL_RECORDER for None."""
+    if options is None:
+        return NULL_RECORDER
+    return Recorder(**options)
+
+
+def summarize(records):
+    """
+    Total wall and CPU time per stage.
+
+    Returns:
+        Dict mapping stage to {'wall_s', 'cpu_s', 'count'}
+    """
+    totals = {}
+    for record in records:
+        total = totals.setdefault(record['stage'], {'wall_s': 0.0, 'cpu_s': 0.0, 'count': 0})
+        total['wall_s'] += record['wall_s']
+        total['cpu_s'] += record['cpu_s']
+        total['count'] += 1
+    return totals
+
+
+def write_records(records, path):
+    """
+    Write records to a .json or .csv file, chosen by extension.
+
+    JSON output also carries per-stage totals and the library versions, so
+    files from different releases can be compared directly.
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        return
+
+    from importlib import metadata
+
+    versions = {'python': platform.python_version()}
+    for name in ('matplotlib', 'pandas', 'numpy', 'pypdf'):
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'versions': versions, 'totals': summarize(records), 'records': records},
+                  f, indent=2)
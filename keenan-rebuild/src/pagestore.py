@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store of rendered pages, shared by many reports.
+
+Most pages come out byte-for-byte the same for every client: the cover and
+executive summary, and any figure drawn from data everyone shares. The store
+keeps each distinct page output once, named by the SHA-256 of its bytes:
+
+    objects/ab/<sha256>.pdf|png    page outputs
+    index/ab/<page key>.<format>   digest of a page's output, by cache.page_key
+
+A PageStore stands in for the render cache (build_report --page-store): a
+page whose key is indexed is not rendered again, and pages with different
+keys that render to the same bytes are still stored once. Page PDFs are
+rendered without a creation date so that re-rendering a page gives the same
+digest. The store is not size-bounded; collect() removes objects no report
+refers to.
+
+A report built against a store records its pages in pages.json, and its
+figures/ PNGs are hard links to the stored objects. With --refs-only the
+report PDF is not written at all and is assembled from the references when
+needed, so disk use for many reports grows with their distinct pages, not
+with reports x pages.
+
+Usage:
+    python src/pagestore.py assemble out/acme [--output acme.pdf]
+    python src/pagestore.py stats out/acme out/beta ...
+    python src/pagestore.py collect --store pages/ out/acme out/beta ...
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cache import RenderCache, _write_atomic
+
+REFS_FILE = 'pages.json'
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _extension(fmt):
+    """Return the object extension for a cache format name such as 'pdf', '150.png' or 'p2.150.png'."""
+    return fmt.rsplit('.', 1)[-1]
+
+
+class PageStore(RenderCache):
+    """Render cache whose outputs are stored once per distinct content."""
+
+    def __init__(self, root):
+        """
+        Args:
+            root: Store directory (created if missing)
+        """
+        self.root = root
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'index'), exist_ok=True)
+
+    def object_path(self, digest, ext):
+        """Return the path of a stored object."""
+        return os.path.join(self.root, 'objects', digest[:2], f'{digest}.{ext}')
+
+    def _index_path(self, key, fmt):
+        return os.path.join(self.root, 'index', key[:2], f'{key}.{fmt}')
+
+    def put_object(self, data, ext):
+        """
+        Store bytes under their digest, unless already present.
+
+        Returns:
+            The SHA-256 hex digest naming the object
+        """
+        digest = _digest(data)
+        path = self.object_path(digest, ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, data)
+            # Objects become report files through hard links; make them as
+            # readable as files written directly
+            os.chmod(path, 0o644)
+        return digest
+
+    def read_object(self, digest, ext):
+        """
+        Read a stored object.
+
+        Raises:
+            FileNotFoundError: If the store doesn't hold it
+        """
+        with open(self.object_path(digest, ext), 'rb') as f:
+            return f.read()
+
+    def get(self, key, fmt):
+        """Look up one rendered output of a page; None on a miss (see RenderCache.get)."""
+        try:
+            with open(self._index_path(key, fmt), encoding='ascii') as f:
+                digest = f.read().strip()
+            return self.read_object(digest, _extension(fmt))
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, fmt, data):
+        """Store one rendered output of a page and index it under the page key."""
+        digest = self.put_object(data, _extension(fmt))
+        path = self._index_path(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, digest.encode('ascii'))
+
+    def prune(self):
+        """The store is not size-bounded; see collect(). Returns 0."""
+        return 0
+
+    def link(self, digest, ext, dest):
+        """
+        Make dest a hard link to a stored object, atomically.
+
+        Falls back to a copy where hard links aren't possible (another file
+        system). A dest that already is the object is left alone.
+
+        Returns:
+            True if dest was (re)written
+        """
+        path = self.object_path(digest, ext)
+        try:
+            if os.path.samefile(path, dest):
+                return False
+        except FileNotFoundError:
+            pass
+        tmp_path = dest + '.tmp'
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        try:
+            os.link(path, tmp_path)
+        except OSError:
+            shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, dest)
+        return True
+
+    def collect(self, digests):
+        """
+        Delete every object not in digests, and index entries left pointing
+        at deleted objects.
+
+        Args:
+            digests: Set of object digests still referred to
+
+        Returns:
+            (objects deleted, bytes freed)
+        """
+        deleted = freed = 0
+        objects_dir = os.path.join(self.root, 'objects')
+        for dirpath, _, filenames in os.walk(objects_dir):
+            for filename in filenames:
+                if filename.endswith('.tmp') or filename.split('.', 1)[0] in digests:
+                    continue
+                path = os.path.join(dirpath, filename)
+                freed += os.path.getsize(path)
+                os.unlink(path)
+                deleted += 1
+        for dirpath, _, filenames in os.walk(os.path.join(self.root, 'index')):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                with open(path, encoding='ascii') as f:
+                    digest = f.read().strip()
+                if digest not in digests:
+                    os.unlink(path)
+        return deleted, freed
+
+
+def page_refs(page, outputs, png_digests):
+    """
+    Build a page's entry in pages.json.
+
+    Args:
+        page: Page spec from the manifest
+        outputs: render_page outputs of the page (the PDF is used)
+        png_digests: {variant: [digest per sheet]} of the PNGs written
+
+    Returns:
+        Dict with the page's name, number, PDF digest and PNG digests
+    """
+    return {'name': page['name'], 'number': page['number'],
+            'pdf': _digest(outputs['pdf']), 'png': png_digests}
+
+
+def write_refs(out_dir, store, refs, compact=False):
+    """Write a report's pages.json: its store and the pages it is made of, in order."""
+    data = {'store': os.path.abspath(store.root), 'compact': compact, 'pages': refs}
+    path = os.path.join(out_dir, REFS_FILE)
+    _write_atomic(path, (json.dumps(data, indent=2) + '\n').encode('utf-8'))
+    os.chmod(path, 0o644)
+
+
+def load_refs(out_dir):
+    """
+    Load a report's pages.json.
+
+    Raises:
+        FileNotFoundError: If the report has no pages.json
+        ValueError: If it isn't a valid page reference file
+    """
+    path = os.path.join(out_dir, REFS_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No {REFS_FILE} in {out_dir}; build it with --page-store")
+    with open(path, encoding='utf-8') as f:
+        try:
+            refs = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}") from e
+    if not isinstance(refs, dict) or 'store' not in refs or not isinstance(refs.get('pages'), list):
+        raise ValueError(f"{path} must have 'store' and a 'pages' list")
+    return refs
+
+
+def referenced_digests(refs):
+    """Return the set of object digests a pages.json refers to."""
+    digests = set()
+    for page in refs['pages']:
+        digests.add(page['pdf'])
+        for sheets in page.get('png', {}).values():
+            digests.update(sheets)
+    return digests
+
+
+def assemble(out_dir, output=None):
+    """
+    Write a report's PDF from the pages its pages.json refers to.
+
+    Args:
+        out_dir: Report output directory holding pages.json
+        output: PDF path to write (default: report.pdf in out_dir)
+
+    Returns:
+        (pdf path, number of pages) tuple
+
+    Raises:
+        FileNotFoundError: If pages.json or a page it refers to is missing
+        ValueError: If pages.json is invalid
+    """
+    from build_report import merge_pdf_pages
+    from compact import Compactor
+
+    refs = load_refs(out_dir)
+    store = PageStore(refs['store'])
+    fragments = []
+    for page in refs['pages']:
+        try:
+            fragments.append(store.read_object(page['pdf'], 'pdf'))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Page {page['name']} ({page['pdf'][:12]}) is missing from "
+                                    f"{store.root}") from None
+    output = output or os.path.join(out_dir, 'report.pdf')
+    compactor = Compactor() if refs.get('compact') else None
+    return output, merge_pdf_pages(fragments, output, compactor)
+
+
+def store_stats(out_dirs):
+    """
+    Compare the bytes reports refer to with the bytes their store holds.
+
+    Returns:
+        (referenced bytes, stored bytes, distinct objects) over the reports'
+        pages, counting each report's references in full
+    """
+    referenced = 0
+    objects = {}
+    for out_dir in out_dirs:
+        refs = load_refs(out_dir)
+        store = PageStore(refs['store'])
+        for page in refs['pages']:
+            items = [(page['pdf'], 'pdf')]
+            items += [(digest, 'png') for sheets in page.get('png', {}).values() for digest in sheets]
+            for digest, ext in items:
+                path = store.object_path(digest, ext)
+                if path not in objects:
+                    objects[path] = os.path.getsize(path) if os.path.exists(path) else 0
+                referenced += objects[path]
+    return referenced, sum(objects.values()), len(objects)
+
+
+def main(argv=None):
+    """Assemble, measure or clean up reports built against a page store."""
+    from compact import format_bytes
+
+    parser = argparse.ArgumentParser(description="Work with reports built against a page store.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    assemble_parser = commands.add_parser('assemble', help="Write a report's PDF from its pages.json")
+    assemble_parser.add_argument('out_dir', help="Report output directory holding pages.json")
+    assemble_parser.add_argument('--output', default=None, help="PDF to write (default: OUT_DIR/report.pdf)")
+    stats_parser = commands.add_parser('stats', help="Bytes referenced by reports versus bytes stored")
+    stats_parser.add_argument('out_dirs', nargs='+', help="Report output directories")
+    collect_parser = commands.add_parser('collect', help="Delete stored pages no listed report refers to")
+    collect_parser.add_argument('--store', required=True, help="Page store directory")
+    collect_parser.add_argument('out_dirs', nargs='*', help="Every report output directory still in use")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'assemble':
+            path, page_count = assemble(args.out_dir, args.output)
+            print(f"Assembled {path} ({page_count} pages)")
+        elif args.command == 'stats':
+            referenced, stored, count = store_stats(args.out_dirs)
+            print(f"{len(args.out_dirs)} report(s) refer to {format_bytes(referenced)} of pages; "
+                  f"the store holds {count} distinct objects, {format_bytes(stored)}")
+        else:
+            digests = set()
+            for out_dir in args.out_dirs:
+                digests |= referenced_digests(load_refs(out_dir))
+            deleted, freed = PageStore(args.store).collect(digests)
+            print(f"Deleted {deleted} object(s), {format_bytes(freed)}")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Page registry: loads the report's page manifest and answers questions about it.
+
+The manifest (``manifest.json`` in the project root) lists every page of the
+report in order. Each entry names the page, the chart helper that draws it
+and, for data-driven pages, the CSV it reads and the columns it requires:
+
+    {
+      "name": "funding_approaches",
+      "csv": "funding.csv",
+      "columns": ["Type", "Percent"],
+      "chart": "bar_chart",
+      "args": {"x_col": "Type", "y_col": "Percent", "title": "..."}
+    }
+
+This module deliberately imports nothing heavy so the command line can
+validate a manifest and page selection before pandas or matplotlib load.
+"""
+import json
+import os
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'manifest.json')
+
+# Index file marking a compiled data directory (see compiled.py)
+COMPILED_INDEX = 'compiled.json'
+
+# Chart helpers that take a DataFrame as their first argument
+DATA_CHARTS = ('bar_chart', 'horizontal_bar_chart', 'table_page', 'benchmark_chart', 'faceted_bar_chart')
+
+# Page builders that take no data
+STATIC_CHARTS = ('cover_page', 'executive_summary')
+
+# Values for a page's optional "renderer" (see vector.py)
+RENDERERS = ('matplotlib', 'vector')
+
+
+def load_manifest(path=DEFAULT_MANIFEST):
+    """
+    Load and validate a page manifest.
+
+    Args:
+        path: Path to the manifest JSON file
+
+    Returns:
+        List of page spec dicts in report order. Each spec gains a 1-based
+        ``number`` giving its position in the full report.
+
+    Raises:
+        FileNotFoundError: If the manifest doesn't exist
+        ValueError: If the manifest is malformed
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Manifest not found: {path}")
+
+    with open(path, encoding='utf-8') as f:
+        try:
+            manifest = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}") from e
+
+    pages = manifest.get('pages') if isinstance(manifest, dict) else None
+    if not isinstance(pages, list) or not pages:
+        raise ValueError(f"Manifest {path} must contain a non-empty 'pages' list")
+
+    seen = set()
+    for number, page in enumerate(pages, start=1):
+        validate_page(page, number)
+        if page['name'] in seen:
+            raise ValueError(f"Duplicate page name in manifest: {page['name']}")
+        seen.add(page['name'])
+        page['number'] = number
+
+    return pages
+
+
+def validate_page(page, number):
+    """
+    Check a single manifest entry.
+
+    Raises:
+        ValueError: If the entry is missing fields or names an unknown chart
+    """
+    if not isinstance(page, dict) or not page.get('name'):
+        raise ValueError(f"Manifest page {number} must be an object with a 'name'")
+
+    name = page['name']
+    chart = page.get('chart')
+    if page.get('renderer', 'matplotlib') not in RENDERERS:
+        raise ValueError(f"Page '{name}' uses unknown renderer '{page['renderer']}'")
+    if chart in STATIC_CHARTS:
+        if page.get('renderer') == 'vector':
+            raise ValueError(f"Page '{name}' can't use the vector renderer")
+        return
+    if chart not in DATA_CHARTS:
+        raise ValueError(f"Page '{name}' uses unknown chart '{chart}'")
+    if not page.get('csv'):
+        raise ValueError(f"Page '{name}' needs a 'csv' input")
+    if not isinstance(page.get('columns'), list) or not page['columns']:
+        raise ValueError(f"Page '{name}' needs a non-empty 'columns' list")
+    if not isinstance(page.get('args', {}), dict):
+        raise ValueError(f"Page '{name}' has non-object 'args'")
+
+
+def select_pages(pages, only=None):
+    """
+    Restrict pages to a selection, keeping report order.
+
+    Args:
+        pages: Page specs from load_manifest
+        only: Iterable of page names, or None for every page
+
+    Returns:
+        List of selected page specs
+
+    Raises:
+        ValueError: If a requested page name is not in the manifest
+    """
+    if not only:
+        return list(pages)
+
+    wanted = set(only)
+    unknown = wanted - {page['name'] for page in pages}
+    if unknown:
+        raise ValueError(f"Unknown page(s): {', '.join(sorted(unknown))}")
+    return [page for page in pages if page['name'] in wanted]
+
+
+def is_compiled_dir(data_dir):
+    """Return True if data_dir is a compiled data directory rather than CSVs."""
+    return os.path.exists(os.path.join(data_dir, COMPILED_INDEX))
+
+
+def compiled_source(data_dir, csv_name):
+    """
+    Return the CSV a compiled table was built from (see compiled.py).
+
+    Returns:
+        The CSV's path, or None if the compiled directory doesn't record its
+        source directory or the CSV is no longer there
+    """
+    with open(os.path.join(data_dir, COMPILED_INDEX), encoding='utf-8') as f:
+        source_dir = json.load(f).get('source_dir')
+    if source_dir is None:
+        return None
+    path = os.path.normpath(os.path.join(data_dir, source_dir, csv_name))
+    return path if os.path.exists(path) else None
+
+
+def page_inputs(page, data_dir):
+    """
+    Return the input files a page is rendered from.
+
+    Args:
+        page: Page spec
+        data_dir: Directory holding the page CSV files, or a compiled directory
+
+    Returns:
+        List of file paths (empty for static pages)
+    """
+    if 'csv' not in page:
+        return []
+    if is_compiled_dir(data_dir):
+        # The schema records a hash of every column file, so it stands in for
+        # them. The source CSV is an input too: once it is edited, the page
+        # is read from it instead (see compiled.load_compiled).
+        inputs = [os.path.join(data_dir, os.path.splitext(page['csv'])[0], 'schema.json')]
+        source = compiled_source(data_dir, page['csv'])
+        if source is not None:
+            inputs.append(source)
+        return inputs
+    return [os.path.join(data_dir, page['csv'])]
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Local HTTP service that renders reports on request.
+
+One long-lived process answers requests on an asyncio event loop and renders
+pages on a bounded pool of warm worker processes, so the web app can ask for
+a client's report without starting a full build. Everything rendered is kept
+in the shared render cache, and the assembled report is cached under a hash
+of its page keys (the "data hash": manifest entries, input file contents and
+renderer versions). Concurrent requests for the same report, or for the same
+page, wait on one render instead of starting their own.
+
+Responses carry that hash as a strong ETag; a request whose If-None-Match
+still matches gets 304 Not Modified without touching the cache. The page keys
+of a data directory are recomputed only when one of its input files changes
+size or modification time, so a warm request costs a few stat calls and one
+cache read.
+
+Endpoints (GET or HEAD):
+    /report.pdf[?client=NAME]                        the whole report
+    /pages/PAGE.png[?client=NAME&variant=150&sheet=N] one page's PNG
+    /health                                          JSON status and counters
+
+Without ?client= the service uses --data-dir; with it, the data directory
+--clients-dir/NAME.
+
+Usage:
+    python src/service.py [--port 8765] [--workers 2] [--clients-dir clients]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import signal
+import sys
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from build_report import (DEFAULT_PNG, PNG_VARIANTS, apply_renderer, cache_format, cached_outputs,
+                          default_data_dir, default_out_dir, merge_pdf_bytes, parse_png_variants,
+                          store_outputs)
+from cache import DEFAULT_MAX_BYTES, RenderCache, page_key
+from registry import DEFAULT_MANIFEST, RENDERERS, load_manifest, page_inputs
+from watch import input_signature
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Distinct reports or PNGs rendering at once before further requests get 503
+DEFAULT_QUEUE = 16
+
+# Largest request head accepted, in bytes
+MAX_REQUEST_HEAD = 16 * 1024
+
+CLIENT_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    """An error response to send instead of the requested content."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def etag_matches(header, etag):
+    """Return True if an If-None-Match header value matches etag."""
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(',')]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return '*' in candidates or etag in (value[2:] if value.startswith('W/') else value
+                                        for value in candidates)
+
+
+class ReportService:
+    """Serves cached reports and PNGs, rendering what is missing on a process pool."""
+
+    def __init__(self, pages, cache, data_dir, clients_dir=None, workers=1, png=DEFAULT_PNG,
+                 queue=DEFAULT_QUEUE):
+        """
+        Args:
+            pages: Ordered page specs from the manifest
+            cache: RenderCache shared with the workers
+            data_dir: Data directory used when a request names no client
+            clients_dir: Directory of per-client data directories, or None
+            workers: Number of render worker processes
+            png: PNG variants rendered along with every report
+            queue: Most distinct reports or PNGs rendering at once
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        from build_report import _init_worker
+
+        self.pages = pages
+        self.pages_by_name = {page['name']: page for page in pages}
+        self.cache = cache
+        self.data_dir = data_dir
+        self.clients_dir = clients_dir
+        self.workers = workers
+        self.png = tuple(png)
+        self.queue = queue
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        # The first submission forks every worker; do it now, while this
+        # process has no other threads, and so they are warm for the first request
+        self.pool.submit(os.getpid)
+        self.stats = {'requests': 0, 'not_modified': 0, 'reports_built': 0, 'pages_rendered': 0}
+        self._in_flight = {}
+        self._queued = 0
+        self._keys = {}
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def resolve_data_dir(self, query):
+        """Return the data directory a request's ?client= names."""
+        client = query.get('client', [None])[0]
+        if client is None:
+            return self.data_dir
+        if self.clients_dir is None:
+            raise HTTPError(400, "This service has no --clients-dir; drop ?client=")
+        if not CLIENT_NAME.match(client):
+            raise HTTPError(400, f"Invalid client name: {client!r}")
+        data_dir = os.path.join(self.clients_dir, client)
+        if not os.path.isdir(data_dir):
+            raise HTTPError(404, f"Unknown client: {client}")
+        return data_dir
+
+    def page_keys(self, data_dir):
+        """
+        Return {page name: cache key} for a data directory.
+
+        Keys are reused until an input file's size or modification time
+        changes, so repeated requests don't rehash unchanged CSVs.
+        """
+        paths = [path for page in self.pages for path in page_inputs(page, data_dir)]
+        signature = input_signature(paths)
+        cached = self._keys.get(data_dir)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            keys = {page['name']: page_key(page, data_dir) for page in self.pages}
+        except FileNotFoundError as e:
+            raise HTTPError(404, str(e)) from e
+        self._keys[data_dir] = (signature, keys)
+        return keys
+
+    async def _once(self, key, start, queued=False):
+        """
+        Await the result of start(), sharing one run between concurrent callers.
+
+        Args:
+            key: Identifies the work; callers with equal keys share a run
+            start: Zero-argument function returning an awaitable
+            queued: Count the run against the queue bound (for requests,
+                not for the page renders they are made of)
+
+        Raises:
+            HTTPError: 503 if the render queue is full
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            if queued and self._queued >= self.queue:
+                raise HTTPError(503, "Render queue is full; retry shortly")
+            task = asyncio.ensure_future(start())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            if queued:
+                self._queued += 1
+                task.add_done_callback(lambda _: setattr(self, '_queued', self._queued - 1))
+        # A client hanging up must not cancel a render others are waiting on
+        return await asyncio.shield(task)
+
+    async def page_outputs(self, page, data_dir, key, outputs):
+        """
+        Return a page's outputs in render_page's format, rendering what the cache lacks.
+
+        Raises:
+            HTTPError: 500 if the page can't be rendered
+        """
+        from build_report import render_page
+
+        found = cached_outputs(self.cache, key, outputs)
+        missing = tuple(output for output in outputs if output not in found)
+        if not missing:
+            return found
+        loop = asyncio.get_running_loop()
+
+        async def render():
+            _, rendered, _ = await loop.run_in_executor(self.pool, render_page, (page, data_dir, missing))
+            if rendered is not None:
+                store_outputs(self.cache, key, rendered)
+                self.stats['pages_rendered'] += 1
+            return rendered
+
+        rendered = await self._once(('page', key, missing), render)
+        if rendered is None:
+            raise HTTPError(500, f"Page {page['name']} could not be rendered")
+        return dict(found, **rendered)
+
+    async def report(self, data_dir):
+        """Return (etag, PDF bytes loader) for a data directory's report."""
+        keys = self.page_keys(data_dir)
+        report_key = hashlib.sha256(
+            ''.join(keys[page['name']] for page in self.pages).encode('ascii')).hexdigest()
+
+        async def load():
+            data = self.cache.get(report_key, 'report.pdf')
+            if data is None:
+                data = await self._once(('report', report_key), lambda: self._build_report(
+                    data_dir, keys, report_key), queued=True)
+            return data
+
+        return f'"{report_key}"', load
+
+    async def _build_report(self, data_dir, keys, report_key):
+        """Render the missing pages of a report in parallel, merge and cache it."""
+        outputs = ('pdf',) + self.png
+        results = await asyncio.gather(*(
+            self.page_outputs(page, data_dir, keys[page['name']], outputs) for page in self.pages))
+        loop = asyncio.get_running_loop()
+        # Merging and pruning block on pypdf and the disk; keep them off the loop
+        data, _ = await loop.run_in_executor(None, merge_pdf_bytes, [found['pdf'] for found in results])
+        self.cache.put(report_key, 'report.pdf', data)
+        await loop.run_in_executor(None, self.cache.prune)
+        self.stats['reports_built'] += 1
+        return data
+
+    async def page_png(self, data_dir, name, query):
+        """Return (etag, PNG bytes loader) for one page."""
+        page = self.pages_by_name.get(name)
+        if page is None:
+            raise HTTPError(404, f"Unknown page: {name}")
+        variant = query.get('variant', [DEFAULT_PNG[0]])[0]
+        if variant not in PNG_VARIANTS:
+            raise HTTPError(400, f"variant must be one of {', '.join(PNG_VARIANTS)}")
+        try:
+            sheet = int(query.get('sheet', ['1'])[0])
+        except ValueError:
+            sheet = 0
+        if sheet < 1:
+            raise HTTPError(400, "sheet must be a positive integer")
+        key = self.page_keys(data_dir)[name]
+        fmt = cache_format(variant)
+
+        async def load():
+            data = self.cache.get(key, fmt if sheet == 1 else f'p{sheet}.{fmt}')
+            if data is None:
+                outputs = await self._once(('png', key, variant), lambda: self.page_outputs(
+                    page, data_dir, key, (variant,)), queued=True)
+                sheets = outputs[variant]
+                if sheet > len(sheets):
+                    raise HTTPError(404, f"Page {name} has {len(sheets)} sheet(s)")
+                data = sheets[sheet - 1]
+            return data
+
+        return f'"{key}-{variant}-{sheet}"', load
+
+    async def respond(self, method, target, headers):
+        """
+        Produce the response to one request.
+
+        Returns:
+            (status, headers dict, body bytes) tuple
+        """
+        if method not in ('GET', 'HEAD'):
+            raise HTTPError(405, "Only GET and HEAD are supported")
+        url = urlsplit(target)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        if path == '/health':
+            body = json.dumps(dict(self.stats, status='ok', workers=self.workers,
+                                   in_flight=len(self._in_flight))).encode('utf-8')
+            return 200, {'Content-Type': 'application/json', 'Cache-Control': 'no-store'}, body
+
+        data_dir = self.resolve_data_dir(query)
+        if path == '/report.pdf':
+            content_type = 'application/pdf'
+            etag, load = await self.report(data_dir)
+        elif path.startswith('/pages/') and path.endswith('.png'):
+            content_type = 'image/png'
+            etag, load = await self.page_png(data_dir, path[len('/pages/'):-len('.png')], query)
+        else:
+            raise HTTPError(404, f"Not found: {path}")
+
+        # Clients may keep a copy but must check the ETag before reusing it
+        response_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag_matches(headers.get('if-none-match'), etag):
+            self.stats['not_modified'] += 1
+            return 304, response_headers, b''
+        response_headers['Content-Type'] = content_type
+        return 200, response_headers, await load()
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection, keeping it open between them."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                start = time.perf_counter()
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                if method not in ('GET', 'HEAD') or headers.get('content-length', '0') != '0':
+                    # Request bodies aren't read, so the connection can't be reused
+                    keep_alive = False
+
+                self.stats['requests'] += 1
+                try:
+                    status, response_headers, body = await self.respond(method, target, headers)
+                except HTTPError as e:
+                    status, response_headers, body = e.status, {}, f"{e}\n".encode('utf-8')
+                    response_headers['Content-Type'] = 'text/plain; charset=utf-8'
+                    if e.status == 503:
+                        response_headers['Retry-After'] = '1'
+                except Exception as e:
+                    print(f"Error serving {target}: {type(e).__name__}: {e}")
+                    status, response_headers, body = 500, {'Content-Type': 'text/plain; charset=utf-8'}, \
+                        b"Internal error\n"
+
+                response_headers['Content-Length'] = str(len(body))
+                response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+                writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n".encode('latin-1')
+                             + ''.join(f"{name}: {value}\r\n" for name, value in response_headers.items())
+                             .encode('latin-1') + b'\r\n')
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                print(f"{method} {target} {status} {(time.perf_counter() - start) * 1000:.1f}ms")
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service, host, port):
+    """Run the HTTP server until cancelled."""
+    server = await asyncio.start_server(service.handle, host, port, limit=MAX_REQUEST_HEAD)
+    address = server.sockets[0].getsockname()
+    print(f"Serving reports on http://{address[0]}:{address[1]}/ "
+          f"with {service.workers} render worker(s)", flush=True)
+    # Stop on SIGTERM as on Ctrl+C, so main() shuts the worker processes down
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.close)
+    async with server:
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description="Serve rendered reports over HTTP.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument('--workers', '-w', type=int, default=2,
+                        help="Render worker processes (0 = one per CPU, default: 2)")
+    parser.add_argument('--queue', type=int, default=DEFAULT_QUEUE,
+                        help=f"Distinct renders that may wait for a worker before requests get 503 "
+                             f"(default: {DEFAULT_QUEUE})")
+    parser.add_argument('--data-dir', default=None,
+                        help="Data directory for requests without ?client= (default: data/)")
+    parser.add_argument('--clients-dir', default=None,
+                        help="Directory holding one data directory per client, for ?client=NAME")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                        help="Page manifest to build from (default: manifest.json)")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Rendered page cache directory (default: out/.cache)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        metavar='MB', help="Evict least recently used cached pages above this size")
+    parser.add_argument('--png', default=','.join(DEFAULT_PNG), metavar='none|150|300|thumb',
+                        help="PNG variants rendered with every report; others are rendered on request")
+    parser.add_argument('--renderer', choices=RENDERERS, default=None,
+                        help="Draw every data page with this renderer, overriding the manifest")
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error("--workers must be >= 0")
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    if args.queue < 1:
+        parser.error("--queue must be >= 1")
+    if args.clients_dir is not None and not os.path.isdir(args.clients_dir):
+        parser.error(f"Clients directory not found: {args.clients_dir}")
+    try:
+        args.png = parse_png_variants(args.png)
+        args.pages = load_manifest(args.manifest)
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    apply_renderer(args.pages, args.renderer)
+    return args
+
+
+def main(argv=None):
+    """Start the report service."""
+    args = parse_args(argv)
+    cache = RenderCache(args.cache_dir or os.path.join(default_out_dir(), '.cache'),
+                        args.cache_size * 1024 * 1024)
+    service = ReportService(args.pages, cache, os.path.abspath(args.data_dir or default_data_dir()),
+                            args.clients_dir and os.path.abspath(args.clients_dir),
+                            args.workers, args.png, args.queue)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
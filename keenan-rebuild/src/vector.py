@@ -0,0 +1,512 @@
+"""
+Fast vector renderer: draws simple pages straight into PDF operators.
+
+bar_chart, horizontal_bar_chart and table_page pages can be written as PDF
+drawing operations computed directly from the page spec, without building a
+matplotlib Figure, laying out text through it or making the two-pass
+bbox_inches='tight' save. Text uses the PDF core fonts Helvetica and
+Helvetica-Bold, measured with their AFM metrics, so nothing is embedded.
+The layout follows the matplotlib helpers in charts.py (tight_layout
+padding, title pad, tick lengths, margins, colours) closely but not
+pixel-for-pixel; benchmarks/bench_vector.py times both renderers and
+compares where their text lands.
+
+Pages opt in with ``"renderer": "vector"`` in the manifest, or all at once
+with ``build_report.py --renderer vector``. unsupported_reason() says why a
+page must fall back to matplotlib (another chart type, an argument this
+renderer doesn't know, or text outside the core fonts' WinAnsi character
+set). Only the PDF is drawn here; PNGs are still rasterised by matplotlib.
+"""
+import math
+import os
+import zlib
+from importlib.util import find_spec
+
+from charts import TABLE_BBOX, TABLE_FONT_SIZE, TABLE_HEADER_COLOR, TABLE_ROW_SPACING, \
+    TABLE_ZEBRA_COLORS, format_value, table_cell_text, table_sheets
+
+# Manifest chart name -> arguments the vector renderer understands
+SUPPORTED_ARGS = {
+    'bar_chart': {'x_col', 'y_col', 'title', 'ylabel', 'rotation', 'value_fmt', 'figsize'},
+    'horizontal_bar_chart': {'x_col', 'y_col', 'title', 'xlabel', 'value_fmt', 'figsize'},
+    'table_page': {'title', 'figsize'},
+}
+
+# Layout constants in points, matching matplotlib's defaults
+TIGHT_PAD = 1.08 * 10       # tight_layout pad: 1.08 x the 10pt default font size
+SAVE_PAD = 0.1 * 72         # savefig pad_inches around the tight bbox
+TITLE_PAD = 20
+TICK_LENGTH = 3.5
+TICK_PAD = 3.5
+LABEL_PAD = 4
+# Text box above and below the baseline, as multiples of the font size.
+# These follow matplotlib's default DejaVu Sans, which the layout mimics,
+# rather than Helvetica's own ascender and descender.
+TEXT_ASCENT = 0.76
+TEXT_DESCENT = 0.24
+
+BAR_COLOR = '#2E86AB'
+HBAR_COLOR = '#A23B72'
+BAR_ALPHA = 0.8
+SPINE_COLOR = '#CCCCCC'
+GRID_COLOR = '#b0b0b0'
+GRID_ALPHA = 0.3
+
+_FONTS = {False: 'Helvetica', True: 'Helvetica-Bold'}
+# Glyph names for the non-ASCII WinAnsi characters likely in survey text
+_EXTRA_GLYPHS = {
+    '–': 'endash', '—': 'emdash', '‘': 'quoteleft', '’': 'quoteright',
+    '“': 'quotedblleft', '”': 'quotedblright', '•': 'bullet',
+    '…': 'ellipsis', ' ': 'space', '·': 'periodcentered',
+}
+
+_metrics = {}
+
+
+def _load_metrics(bold):
+    """Return the character widths of a core font, per 1000 em."""
+    if bold not in _metrics:
+        mpl_dir = find_spec('matplotlib').submodule_search_locations[0]
+        path = os.path.join(mpl_dir, 'mpl-data', 'fonts', 'pdfcorefonts', f'{_FONTS[bold]}.afm')
+        by_name = {}
+        by_code = {}
+        with open(path, encoding='latin-1') as f:
+            for line in f:
+                if line.startswith('C '):
+                    fields = dict(part.strip().split(' ', 1) for part in line.split(';') if part.strip())
+                    by_name[fields['N']] = float(fields['WX'])
+                    code = int(fields['C'])
+                    if 32 <= code < 127:
+                        by_code[chr(code)] = float(fields['WX'])
+        # The AFM uses StandardEncoding; WinAnsi differs for these two
+        by_code["'"] = by_name.get('quotesingle', by_code.get("'"))
+        by_code['`'] = by_name.get('grave', by_code.get('`'))
+        for char, name in _EXTRA_GLYPHS.items():
+            if name in by_name:
+                by_code[char] = by_name[name]
+        _metrics[bold] = by_code
+    return _metrics[bold]
+
+
+def text_width(text, size, bold=False):
+    """Width of text in points when set in Helvetica (bold) at size."""
+    widths = _load_metrics(bold)
+    return sum(widths.get(char, 556) for char in text) * size / 1000
+
+
+def _encodable(text):
+    try:
+        str(text).encode('cp1252')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _rgb(color, alpha=1.0):
+    """Hex colour (or 'white') as PDF rgb components, blended over white."""
+    if color == 'white':
+        return (1.0, 1.0, 1.0)
+    components = [int(color[i:i + 2], 16) / 255 for i in (1, 3, 5)]
+    return tuple(alpha * c + (1 - alpha) for c in components)
+
+
+def _num(value):
+    return f'{value:.2f}'.rstrip('0').rstrip('.') or '0'
+
+
+class Canvas:
+    """One PDF page of drawing operations, tracking the extent of what is drawn."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.ops = []
+        self.extent = [math.inf, math.inf, -math.inf, -math.inf]
+
+    def _include(self, x0, y0, x1, y1):
+        extent = self.extent
+        extent[0] = min(extent[0], x0, x1)
+        extent[1] = min(extent[1], y0, y1)
+        extent[2] = max(extent[2], x0, x1)
+        extent[3] = max(extent[3], y0, y1)
+
+    def rect(self, x, y, w, h, fill=None, stroke=None, line_width=1.0):
+        ops = []
+        if fill is not None:
+            ops.append(f'{_num(fill[0])} {_num(fill[1])} {_num(fill[2])} rg')
+        if stroke is not None:
+            ops.append(f'{_num(stroke[0])} {_num(stroke[1])} {_num(stroke[2])} RG {_num(line_width)} w')
+        paint = 'B' if fill is not None and stroke is not None else ('f' if fill is not None else 'S')
+        ops.append(f'{_num(x)} {_num(y)} {_num(w)} {_num(h)} re {paint}')
+        self.ops.append(' '.join(ops))
+        self._include(x, y, x + w, y + h)
+
+    def line(self, x0, y0, x1, y1, color, line_width=0.8):
+        self.ops.append(f'{_num(color[0])} {_num(color[1])} {_num(color[2])} RG {_num(line_width)} w '
+                        f'{_num(x0)} {_num(y0)} m {_num(x1)} {_num(y1)} l S')
+        self._include(x0, y0, x1, y1)
+
+    def text(self, x, y, text, size, bold=False, color=(0, 0, 0), ha='left', va='baseline',
+             rotation=0):
+        """
+        Draw one line of text anchored like matplotlib's ax.text.
+
+        As with matplotlib's default rotation mode, the text is rotated
+        first and its rotated bounding box is then aligned to (x, y).
+
+        Returns:
+            (x0, y0, x1, y1) bounding box of the drawn text
+        """
+        text = str(text)
+        width = text_width(text, size, bold)
+        theta = math.radians(rotation)
+        cos, sin = math.cos(theta), math.sin(theta)
+        corners = [(cx * cos - cy * sin, cx * sin + cy * cos)
+                   for cx in (0, width) for cy in (-TEXT_DESCENT * size, TEXT_ASCENT * size)]
+        xs = [cx for cx, _ in corners]
+        ys = [cy for _, cy in corners]
+        if ha == 'left':
+            dx = -min(xs)
+        elif ha == 'right':
+            dx = -max(xs)
+        else:
+            dx = -(min(xs) + max(xs)) / 2
+        if va == 'baseline':
+            dy = 0
+        elif va == 'bottom':
+            dy = -min(ys)
+        elif va == 'top':
+            dy = -max(ys)
+        else:
+            dy = -(min(ys) + max(ys)) / 2
+        ox, oy = x + dx, y + dy
+        escaped = text.encode('cp1252').replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+        font = 'F2' if bold else 'F1'
+        self.ops.append(
+            f'BT /{font} {_num(size)} Tf {_num(color[0])} {_num(color[1])} {_num(color[2])} rg '
+            f'{cos:.4f} {sin:.4f} {-sin:.4f} {cos:.4f} {_num(ox)} {_num(oy)} Tm ('
+            + escaped.decode('latin-1') + ') Tj ET')
+        box = (ox + min(xs), oy + min(ys), ox + max(xs), oy + max(ys))
+        self._include(*box)
+        return box
+
+
+def pdf_document(canvases, pad=SAVE_PAD):
+    """
+    Serialise canvases as a PDF document, one page each.
+
+    Each page is cropped to the extent of what was drawn plus pad, like
+    savefig(bbox_inches='tight').
+
+    Returns:
+        PDF bytes
+    """
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_ids = [add(f'<< /Type /Font /Subtype /Type1 /BaseFont /{_FONTS[bold]} '
+                    f'/Encoding /WinAnsiEncoding >>'.encode('ascii')) for bold in (False, True)]
+    pages_id = add(None)
+    page_ids = []
+    for canvas in canvases:
+        x0, y0, x1, y1 = canvas.extent
+        if x0 > x1:
+            x0, y0, x1, y1 = 0, 0, canvas.width, canvas.height
+        x0, y0, x1, y1 = x0 - pad, y0 - pad, x1 + pad, y1 + pad
+        # Move the cropped area to the origin so viewers that ignore
+        # non-zero MediaBox origins still show the whole page
+        stream = zlib.compress(
+            (f'1 0 0 1 {_num(-x0)} {_num(-y0)} cm\n' + '\n'.join(canvas.ops)).encode('latin-1'))
+        content_id = add(f'<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n'.encode('ascii')
+                         + stream + b'\nendstream')
+        page_ids.append(add(
+            f'<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {_num(x1 - x0)} {_num(y1 - y0)}] '
+            f'/Resources << /Font << /F1 {font_ids[0]} 0 R /F2 {font_ids[1]} 0 R >> >> '
+            f'/Contents {content_id} 0 R >>'.encode('ascii')))
+    objects[pages_id - 1] = (f'<< /Type /Pages /Kids [{" ".join(f"{i} 0 R" for i in page_ids)}] '
+                             f'/Count {len(page_ids)} >>').encode('ascii')
+    catalog_id = add(f'<< /Type /Catalog /Pages {pages_id} 0 R >>'.encode('ascii'))
+    info_id = add(b'<< /Producer (keenan-rebuild vector renderer) >>')
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n'.encode('ascii') + body + b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('ascii')
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('ascii')
+    out += (f'trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R /Info {info_id} 0 R >>\n'
+            f'startxref\n{xref}\n%%EOF\n').encode('ascii')
+    return bytes(out)
+
+
+def nice_ticks(vmin, vmax, axis_length, label_size=10, spacing=2.0):
+    """
+    Tick positions like matplotlib's default MaxNLocator.
+
+    Args:
+        vmin, vmax: Axis limits
+        axis_length: Axis length in points
+        label_size: Tick label font size
+        spacing: Points of axis per tick as a multiple of label_size
+            (matplotlib uses 2 for y axes and 3 for x axes)
+    """
+    nbins = max(1, min(int(axis_length // (label_size * spacing)), 9))
+    raw = (vmax - vmin) / nbins
+    if raw <= 0:
+        return [vmin]
+    scale = 10 ** math.floor(math.log10(raw))
+    for multiple in (1, 2, 2.5, 5, 10):
+        step = multiple * scale
+        # Allow for floating-point error in raw
+        if step >= raw * (1 - 1e-9):
+            break
+    first = math.ceil(vmin / step - 1e-9)
+    last = math.floor(vmax / step + 1e-9)
+    return [k * step for k in range(first, last + 1)]
+
+
+def tick_label(value, ticks):
+    """Format a tick value with the decimals the tick step needs."""
+    step = ticks[1] - ticks[0] if len(ticks) > 1 else 1
+    decimals = 0
+    while decimals < 6 and abs(round(step, decimals) - step) > 1e-9 * max(1, abs(step)):
+        decimals += 1
+    return f'{value:.{decimals}f}'
+
+
+def _text_height(size):
+    return size * (TEXT_ASCENT + TEXT_DESCENT)
+
+
+def _rotated_extent(width, height, rotation):
+    """Width and height of the bounding box of a rotated width x height box."""
+    theta = math.radians(rotation)
+    return (width * abs(math.cos(theta)) + height * abs(math.sin(theta)),
+            width * abs(math.sin(theta)) + height * abs(math.cos(theta)))
+
+
+def _draw_title(canvas, title, center_x, axes_top):
+    canvas.text(center_x, axes_top + TITLE_PAD, title, 16, bold=True, ha='center', va='bottom')
+
+
+def _title_space():
+    return _text_height(16) + TITLE_PAD
+
+
+def bar_chart_page(df, x_col, y_col, title, ylabel=None, rotation=0, value_fmt="percent",
+                   figsize=(10, 8)):
+    """Draw charts.bar_chart's page on a Canvas."""
+    width, height = figsize[0] * 72, figsize[1] * 72
+    canvas = Canvas(width, height)
+    categories = [str(value) for value in df[x_col]]
+    values = [float(value) for value in df[y_col]]
+    n = len(values)
+    ymax = max(values) * 1.15 if values and max(values) > 0 else 1.0
+
+    # Space taken by the x tick labels, rotated like plt.xticks(rotation=..., ha='right')
+    label_boxes = [_rotated_extent(text_width(c, 10), _text_height(10), rotation) for c in categories]
+    xtick_height = max((h for _, h in label_boxes), default=0)
+    bottom = TIGHT_PAD + _text_height(12) + LABEL_PAD + xtick_height + TICK_LENGTH + TICK_PAD
+    top = height - TIGHT_PAD - _title_space()
+    axes_height = top - bottom
+    yticks = nice_ticks(0, ymax, axes_height)
+    ytick_labels = [tick_label(v, yticks) for v in yticks]
+    ytick_width = max(text_width(label, 10) for label in ytick_labels)
+    left = TIGHT_PAD + (_text_height(12) + LABEL_PAD if ylabel else 0) + ytick_width + TICK_LENGTH + TICK_PAD
+    right = width - TIGHT_PAD
+
+    span = n - 0.2 if n else 1
+    xlim = (-0.4 - 0.05 * span, n - 1 + 0.4 + 0.05 * span)
+    if rotation and categories:
+        # Right-aligned rotated labels hang to the left of their tick; keep
+        # the first one inside the page as tight_layout would
+        first_width = label_boxes[0][0]
+        first_tick = left + (0 - xlim[0]) / (xlim[1] - xlim[0]) * (right - left)
+        if first_tick - first_width < TIGHT_PAD:
+            left += TIGHT_PAD - (first_tick - first_width)
+
+    def px(x):
+        return left + (x - xlim[0]) / (xlim[1] - xlim[0]) * (right - left)
+
+    def py(y):
+        return bottom + y / ymax * (top - bottom)
+
+    grid = _rgb(GRID_COLOR, GRID_ALPHA)
+    bar_fill = _rgb(BAR_COLOR, BAR_ALPHA)
+    for i, value in enumerate(values):
+        canvas.rect(px(i - 0.4), py(0), px(i + 0.4) - px(i - 0.4), py(value) - py(0), fill=bar_fill)
+    # Gridlines sit above the bars, as in matplotlib's default z-order
+    for tick in yticks:
+        canvas.line(left, py(tick), right, py(tick), grid)
+    spine = _rgb(SPINE_COLOR)
+    canvas.line(left, bottom, left, top, spine)
+    canvas.line(left, bottom, right, bottom, spine)
+
+    black = (0, 0, 0)
+    for tick, label in zip(yticks, ytick_labels):
+        canvas.line(left - TICK_LENGTH, py(tick), left, py(tick), black)
+        canvas.text(left - TICK_LENGTH - TICK_PAD, py(tick), label, 10, ha='right', va='center')
+    for i, category in enumerate(categories):
+        canvas.line(px(i), bottom, px(i), bottom - TICK_LENGTH, black)
+        canvas.text(px(i), bottom - TICK_LENGTH - TICK_PAD, category, 10,
+                    ha='right' if rotation else 'center', va='top', rotation=rotation)
+    for i, value in enumerate(values):
+        canvas.text(px(i), py(value + 0.5), format_value(value, value_fmt), 10, bold=True,
+                    ha='center', va='bottom')
+
+    canvas.text((left + right) / 2, bottom - TICK_LENGTH - TICK_PAD - xtick_height - LABEL_PAD,
+                x_col, 12, bold=True, ha='center', va='top')
+    if ylabel:
+        canvas.text(left - TICK_LENGTH - TICK_PAD - ytick_width - LABEL_PAD, (bottom + top) / 2,
+                    ylabel, 12, bold=True, ha='right', va='center', rotation=90)
+    _draw_title(canvas, title, (left + right) / 2, top)
+    return canvas
+
+
+def horizontal_bar_chart_page(df, x_col, y_col, title, xlabel=None, value_fmt="percent",
+                              figsize=(10, 8)):
+    """Draw charts.horizontal_bar_chart's page on a Canvas."""
+    width, height = figsize[0] * 72, figsize[1] * 72
+    canvas = Canvas(width, height)
+    categories = [str(value) for value in df[x_col]]
+    values = [float(value) for value in df[y_col]]
+    n = len(values)
+    xmax = max(values) * 1.2 if values and max(values) > 0 else 1.0
+
+    bottom = TIGHT_PAD + (_text_height(12) + LABEL_PAD if xlabel else 0) + _text_height(10) \
+        + TICK_LENGTH + TICK_PAD
+    top = height - TIGHT_PAD - _title_space()
+    ytick_width = max((text_width(c, 10) for c in categories), default=0)
+    left = TIGHT_PAD + _text_height(12) + LABEL_PAD + ytick_width + TICK_LENGTH + TICK_PAD
+    right = width - TIGHT_PAD
+    xticks = nice_ticks(0, xmax, right - left, spacing=3.0)
+    xtick_labels = [tick_label(v, xticks) for v in xticks]
+    # Leave room for the last x tick label, centred on its tick
+    right -= text_width(xtick_labels[-1], 10) / 2 if xticks[-1] >= xmax * 0.999 else 0
+
+    span = n - 0.2 if n else 1
+    ylim = (-0.4 - 0.05 * span, n - 1 + 0.4 + 0.05 * span)
+
+    def px(x):
+        return left + x / xmax * (right - left)
+
+    def py(y):
+        return bottom + (y - ylim[0]) / (ylim[1] - ylim[0]) * (top - bottom)
+
+    grid = _rgb(GRID_COLOR, GRID_ALPHA)
+    bar_fill = _rgb(HBAR_COLOR, BAR_ALPHA)
+    for i, value in enumerate(values):
+        canvas.rect(px(0), py(i - 0.4), px(value) - px(0), py(i + 0.4) - py(i - 0.4), fill=bar_fill)
+    # setup_figure turns on y gridlines, which here run along each category
+    for i in range(n):
+        canvas.line(left, py(i), right, py(i), grid)
+    spine = _rgb(SPINE_COLOR)
+    canvas.line(left, bottom, left, top, spine)
+    canvas.line(left, bottom, right, bottom, spine)
+
+    black = (0, 0, 0)
+    for tick, label in zip(xticks, xtick_labels):
+        canvas.line(px(tick), bottom, px(tick), bottom - TICK_LENGTH, black)
+        canvas.text(px(tick), bottom - TICK_LENGTH - TICK_PAD, label, 10, ha='center', va='top')
+    for i, category in enumerate(categories):
+        canvas.line(left - TICK_LENGTH, py(i), left, py(i), black)
+        canvas.text(left - TICK_LENGTH - TICK_PAD, py(i), category, 10, ha='right', va='center')
+    for i, value in enumerate(values):
+        canvas.text(px(value + 0.5), py(i), format_value(value, value_fmt), 10, bold=True,
+                    ha='left', va='center')
+
+    canvas.text(left - TICK_LENGTH - TICK_PAD - ytick_width - LABEL_PAD, (bottom + top) / 2,
+                x_col, 12, bold=True, ha='right', va='center', rotation=90)
+    if xlabel:
+        canvas.text((left + right) / 2, bottom - TICK_LENGTH - TICK_PAD - _text_height(10) - LABEL_PAD,
+                    xlabel, 12, bold=True, ha='center', va='top')
+    _draw_title(canvas, title, (left + right) / 2, top)
+    return canvas
+
+
+def table_page_canvas(df, title, figsize=(10, 8), first_row=0, fitted_rows=False):
+    """Draw one charts.table_page page on a Canvas."""
+    width, height = figsize[0] * 72, figsize[1] * 72
+    canvas = Canvas(width, height)
+    # With the axis off, tight_layout leaves the axes the whole page below the title
+    ax_left, ax_bottom = TIGHT_PAD, TIGHT_PAD
+    ax_width = width - 2 * TIGHT_PAD
+    ax_height = height - 2 * TIGHT_PAD - _title_space()
+    # matplotlib's tight bbox still includes the hidden axes
+    canvas._include(ax_left, ax_bottom, ax_left + ax_width, ax_bottom + ax_height)
+
+    left, bottom, table_width, table_height = TABLE_BBOX
+    if fitted_rows:
+        row_height = TABLE_FONT_SIZE * TABLE_ROW_SPACING / 72 / figsize[1]
+        fitted = row_height * (len(df) + 1)
+        bottom, table_height = bottom + table_height - fitted, fitted
+    x0 = ax_left + left * ax_width
+    y_top = ax_bottom + (bottom + table_height) * ax_height
+    cell_width = table_width * ax_width / len(df.columns)
+    cell_height = table_height * ax_height / (len(df) + 1)
+
+    black = (0, 0, 0)
+    header = _rgb(TABLE_HEADER_COLOR)
+    for j, column in enumerate(df.columns):
+        x = x0 + j * cell_width
+        canvas.rect(x, y_top - cell_height, cell_width, cell_height, fill=header, stroke=black)
+        canvas.text(x + cell_width / 2, y_top - cell_height / 2, column, TABLE_FONT_SIZE, bold=True,
+                    color=(1, 1, 1), ha='center', va='center')
+    for i, row in enumerate(table_cell_text(df)):
+        fill = _rgb(TABLE_ZEBRA_COLORS[(first_row + i + 1) % 2 == 0])
+        y = y_top - (i + 2) * cell_height
+        for j, value in enumerate(row):
+            x = x0 + j * cell_width
+            canvas.rect(x, y, cell_width, cell_height, fill=fill, stroke=black)
+            canvas.text(x + cell_width / 2, y + cell_height / 2, value, TABLE_FONT_SIZE,
+                        ha='center', va='center')
+    _draw_title(canvas, title, ax_left + ax_width / 2, ax_bottom + ax_height)
+    return canvas
+
+
+def unsupported_reason(page, df):
+    """
+    Say why a page can't be drawn by this renderer.
+
+    Args:
+        page: Page spec from the manifest
+        df: The page's data
+
+    Returns:
+        A short reason, or None if the page is supported
+    """
+    chart = page.get('chart')
+    if chart not in SUPPORTED_ARGS:
+        return f"chart '{chart}' is not supported"
+    extra = set(page.get('args', {})) - SUPPORTED_ARGS[chart]
+    if extra:
+        return f"argument(s) {', '.join(sorted(extra))} not supported"
+    texts = [str(value) for value in page.get('args', {}).values()] + [str(c) for c in df.columns]
+    for column in df.columns:
+        if df[column].dtype.kind not in 'biuf':
+            texts.extend(str(value) for value in df[column])
+    if not all(_encodable(text) for text in texts):
+        return "text outside the PDF core fonts' character set"
+    return None
+
+
+def render_pdf(page, df):
+    """
+    Render a supported data page to PDF bytes.
+
+    Long tables are split into the same sheets as charts.table_sheets.
+    """
+    args = page.get('args', {})
+    chart = page['chart']
+    if chart == 'bar_chart':
+        canvases = [bar_chart_page(df, **args)]
+    elif chart == 'horizontal_bar_chart':
+        canvases = [horizontal_bar_chart_page(df, **args)]
+    else:
+        canvases = [table_page_canvas(**sheet) for sheet in table_sheets(df, **args)]
+    return pdf_document(canvases)
@@ -0,0 +1,69 @@
+"""
+Polling file watcher used by ``build_report.py --watch``.
+
+Polls file modification times rather than relying on platform-specific
+notification APIs, so it works the same everywhere, including network drives.
+"""
+import os
+import time
+
+DEFAULT_INTERVAL = 0.5
+
+
+def input_signature(paths):
+    """
+    Snapshot the modification time and size of each path.
+
+    Args:
+        paths: Iterable of file paths
+
+    Returns:
+        Dict mapping path to (mtime_ns, size), or None for missing files
+    """
+    signature = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature[path] = None
+        else:
+            signature[path] = (stat.st_mtime_ns, stat.st_size)
+    return signature
+
+
+def changed_paths(old, new):
+    """Return the sorted paths whose signature differs between two snapshots."""
+    return sorted(path for path in set(old) | set(new) if old.get(path) != new.get(path))
+
+
+def watch(get_paths, rebuild, interval=DEFAULT_INTERVAL):
+    """
+    Call rebuild whenever one of the watched files changes. Runs until Ctrl+C.
+
+    Args:
+        get_paths: Callable returning the paths to watch; called on every poll
+            so the watched set can follow manifest edits
+        rebuild: Callable taking the list of changed paths
+        interval: Seconds between polls
+    """
+    signature = input_signature(get_paths())
+    print(f"\nWatching {len(signature)} file(s) for changes (Ctrl+C to stop)...")
+    try:
+        while True:
+            time.sleep(interval)
+            current = input_signature(get_paths())
+            changed = changed_paths(signature, current)
+            if not changed:
+                continue
+            signature = current
+
+            print(f"\nChanged: {', '.join(os.path.basename(path) for path in changed)}")
+            start = time.perf_counter()
+            try:
+                rebuild(changed)
+            except Exception as e:
+                print(f"Error rebuilding report: {e}")
+            else:
+                print(f"Rebuilt in {time.perf_counter() - start:.2f}s")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
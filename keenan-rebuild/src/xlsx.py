@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for Excel .xlsx workbooks, using only the standard library.
+
+An .xlsx file is a zip archive of XML parts: workbook.xml lists the sheets,
+each sheet is one XML part of <row> elements holding <c> cells, and text
+cells usually point into one shared string table. Workbook reads a sheet's
+rows with ElementTree.iterparse straight from the compressed part, dropping
+each row once it has been read. Memory holds the shared string table and
+one row, whatever the sheet's size.
+
+Only cell values are read: formulas give their last computed value, and
+formatting is ignored. Numbers come back as int or float, including dates,
+which Excel stores as day counts; booleans as bool; text and error values
+(such as '#N/A') as str; empty cells as None.
+
+Usage:
+    with Workbook('export.xlsx') as workbook:
+        for row in workbook.rows('Responses'):
+            ...
+"""
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+
+_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_DOC_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_SHEET_DATA = _MAIN + 'sheetData'
+_ROW = _MAIN + 'row'
+_VALUE = _MAIN + 'v'
+_INLINE = _MAIN + 'is'
+_TEXT = _MAIN + 't'
+_RUN = _MAIN + 'r'
+_SHARED_ITEM = _MAIN + 'si'
+
+
+def column_index(reference):
+    """Return the 0-based column of a cell reference such as 'AB12'."""
+    index = 0
+    for char in reference:
+        if char.isdigit():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _number(text):
+    """Parse a numeric cell value, keeping whole numbers as int like openpyxl does."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _text(element):
+    """Return the text of a string item, joining the runs of rich text."""
+    text = element.find(_TEXT)
+    if text is not None:
+        return text.text or ''
+    # Phonetic guides (<rPh>) hold <t> elements too, so only runs are read
+    return ''.join(run.findtext(_TEXT) or '' for run in element.iter(_RUN))
+
+
+class Workbook:
+    """A read-only .xlsx workbook whose sheets are read as row streams."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: .xlsx file
+
+        Raises:
+            ValueError: If the file isn't a readable .xlsx workbook
+        """
+        self.path = path
+        try:
+            self.zip = zipfile.ZipFile(path)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"{path} is not an .xlsx workbook: {e}") from e
+        try:
+            with self.zip.open('xl/_rels/workbook.xml.rels') as f:
+                targets = {rel.get('Id'): rel.get('Target')
+                           for rel in ET.parse(f).getroot().iter(_PKG_REL + 'Relationship')}
+            with self.zip.open('xl/workbook.xml') as f:
+                sheets = ET.parse(f).getroot().iter(_MAIN + 'sheet')
+                self._parts = {sheet.get('name'): self._part_name(targets[sheet.get(_DOC_REL + 'id')])
+                               for sheet in sheets}
+        except (KeyError, ET.ParseError) as e:
+            self.zip.close()
+            raise ValueError(f"{path} is not a readable .xlsx workbook: {e}") from e
+        self._strings = None
+
+    @staticmethod
+    def _part_name(target):
+        """Resolve a relationship target from workbook.xml to a name in the archive."""
+        if target.startswith('/'):
+            return target.lstrip('/')
+        return posixpath.normpath(posixpath.join('xl', target))
+
+    @property
+    def sheetnames(self):
+        """Sheet names in workbook order."""
+        return list(self._parts)
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def shared_strings(self):
+        """Return the shared string table, loading it on first use."""
+        if self._strings is None:
+            self._strings = []
+            if 'xl/sharedStrings.xml' in self.zip.namelist():
+                with self.zip.open('xl/sharedStrings.xml') as f:
+                    for _, element in ET.iterparse(f):
+                        if element.tag == _SHARED_ITEM:
+                            self._strings.append(_text(element))
+                            element.clear()
+        return self._strings
+
+    def rows(self, sheet, columns=None):
+        """
+        Stream a sheet's rows.
+
+        Rows are yielded in file order; rows Excel doesn't store (never
+        edited) are skipped rather than yielded empty.
+
+        Args:
+            sheet: Sheet name
+            columns: 0-based column positions to read, in the order wanted;
+                None reads every cell up to the row's last
+
+        Yields:
+            Tuple of cell values per row, None for empty cells
+
+        Raises:
+            ValueError: If the sheet doesn't exist
+        """
+        if sheet not in self._parts:
+            raise ValueError(f"Sheet '{sheet}' not found in {self.path} (sheets: {self.sheetnames})")
+        strings = self.shared_strings()
+        wanted = None if columns is None else set(columns)
+
+        with self.zip.open(self._parts[sheet]) as f:
+            sheet_data = None
+            for event, element in ET.iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == _SHEET_DATA:
+                        sheet_data = element
+                    continue
+                if element.tag != _ROW:
+                    continue
+
+                values = {}
+                position = 0
+                for cell in element:
+                    reference = cell.get('r')
+                    if reference is not None:
+                        position = column_index(reference)
+                    column, position = position, position + 1
+                    if wanted is not None and column not in wanted:
+                        continue
+                    kind = cell.get('t', 'n')
+                    if kind == 'inlineStr':
+                        inline = cell.find(_INLINE)
+                        values[column] = None if inline is None else _text(inline)
+                        continue
+                    value = cell.find(_VALUE)
+                    if value is None or value.text is None:
+                        continue
+                    if kind == 'n':
+                        values[column] = _number(value.text)
+                    elif kind == 's':
+                        values[column] = strings[int(value.text)]
+                    elif kind == 'b':
+                        values[column] = value.text == '1'
+                    else:
+                        # 'str' (formula text), 'e' (error) and 'd' (ISO date) stay as text
+                        values[column] = value.text
+                # Rows are children of sheetData; dropping them keeps memory flat
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    element.clear()
+
+                if wanted is not None:
+                    yield tuple(values.get(column) for column in columns)
+                else:
+                    yield tuple(values.get(column) for column in range(max(values, default=-1) + 1))
@@ -0,0 +1,52 @@
+"""
+Shared pytest setup: the modules under test live in src/ and the layout and
+workload helpers in benchmarks/, neither of which is a package.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import matplotlib
+matplotlib.use('Agg')
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "slow: long-running workload sizes; run with -m slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip slow tests unless a -m expression selects tests by marker."""
+    if config.getoption('markexpr'):
+        return
+    skip = pytest.mark.skip(reason="slow; run with -m slow")
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def responses():
+    """Synthetic survey responses (bench_aggregate.synthetic_responses); copy before changing."""
+    from bench_aggregate import synthetic_responses
+    return synthetic_responses(3000, seed=1)
+
+
+@pytest.fixture(scope='session')
+def report_pages():
+    """A short report: the cover, a vertical and a horizontal bar chart and the appendix table."""
+    from registry import load_manifest
+    names = ('cover', 'funding_approaches', 'self_funded_network', 'appendix_ee_contributions')
+    return [page for page in load_manifest() if page['name'] in names]
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """A copy of data/ that a test may change."""
+    import shutil
+    from build_report import default_data_dir
+    return shutil.copytree(default_data_dir(), str(tmp_path / 'data'))
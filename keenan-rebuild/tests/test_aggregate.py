@@ -0,0 +1,138 @@
+"""
+aggregate.py: each figure kind on a handful of responses with known answers.
+"""
+import math
+
+import pandas as pd
+import pytest
+
+from aggregate import FIGURES, aggregate_responses, answer_counts, main, required_columns
+
+
+def _responses():
+    """Three counted responses and one draft, which must not count."""
+    nan = math.nan
+    return pd.DataFrame({
+        'organization_id': [1, 2, 3, 4],
+        'status': ['submitted', 'completed', 'submitted', 'draft'],
+        'region': ['Northern California', 'Southern California', 'Northern California', 'Southern California'],
+        'plans_offered': ['PPO;HMO', 'PPO', 'HDHP; PPO;', 'POS'],
+        'funding': ['Self-funded', 'Fully insured', 'Self-funded', 'Self-funded'],
+        'network': ['Regional PPO', nan, 'National PPO', 'Regional PPO'],
+        'own_hospital_cost_method': ['DRG', 'Per diem', 'DRG', 'Case rate'],
+        'pepm': [600, 700, 650, 9999],
+        'no_cost_ee_only': [True, False, False, True],
+        'telemedicine_access': [True, True, False, True],
+        'teletherapy_access': [False, True, True, True],
+        'tele_copay_relationship': ['Same as PCP', 'Lower than PCP', 'Lower than PCP', 'Higher than PCP'],
+        'stop_loss_attachment': [125_000, 310_000, 50_000, 175_000],
+        'hdhp_offering': ['HDHP Only', 'No HDHP', 'HDHP + Traditional', 'HDHP Only'],
+        'dental_plans': ['DPPO', 'DPPO;DHMO', nan, 'DHMO'],
+        'union_representation': [True, False, False, True],
+    })
+
+
+def _rows(df):
+    return dict(zip(df.iloc[:, 0], df.iloc[:, 1]))
+
+
+@pytest.fixture(scope='module')
+def tables():
+    return aggregate_responses(_responses())
+
+
+def test_every_figure_is_produced(tables):
+    assert set(tables) == set(FIGURES)
+    for csv_name, df in tables.items():
+        assert list(df.columns) == FIGURES[csv_name]['columns']
+
+
+def test_single_choice(tables):
+    assert _rows(tables['funding.csv']) == {'Self-funded': 66.7, 'Fully insured': 33.3}
+    assert _rows(tables['own_hospital_cost.csv']) == {'DRG': 66.7, 'Per diem': 33.3}
+
+
+def test_single_choice_where(tables):
+    # Only self-funded respondents are asked about their network
+    assert _rows(tables['network.csv']) == {'Regional PPO': 50.0, 'National PPO': 50.0}
+
+
+def test_single_choice_labels_and_largest_first(tables):
+    df = tables['union_rep.csv']
+    assert list(df['Category']) == ['No Union Representation', 'Union Representation']
+    assert list(df['Percent']) == [66.7, 33.3]
+
+
+def test_single_choice_totals_and_drop(tables):
+    df = tables['hdhp_offering.csv']
+    assert list(df['Category']) == ['Offer HDHP', 'HDHP Only', 'HDHP + Traditional']
+    assert list(df['Percent']) == [66.7, 33.3, 33.3]
+
+
+def test_multi_select(tables):
+    # Whitespace and empty options are ignored; unselected options show as 0
+    df = tables['product_mix_offered.csv']
+    assert list(df['Plan']) == ['PPO', 'HMO', 'HDHP', 'POS']
+    assert list(df['Percent']) == [100.0, 33.3, 33.3, 0.0]
+
+
+def test_multi_select_base_is_respondents_who_answered(tables):
+    assert _rows(tables['dental_offerings.csv']) == {
+        'DPPO': 100.0, 'DHMO': 50.0, 'Dental Indemnity': 0.0, 'Discount Plans': 0.0}
+
+
+def test_flags(tables):
+    assert _rows(tables['tele_access.csv']) == {'Telemedicine Access': 66.7, 'Teletherapy Access': 66.7}
+
+
+def test_group_percent(tables):
+    assert _rows(tables['no_cost_ee_only.csv']) == {
+        'Northern California': 50.0, 'Southern California': 0.0, 'Central Valley': 0.0, 'Bay Area': 0.0}
+
+
+def test_group_mean(tables):
+    assert _rows(tables['monthly_cost_pepm.csv']) == {
+        'Northern California': 625.0, 'Southern California': 700.0, 'Central Valley': 0.0, 'Bay Area': 0.0}
+
+
+def test_buckets(tables):
+    # $310k falls in the open-ended top bin; $50k is below every bin but
+    # still counts as a respondent
+    assert _rows(tables['stop_loss_attachment_points.csv']) == {
+        '$100k - $149k': 33.3, '$150k - $199k': 0.0, '$200k - $249k': 0.0, '$250k - $299k': 0.0,
+        '$300k+': 33.3}
+
+
+def test_answer_counts():
+    responses = _responses().iloc[:3]
+    counts, respondents = answer_counts(responses, FIGURES['product_mix_offered.csv'])
+    assert respondents == 3
+    assert counts.to_dict() == {'PPO': 3, 'HMO': 1, 'HDHP': 1}
+    counts, respondents = answer_counts(responses, FIGURES['stop_loss_attachment_points.csv'])
+    assert respondents == 3
+    assert counts.sum() == 2
+
+
+def test_without_status_every_response_counts():
+    tables = aggregate_responses(_responses().drop(columns='status'))
+    assert _rows(tables['funding.csv']) == {'Self-funded': 75.0, 'Fully insured': 25.0}
+
+
+def test_missing_columns():
+    with pytest.raises(ValueError, match='pepm'):
+        aggregate_responses(_responses().drop(columns='pepm'))
+
+
+def test_required_columns():
+    assert 'organization_id' not in required_columns()
+    assert {'funding', 'region', 'telemedicine_access'} <= set(required_columns())
+
+
+def test_cli_writes_every_table(tmp_path, capsys):
+    path = tmp_path / 'responses.csv'
+    _responses().to_csv(path, index=False)
+    main([str(path), '--out-dir', str(tmp_path / 'data')])
+    assert sorted(p.name for p in (tmp_path / 'data').iterdir()) == sorted(FIGURES)
+    assert "Aggregated 3 responses" in capsys.readouterr().out
+    funding = pd.read_csv(tmp_path / 'data' / 'funding.csv')
+    assert _rows(funding) == {'Self-funded': 66.7, 'Fully insured': 33.3}
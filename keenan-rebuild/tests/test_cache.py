@@ -0,0 +1,105 @@
+"""
+cache.py: page keys follow a page's inputs, and the render cache stores,
+reuses and evicts page outputs.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from build_report import build_report_files
+from cache import RenderCache, page_key
+
+
+def _page(report_pages, name):
+    return next(page for page in report_pages if page['name'] == name)
+
+
+def _add_row(data_dir, page):
+    """Change a page's CSV by adding a row."""
+    path = os.path.join(data_dir, page['csv'])
+    df = pd.read_csv(path)
+    pd.concat([df, df.iloc[[-1]]]).to_csv(path, index=False)
+
+
+def test_page_key_is_stable(report_pages, data_dir):
+    page = _page(report_pages, 'funding_approaches')
+    assert page_key(page, data_dir) == page_key(dict(page), data_dir)
+
+
+def test_page_key_ignores_position(report_pages, data_dir):
+    page = _page(report_pages, 'funding_approaches')
+    assert page_key(page, data_dir) == page_key(dict(page, number=page['number'] + 5), data_dir)
+
+
+def test_page_key_follows_spec_and_inputs(report_pages, data_dir):
+    page = _page(report_pages, 'funding_approaches')
+    key = page_key(page, data_dir)
+    retitled = dict(page, args=dict(page['args'], title='Funding'))
+    assert page_key(retitled, data_dir) != key
+    _add_row(data_dir, page)
+    assert page_key(page, data_dir) != key
+
+
+def test_page_key_missing_input(report_pages, data_dir):
+    page = _page(report_pages, 'funding_approaches')
+    os.remove(os.path.join(data_dir, page['csv']))
+    with pytest.raises(FileNotFoundError):
+        page_key(page, data_dir)
+
+
+def test_get_and_put(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    assert cache.get('ab' * 32, 'pdf') is None
+    cache.put('ab' * 32, 'pdf', b'%PDF')
+    cache.put('ab' * 32, '150.png', b'png')
+    assert cache.get('ab' * 32, 'pdf') == b'%PDF'
+    assert cache.get('ab' * 32, '150.png') == b'png'
+    assert cache.get('ab' * 32, '300.png') is None
+
+
+def test_sheets(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    assert cache.get_sheets('cd' * 32, '150.png') is None
+    cache.put_sheets('cd' * 32, '150.png', [b'one', b'two', b'three'])
+    assert cache.get_sheets('cd' * 32, '150.png') == [b'one', b'two', b'three']
+
+
+def test_prune_evicts_least_recently_used_pages_whole(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_bytes=150)
+    keys = [f'{i:02d}' * 32 for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, 'pdf', b'x' * 100)
+        cache.put(key, '150.png', b'y' * 20)
+        for fmt in ('pdf', '150.png'):
+            path = cache._path(key, fmt)
+            os.utime(path, (1_000_000 + age, 1_000_000 + age))
+    # Reading the oldest page makes it the most recently used
+    cache.get(keys[0], 'pdf')
+    assert cache.prune() == 2
+    assert cache.get(keys[0], 'pdf') == b'x' * 100
+    assert cache.get(keys[0], '150.png') == b'y' * 20
+    assert cache.get(keys[1], 'pdf') is None and cache.get(keys[1], '150.png') is None
+    assert cache.get(keys[2], 'pdf') is None
+
+
+def test_build_reuses_cached_pages(report_pages, data_dir, tmp_path, capsys):
+    cache = RenderCache(str(tmp_path / 'cache'))
+    out_dir = str(tmp_path / 'out')
+    path, page_count = build_report_files(report_pages, data_dir, out_dir, cache=cache, png=('150',))
+    with open(path, 'rb') as f:
+        first = f.read()
+    assert f"0 page(s) reused, {len(report_pages)} rendered" in capsys.readouterr().out
+
+    build_report_files(report_pages, data_dir, out_dir, cache=cache, png=('150',))
+    assert f"{len(report_pages)} page(s) reused, 0 rendered" in capsys.readouterr().out
+    with open(path, 'rb') as f:
+        assert f.read() == first
+
+    # A changed CSV re-renders just its page; a new PNG variant only rasterises
+    page = _page(report_pages, 'funding_approaches')
+    _add_row(data_dir, page)
+    build_report_files(report_pages, data_dir, out_dir, cache=cache, png=('150', 'thumb'))
+    out = capsys.readouterr().out
+    assert f"0 page(s) reused, 1 rendered, {len(report_pages) - 1} rasterised" in out
+    assert f"Rendered page {page['number']}: funding_approaches\n" in out
@@ -0,0 +1,89 @@
+"""
+compact.py: compacted reports draw the same glyphs and text, compacted PNGs
+keep their size and resolution, and neither comes out larger.
+"""
+import io
+
+import pytest
+from PIL import Image
+from pypdf import PdfReader
+
+from bench_compact import pixel_error, same_pdf_content
+from build_report import default_data_dir, merge_pdf_bytes, render_page
+from compact import Compactor, compact_pdf, compact_png, format_bytes
+
+
+@pytest.fixture(scope='module')
+def rendered(report_pages):
+    """Each report page rendered as PDF and 150 dpi PNG."""
+    results = [render_page((page, default_data_dir(), ('pdf', '150'))) for page in report_pages]
+    assert all(outputs is not None for _, outputs, _ in results)
+    return [outputs for _, outputs, _ in results]
+
+
+@pytest.fixture(scope='module')
+def merged(rendered):
+    # Two copies of each page, so the merged report repeats its font subsets
+    data, _ = merge_pdf_bytes([outputs['pdf'] for _ in range(2) for outputs in rendered])
+    return data
+
+
+def test_compact_pdf_keeps_content(merged):
+    compacted = compact_pdf(merged)
+    assert same_pdf_content(merged, compacted) == []
+    assert len(compacted) < len(merged)
+
+
+def test_compact_pdf_shares_fonts(merged):
+    reader = PdfReader(io.BytesIO(compact_pdf(merged)))
+    fonts = {font.indirect_reference.idnum for page in reader.pages
+             for font in (ref.get_object() for ref in page['/Resources'].get('/Font', {}).values())
+             if font.get('/Subtype') == '/Type3'}
+    per_page = [len([ref for ref in page['/Resources'].get('/Font', {}).values()
+                     if ref.get_object().get('/Subtype') == '/Type3']) for page in reader.pages]
+    assert len(fonts) < sum(per_page)
+
+
+def test_compact_pdf_is_never_larger(rendered):
+    for outputs in rendered:
+        assert len(compact_pdf(outputs['pdf'])) <= len(outputs['pdf'])
+
+
+def test_compact_png(rendered):
+    for outputs in rendered:
+        for sheet in outputs['150']:
+            compacted = compact_png(sheet)
+            assert len(compacted) <= len(sheet)
+            with Image.open(io.BytesIO(sheet)) as before, Image.open(io.BytesIO(compacted)) as after:
+                assert after.size == before.size
+                assert after.info.get('dpi') == pytest.approx(before.info.get('dpi'), abs=0.01)
+            # Charts come out within about 1/255 on average; the appendix's
+            # dense table text quantises worst, at about 3.5/255
+            mean, worst = pixel_error(sheet, compacted)
+            assert mean < 4 and worst <= 16
+
+
+def test_compact_png_keeps_smaller_original():
+    buf = io.BytesIO()
+    Image.new('P', (4, 4)).save(buf, format='png', optimize=True)
+    assert compact_png(buf.getvalue()) == buf.getvalue()
+
+
+def test_format_bytes():
+    assert format_bytes(512) == '512 B'
+    assert format_bytes(1536) == '1.5 KB'
+    assert format_bytes(3 * 1024 * 1024) == '3.00 MB'
+
+
+def test_compactor_tallies(merged, rendered):
+    compactor = Compactor()
+    pdf = compactor.pdf(merged)
+    pngs = [compactor.png('150', sheet) for outputs in rendered for sheet in outputs['150']]
+    files, before, after = compactor.sizes['PDF']
+    assert (files, before, after) == (1, len(merged), len(pdf))
+    assert compactor.sizes['PNG 150'][0] == len(pngs)
+    assert compactor.totals() == (before + compactor.sizes['PNG 150'][1], after + sum(map(len, pngs)))
+    lines = compactor.report()
+    assert [line.split('  ')[0].strip() for line in lines] == [
+        'PDF (1 file)', f'PNG 150 ({len(pngs)} files)', 'Total']
+    assert Compactor().report() == []
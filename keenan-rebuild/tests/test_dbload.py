@@ -0,0 +1,191 @@
+"""
+dbload.py against a SQLite stand-in for the survey_responses table
+(bench_dbload.build_database).
+
+The loader's tables must equal aggregate.aggregate_responses on the same
+responses. Throughput and peak RSS are measured in a fresh interpreter, as
+bench_dbload does; the peak must stay flat as the table grows. The 1M-row
+case is marked slow.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from aggregate import aggregate_responses, counted_responses, write_tables
+from bench_aggregate import synthetic_responses
+from bench_dbload import SCHEMA, build_database, run_case
+from bench_incremental import same_tables
+from bench_ingest import same_outputs
+from dbload import (ConnectionPool, backend_for, decode_payloads, iter_response_chunks, load_figures,
+                    load_paths, main)
+
+# Loose enough for a slow, shared machine; the loader does ~70k rows/s on one core
+MIN_ROWS_PER_SECOND = 15_000
+# Most the chunked loader's peak RSS may grow between a small and a large table
+PEAK_GROWTH_MB = 50
+CHUNK_ROWS = 10_000
+
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory, responses):
+    path = str(tmp_path_factory.mktemp('dbload') / 'survey.db')
+    build_database(path, responses)
+    return path
+
+
+def test_load_figures_matches_aggregate_responses(database, responses):
+    with ConnectionPool('sqlite:///' + database) as pool:
+        tables, counted = load_figures(pool, chunk_rows=700)
+    assert counted == len(counted_responses(responses))
+    assert same_tables(aggregate_responses(responses), tables)
+
+
+def test_chunk_size_does_not_change_tables(database):
+    with ConnectionPool('sqlite:///' + database) as pool:
+        small, _ = load_figures(pool, chunk_rows=97)
+        whole, _ = load_figures(pool, chunk_rows=1_000_000)
+    assert same_tables(whole, small)
+
+
+def test_only_counted_statuses_are_read(database, responses):
+    with ConnectionPool('sqlite:///' + database) as pool:
+        chunks = list(iter_response_chunks(pool, ['funding'], chunk_rows=1000))
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    statuses = set().union(*(set(chunk['status']) for chunk in chunks))
+    assert statuses == {'completed', 'submitted'}
+    assert sum(len(chunk) for chunk in chunks) == len(counted_responses(responses))
+    assert list(chunks[0].columns) == ['organization_id', 'status', 'funding']
+
+
+def test_nested_payloads_with_paths(tmp_path, responses):
+    # The web app nests answers by survey section; a paths file points at them
+    path = str(tmp_path / 'nested.db')
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    sample = responses.iloc[:500]
+    answers = [col for col in sample.columns if col not in ('organization_id', 'status')]
+    for row in json.loads(sample.to_json(orient='records')):
+        payload = {'general': {'region': row['region']}, 'sections': [{k: row[k] for k in answers}]}
+        conn.execute("INSERT INTO survey_responses (organization_id, status, data) VALUES (?, ?, ?)",
+                     (row['organization_id'], row['status'], json.dumps(payload)))
+    conn.commit()
+    conn.close()
+    paths = {col: f'sections.0.{col}' for col in answers}
+    paths['region'] = 'general.region'
+    with ConnectionPool('sqlite:///' + path) as pool:
+        tables, _ = load_figures(pool, paths, chunk_rows=128)
+    assert same_tables(aggregate_responses(sample), tables)
+
+
+def test_decode_payloads():
+    texts = ['{"a": 1, "b": {"c": [5, 6]}}', '{"a": 2}']
+    decoded = decode_payloads(texts, ['a', 'c'], {'c': 'b.c.1'})
+    assert list(decoded['a']) == [1, 2]
+    assert decoded['c'].iloc[0] == 6
+    assert decoded['c'].isna().iloc[1]
+
+
+def test_decode_payloads_names_the_bad_row():
+    with pytest.raises(ValueError, match='row 2'):
+        decode_payloads(['{"a": 1}', '{"a": '], ['a'])
+    with pytest.raises(ValueError, match='JSON objects'):
+        decode_payloads(['{"a": 1}', '[1]'], ['a'])
+
+
+def test_load_paths(tmp_path):
+    good = tmp_path / 'paths.json'
+    good.write_text('{"region": "general.region"}')
+    assert load_paths(str(good)) == {'region': 'general.region'}
+    bad = tmp_path / 'bad.json'
+    bad.write_text('{"region": 3}')
+    with pytest.raises(ValueError, match='dotted path strings'):
+        load_paths(str(bad))
+    with pytest.raises(FileNotFoundError):
+        load_paths(str(tmp_path / 'missing.json'))
+
+
+def test_backend_for():
+    assert backend_for('sqlite:///survey.db') == 'sqlite'
+    assert backend_for('postgres://localhost/keenan') == 'postgresql'
+    assert backend_for('postgresql://localhost/keenan') == 'postgresql'
+    with pytest.raises(ValueError, match='Unsupported database URL'):
+        backend_for('mysql://localhost/keenan')
+
+
+def test_pool_reuses_connections(database):
+    with ConnectionPool('sqlite:///' + database, size=1) as pool:
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            assert second is first
+
+
+def test_pool_is_bounded(database):
+    with ConnectionPool('sqlite:///' + database, size=1) as pool:
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with pool.connection():
+                held.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait()
+        try:
+            with pytest.raises(TimeoutError):
+                with pool.connection(timeout=0.05):
+                    pass
+        finally:
+            release.set()
+            thread.join()
+
+
+def test_pool_missing_database(tmp_path):
+    pool = ConnectionPool('sqlite:///' + str(tmp_path / 'missing.db'))
+    with pytest.raises(FileNotFoundError):
+        with pool.connection():
+            pass
+
+
+def test_cli(database, responses, tmp_path, capsys):
+    out_dir = str(tmp_path / 'data')
+    main(['--db', 'sqlite:///' + database, '--out-dir', out_dir, '--chunk-rows', '1000'])
+    assert f"Loaded {len(counted_responses(responses)):,} responses" in capsys.readouterr().out
+    expected_dir = str(tmp_path / 'expected')
+    write_tables(aggregate_responses(responses), expected_dir)
+    assert same_outputs(expected_dir, out_dir)
+
+
+def _measure(tmp_path, rows):
+    """Load a rows-row table in a fresh interpreter; return (peak MB, rows/s)."""
+    responses = synthetic_responses(rows)
+    path = str(tmp_path / f'survey_{rows}.db')
+    build_database(path, responses)
+    out_dir = str(tmp_path / f'chunked_{rows}')
+    peak, seconds = run_case('chunked', path, out_dir, CHUNK_ROWS)
+    expected_dir = str(tmp_path / f'expected_{rows}')
+    write_tables(aggregate_responses(responses), expected_dir)
+    assert same_outputs(expected_dir, out_dir)
+    os.remove(path)
+    return peak / 1024, rows / seconds
+
+
+def _check_scaling(tmp_path, rows):
+    small_peak, _ = _measure(tmp_path, 2 * CHUNK_ROWS)
+    peak, rate = _measure(tmp_path, rows)
+    assert rate >= MIN_ROWS_PER_SECOND, f"{rate:,.0f} rows/s"
+    assert peak - small_peak <= PEAK_GROWTH_MB, f"peak {small_peak:.0f} MB -> {peak:.0f} MB"
+
+
+def test_chunked_load_throughput_and_peak(tmp_path):
+    _check_scaling(tmp_path, 100_000)
+
+
+@pytest.mark.slow
+def test_chunked_load_throughput_and_peak_1m(tmp_path):
+    _check_scaling(tmp_path, 1_000_000)
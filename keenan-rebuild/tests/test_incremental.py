@@ -0,0 +1,117 @@
+"""
+incremental.py: chunked and stored counters give aggregate.py's tables.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from aggregate import FIGURES, aggregate_responses, counted_responses
+from bench_incremental import same_tables
+from incremental import IncrementalStore, aggregate_chunks, main
+
+
+def test_aggregate_chunks_matches_aggregate_responses(responses):
+    chunks = (responses.iloc[start:start + 700] for start in range(0, len(responses), 700))
+    tables, counted = aggregate_chunks(chunks)
+    assert counted == len(counted_responses(responses))
+    assert same_tables(aggregate_responses(responses), tables)
+
+
+def test_aggregate_chunks_without_responses():
+    tables, counted = aggregate_chunks([])
+    assert counted == 0
+    assert set(tables) == set(FIGURES)
+
+
+def test_fold_in_batches(responses, tmp_path):
+    with IncrementalStore(str(tmp_path / 'store.sqlite')) as store:
+        changed = store.fold(responses.iloc[:1000])
+        store.fold(responses.iloc[1000:])
+        assert changed == set(FIGURES)
+        assert store.response_count() == len(counted_responses(responses))
+        assert same_tables(aggregate_responses(responses), store.tables())
+
+
+def test_resubmission_replaces_earlier_response(responses, tmp_path):
+    responses = responses.copy()
+    with IncrementalStore(str(tmp_path / 'store.sqlite')) as store:
+        store.fold(responses)
+        first = responses.index[responses['status'] == 'submitted'][0]
+        resubmitted = responses.loc[[first]].copy()
+        resubmitted['funding'] = 'Fully insured' if resubmitted['funding'].iloc[0] == 'Self-funded' \
+            else 'Self-funded'
+        changed = store.fold(resubmitted)
+        responses.loc[first] = resubmitted.loc[first]
+        assert 'funding.csv' in changed
+        assert store.response_count() == len(counted_responses(responses))
+        assert same_tables(aggregate_responses(responses), store.tables())
+
+
+def test_uncounted_status_removes_response(responses, tmp_path):
+    responses = responses.copy()
+    with IncrementalStore(str(tmp_path / 'store.sqlite')) as store:
+        store.fold(responses)
+        first = responses.index[responses['status'] == 'submitted'][0]
+        withdrawn = responses.loc[[first]].assign(status='draft')
+        store.fold(withdrawn)
+        responses.loc[first, 'status'] = 'draft'
+        assert store.response_count() == len(counted_responses(responses))
+        assert same_tables(aggregate_responses(responses), store.tables())
+
+
+def test_last_response_in_a_batch_wins(responses, tmp_path):
+    first = responses.iloc[[0]]
+    batch = pd.concat([first.assign(status='submitted', funding='Fully insured'),
+                       first.assign(status='submitted', funding='Self-funded')])
+    with IncrementalStore(str(tmp_path / 'store.sqlite')) as store:
+        store.fold(batch)
+        assert store.response_count() == 1
+        assert store.tables(['funding.csv'])['funding.csv'].to_dict('list') == {
+            'Type': ['Self-funded'], 'Percent': [100.0]}
+
+
+def test_store_survives_reopening(responses, tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    with IncrementalStore(path) as store:
+        store.fold(responses)
+    with IncrementalStore(path) as store:
+        assert same_tables(aggregate_responses(responses), store.tables())
+
+
+def test_store_rejects_other_figure_definitions(responses, tmp_path):
+    path = str(tmp_path / 'store.sqlite')
+    IncrementalStore(path).close()
+    figures = {'funding.csv': FIGURES['funding.csv']}
+    with pytest.raises(ValueError, match='different figure definitions'):
+        IncrementalStore(path, figures)
+
+
+def test_fold_missing_columns(responses, tmp_path):
+    with IncrementalStore(str(tmp_path / 'store.sqlite')) as store:
+        with pytest.raises(ValueError, match='funding'):
+            store.fold(responses.drop(columns='funding'))
+
+
+def test_write_tables_only_rewrites_changed_files(responses, tmp_path):
+    out_dir = str(tmp_path / 'data')
+    with IncrementalStore(str(tmp_path / 'store.sqlite')) as store:
+        store.fold(responses)
+        assert store.write_tables(out_dir) == sorted(FIGURES)
+        assert store.write_tables(out_dir) == []
+        before = os.stat(os.path.join(out_dir, 'funding.csv')).st_mtime_ns
+        first = responses.index[responses['status'] == 'submitted'][0]
+        changed = store.fold(responses.loc[[first]].assign(pepm=5000))
+        assert changed == {'monthly_cost_pepm.csv'}
+        assert 'funding.csv' not in store.write_tables(out_dir, sorted(changed))
+        assert os.stat(os.path.join(out_dir, 'funding.csv')).st_mtime_ns == before
+
+
+def test_cli(responses, tmp_path, capsys):
+    first, second = tmp_path / 'batch1.csv', tmp_path / 'batch2.csv'
+    responses.iloc[:1500].to_csv(first, index=False)
+    responses.iloc[1500:].to_csv(second, index=False)
+    out_dir = tmp_path / 'data'
+    main([str(first), str(second), '--store', str(tmp_path / 'store.sqlite'), '--out-dir', str(out_dir)])
+    assert f"{len(counted_responses(responses)):,} responses counted" in capsys.readouterr().out
+    assert sorted(p.name for p in out_dir.iterdir()) == sorted(FIGURES)
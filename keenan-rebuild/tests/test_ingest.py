@@ -0,0 +1,171 @@
+"""
+ingest.py: response exports give aggregate.py's tables; page exports are
+matched to manifest pages and copied.
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from aggregate import aggregate_responses, counted_responses
+from bench_incremental import same_tables
+from bench_ingest import write_xlsx
+from ingest import ingest_pages, ingest_responses, iter_chunks, load_mapping, main, match_pages, read_page
+from registry import load_manifest
+
+
+@pytest.fixture(scope='module')
+def pages():
+    return load_manifest()
+
+
+def _page(pages, name):
+    return next(page for page in pages if page['name'] == name)
+
+
+def _expected(responses, tmp_path):
+    """
+    aggregate_responses on the responses as read back from a CSV export,
+    where an empty multi-select answer is a missing value, as in a workbook.
+    """
+    path = tmp_path / 'expected.csv'
+    responses.to_csv(path, index=False)
+    return aggregate_responses(pd.read_csv(path))
+
+
+def test_csv_responses(responses, tmp_path):
+    path = str(tmp_path / 'responses.csv')
+    responses.to_csv(path, index=False)
+    tables, counted = ingest_responses([path], chunk_rows=450)
+    assert counted == len(counted_responses(responses))
+    assert same_tables(_expected(responses, tmp_path), tables)
+
+
+def test_xlsx_responses(responses, tmp_path):
+    path = str(tmp_path / 'responses.xlsx')
+    write_xlsx(responses, path)
+    tables, counted = ingest_responses([path], chunk_rows=450)
+    assert counted == len(counted_responses(responses))
+    assert same_tables(_expected(responses, tmp_path), tables)
+
+
+def test_several_exports_are_read_in_order(responses, tmp_path):
+    first, second = str(tmp_path / 'first.csv'), str(tmp_path / 'second.xlsx')
+    responses.iloc[:1000].to_csv(first, index=False)
+    write_xlsx(responses.iloc[1000:], second)
+    tables, _ = ingest_responses([first, second])
+    assert same_tables(_expected(responses, tmp_path), tables)
+
+
+def test_renamed_columns_and_byte_order_mark(responses, tmp_path):
+    path = str(tmp_path / 'export.csv')
+    renamed = responses.rename(columns={'funding': 'Funding Type', 'region': 'Region'})
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        renamed.to_csv(f, index=False)
+    tables, _ = ingest_responses([path], columns={'Funding Type': 'funding', 'Region': 'region'})
+    assert same_tables(_expected(responses, tmp_path), tables)
+
+
+def test_missing_column_fails_before_reading(responses, tmp_path):
+    path = str(tmp_path / 'export.csv')
+    responses.drop(columns='pepm').to_csv(path, index=False)
+    with pytest.raises(ValueError, match=r"Missing required columns .*'pepm'"):
+        iter_chunks(path, ['pepm', 'region'])
+
+
+def test_missing_export(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ingest_responses([str(tmp_path / 'missing.csv')])
+
+
+def test_iter_chunks_keeps_wanted_columns(responses, tmp_path):
+    path = str(tmp_path / 'responses.xlsx')
+    write_xlsx(responses.iloc[:250], path)
+    chunks = list(iter_chunks(path, ['region', 'pepm'], optional=('status', 'absent'), chunk_rows=100))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+    assert list(chunks[0].columns) == ['region', 'pepm', 'status']
+    assert list(pd.concat(chunks)['pepm']) == list(responses['pepm'].iloc[:250])
+
+
+def test_page_export_from_csv(pages, tmp_path):
+    # A CSV export named after the page's CSV, with an extra column and the
+    # columns out of order
+    export = tmp_path / 'funding.csv'
+    pd.DataFrame({'Note': ['a', 'b'], 'Percent': [70.0, 30.0], 'Type': ['Self-funded', 'Fully insured']}) \
+        .to_csv(export, index=False)
+    out_dir = tmp_path / 'data'
+    assert ingest_pages([str(export)], pages, str(out_dir)) == [('funding_approaches', 2)]
+    written = pd.read_csv(out_dir / 'funding.csv')
+    assert list(written.columns) == ['Type', 'Percent']
+    assert list(written['Type']) == ['Self-funded', 'Fully insured']
+
+
+def test_page_export_from_mapped_sheet(pages, tmp_path):
+    export = str(tmp_path / 'tables.xlsx')
+    write_xlsx(pd.DataFrame({'Area': ['Bay Area', 'Central Valley'], 'Cost': [758, 548]}), export)
+    mapping = {'monthly_cost_pepm': {'sheet': 'Responses', 'columns': {'Area': 'Region', 'Cost': 'PEPM'}}}
+    out_dir = tmp_path / 'data'
+    assert ingest_pages([export], pages, str(out_dir), mapping) == [('monthly_cost_pepm', 2)]
+    page = _page(pages, 'monthly_cost_pepm')
+    assert pd.read_csv(out_dir / page['csv']).to_dict('list') == {
+        'Region': ['Bay Area', 'Central Valley'], 'PEPM': [758, 548]}
+    df = read_page(export, page, 'Responses', mapping['monthly_cost_pepm']['columns'])
+    assert list(df.columns) == page['columns']
+
+
+def test_page_export_missing_column_writes_nothing(pages, tmp_path):
+    good, bad = tmp_path / 'funding.csv', tmp_path / 'network.csv'
+    pd.DataFrame({'Type': ['Self-funded'], 'Percent': [100.0]}).to_csv(good, index=False)
+    pd.DataFrame({'Network': ['Regional PPO']}).to_csv(bad, index=False)
+    out_dir = tmp_path / 'data'
+    with pytest.raises(ValueError, match='Percent'):
+        ingest_pages([str(good), str(bad)], pages, str(out_dir))
+    assert not out_dir.exists()
+
+
+def test_page_in_two_exports(pages, tmp_path):
+    first, second = tmp_path / 'funding.csv', tmp_path / 'b'
+    second.mkdir()
+    pd.DataFrame({'Type': ['Self-funded'], 'Percent': [100.0]}).to_csv(first, index=False)
+    pd.DataFrame({'Type': ['Self-funded'], 'Percent': [100.0]}).to_csv(second / 'funding_approaches.csv',
+                                                                        index=False)
+    with pytest.raises(ValueError, match='more than one export'):
+        ingest_pages([str(first), str(second / 'funding_approaches.csv')], pages, str(tmp_path / 'data'))
+
+
+def test_no_page_matches(pages, tmp_path):
+    export = tmp_path / 'unrelated.csv'
+    export.write_text('a,b\n1,2\n')
+    with pytest.raises(ValueError, match='matches a manifest page'):
+        ingest_pages([str(export)], pages, str(tmp_path / 'data'))
+
+
+def test_match_pages(pages):
+    matches = match_pages(['funding', 'self_funded_network', 'Other'], pages)
+    assert [(page['name'], sheet) for page, sheet, _ in matches] == [
+        ('funding_approaches', 'funding'), ('self_funded_network', 'self_funded_network')]
+    with pytest.raises(ValueError, match='unknown page'):
+        match_pages(['funding'], pages, {'nope': {}})
+    with pytest.raises(ValueError, match="Sheet 'Missing'"):
+        match_pages(['funding'], pages, {'funding_approaches': {'sheet': 'Missing'}})
+
+
+def test_load_mapping(tmp_path):
+    path = tmp_path / 'mapping.json'
+    mapping = {'responses': {'sheet': 'Responses', 'columns': {'Org ID': 'organization_id'}},
+               'pages': {'monthly_cost_pepm': {'sheet': 'PEPM'}}}
+    path.write_text(json.dumps(mapping))
+    assert load_mapping(str(path)) == mapping
+    path.write_text(json.dumps({'pages': {'monthly_cost_pepm': {'columns': ['Region']}}}))
+    with pytest.raises(ValueError, match='pages.monthly_cost_pepm'):
+        load_mapping(str(path))
+
+
+def test_cli_responses(responses, tmp_path, capsys):
+    path = str(tmp_path / 'responses.xlsx')
+    write_xlsx(responses, path)
+    out_dir = tmp_path / 'data'
+    main(['responses', path, '--out-dir', str(out_dir)])
+    capsys.readouterr()
+    expected = _expected(responses, tmp_path)
+    assert same_tables(expected, {name: pd.read_csv(out_dir / name) for name in expected})
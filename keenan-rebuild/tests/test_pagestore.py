@@ -0,0 +1,112 @@
+"""
+pagestore.py: pages are stored once per distinct content, reports refer to
+them, and an assembled report is the report a cached build writes.
+"""
+import json
+import os
+
+import pytest
+
+from build_report import build_report_files, page_png_path
+from cache import RenderCache
+from pagestore import REFS_FILE, PageStore, assemble, load_refs, main, referenced_digests, store_stats
+
+
+def test_identical_outputs_are_stored_once(tmp_path):
+    store = PageStore(str(tmp_path / 'store'))
+    store.put('aa' * 32, 'pdf', b'%PDF same')
+    store.put('bb' * 32, 'pdf', b'%PDF same')
+    store.put('cc' * 32, '150.png', b'png')
+    assert store.get('aa' * 32, 'pdf') == store.get('bb' * 32, 'pdf') == b'%PDF same'
+    assert store.get('dd' * 32, 'pdf') is None
+    objects = [name for _, _, names in os.walk(tmp_path / 'store' / 'objects') for name in names]
+    assert sorted(name.rsplit('.', 1)[1] for name in objects) == ['pdf', 'png']
+
+
+def test_link(tmp_path):
+    store = PageStore(str(tmp_path / 'store'))
+    digest = store.put_object(b'png bytes', 'png')
+    dest = str(tmp_path / 'page.png')
+    with open(dest, 'wb') as f:
+        f.write(b'old')
+    assert store.link(digest, 'png', dest)
+    assert os.path.samefile(dest, store.object_path(digest, 'png'))
+    assert not store.link(digest, 'png', dest)
+
+
+def test_collect(tmp_path):
+    store = PageStore(str(tmp_path / 'store'))
+    store.put('aa' * 32, 'pdf', b'kept')
+    store.put('bb' * 32, 'pdf', b'dropped')
+    kept = store.put_object(b'kept', 'pdf')
+    assert store.collect({kept}) == (1, len(b'dropped'))
+    assert store.get('aa' * 32, 'pdf') == b'kept'
+    assert not os.path.exists(store._index_path('bb' * 32, 'pdf'))
+
+
+@pytest.fixture
+def built(report_pages, data_dir, tmp_path):
+    """The report built with the render cache, and against a page store with --refs-only."""
+    cached_dir = str(tmp_path / 'cached')
+    build_report_files(report_pages, data_dir, cached_dir, cache=RenderCache(str(tmp_path / 'cache')),
+                       png=('150',))
+    store = PageStore(str(tmp_path / 'store'))
+    refs_dir = str(tmp_path / 'refs')
+    path, page_count = build_report_files(report_pages, data_dir, refs_dir, cache=store, png=('150',),
+                                          refs_only=True)
+    assert path == os.path.join(refs_dir, REFS_FILE)
+    return cached_dir, refs_dir, store, page_count
+
+
+def test_refs_only_build(built, report_pages):
+    _, refs_dir, store, _ = built
+    assert not os.path.exists(os.path.join(refs_dir, 'report.pdf'))
+    refs = load_refs(refs_dir)
+    assert refs['store'] == os.path.abspath(store.root)
+    assert [page['name'] for page in refs['pages']] == [page['name'] for page in report_pages]
+    png = page_png_path(os.path.join(refs_dir, 'figures'), report_pages[0], '150')
+    digest = refs['pages'][0]['png']['150'][0]
+    assert os.path.samefile(png, store.object_path(digest, 'png'))
+
+
+def test_assembled_report_matches_cached_build(built):
+    cached_dir, refs_dir, _, page_count = built
+    path, assembled_pages = assemble(refs_dir, os.path.join(refs_dir, 'assembled.pdf'))
+    assert assembled_pages == page_count
+    with open(path, 'rb') as f, open(os.path.join(cached_dir, 'report.pdf'), 'rb') as g:
+        assert f.read() == g.read()
+
+
+def test_same_data_shares_every_page(built, report_pages, data_dir, tmp_path):
+    _, refs_dir, store, _ = built
+    other_dir = str(tmp_path / 'other')
+    build_report_files(report_pages, data_dir, other_dir, cache=store, png=('150',), refs_only=True)
+    referenced, stored, count = store_stats([refs_dir, other_dir])
+    assert stored * 2 == referenced
+    assert count == len(referenced_digests(load_refs(refs_dir)))
+
+
+def test_assemble_missing_page(built):
+    _, refs_dir, store, _ = built
+    digest = load_refs(refs_dir)['pages'][1]['pdf']
+    os.remove(store.object_path(digest, 'pdf'))
+    with pytest.raises(FileNotFoundError, match='missing from'):
+        assemble(refs_dir)
+
+
+def test_load_refs_errors(tmp_path):
+    with pytest.raises(FileNotFoundError, match='--page-store'):
+        load_refs(str(tmp_path))
+    (tmp_path / REFS_FILE).write_text(json.dumps({'pages': []}))
+    with pytest.raises(ValueError, match="'store'"):
+        load_refs(str(tmp_path))
+
+
+def test_cli_collect_keeps_referenced_pages(built, capsys):
+    _, refs_dir, store, _ = built
+    unused = store.put_object(b'unused page', 'pdf')
+    main(['collect', '--store', store.root, refs_dir])
+    assert "Deleted 1 object(s)" in capsys.readouterr().out
+    assert not os.path.exists(store.object_path(unused, 'pdf'))
+    main(['assemble', refs_dir])
+    assert os.path.exists(os.path.join(refs_dir, 'report.pdf'))
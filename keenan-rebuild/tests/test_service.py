@@ -0,0 +1,151 @@
+"""
+service.py: reports and page PNGs served in process, with ETags, shared
+renders and error responses.
+"""
+import asyncio
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from cache import RenderCache
+from service import HTTPError, ReportService, etag_matches
+
+
+@pytest.fixture
+def service(report_pages, data_dir, tmp_path):
+    clients_dir = tmp_path / 'clients'
+    clients_dir.mkdir()
+    shutil.copytree(data_dir, clients_dir / 'acme')
+    service = ReportService(report_pages, RenderCache(str(tmp_path / 'cache')), data_dir,
+                            clients_dir=str(clients_dir), workers=1, png=())
+    yield service
+    service.close()
+
+
+def _get(service, target, headers=None):
+    return asyncio.run(service.respond('GET', target, headers or {}))
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_report_and_not_modified(service):
+    status, headers, body = _get(service, '/report.pdf')
+    assert status == 200
+    assert headers['Content-Type'] == 'application/pdf'
+    assert body.startswith(b'%PDF')
+    status, _, empty = _get(service, '/report.pdf', {'if-none-match': headers['ETag']})
+    assert (status, empty) == (304, b'')
+    assert service.stats['not_modified'] == 1
+    # A second full request is served from the cached report
+    assert _get(service, '/report.pdf')[2] == body
+    assert service.stats['reports_built'] == 1
+
+
+def test_client_report_shares_pages(service):
+    etag = _get(service, '/report.pdf')[1]['ETag']
+    status, headers, _ = _get(service, '/report.pdf?client=acme')
+    assert status == 200
+    # Same data, so the same report key and no pages rendered twice
+    assert headers['ETag'] == etag
+    assert service.stats['pages_rendered'] == len(service.pages)
+
+
+def test_concurrent_requests_share_one_build(service):
+    async def both():
+        return await asyncio.gather(service.respond('GET', '/report.pdf', {}),
+                                    service.respond('GET', '/report.pdf', {}))
+
+    first, second = asyncio.run(both())
+    assert first[2] == second[2]
+    assert service.stats['reports_built'] == 1
+    assert service.stats['pages_rendered'] == len(service.pages)
+
+
+def test_changed_input_changes_etag(service, data_dir):
+    etag = _get(service, '/report.pdf')[1]['ETag']
+    page = service.pages_by_name['funding_approaches']
+    path = os.path.join(data_dir, page['csv'])
+    df = pd.read_csv(path)
+    pd.concat([df, df.iloc[[-1]]]).to_csv(path, index=False)
+    status, headers, _ = _get(service, '/report.pdf', {'if-none-match': etag})
+    assert status == 200
+    assert headers['ETag'] != etag
+    assert service.stats['pages_rendered'] == len(service.pages) + 1
+
+
+def test_page_png(service):
+    status, headers, body = _get(service, '/pages/cover.png?variant=150')
+    assert status == 200
+    assert headers['Content-Type'] == 'image/png'
+    assert body.startswith(b'\x89PNG')
+    status, _, _ = _get(service, '/pages/cover.png?variant=150', {'if-none-match': headers['ETag']})
+    assert status == 304
+
+
+def test_health(service):
+    status, headers, body = _get(service, '/health')
+    assert status == 200
+    assert headers['Content-Type'] == 'application/json'
+    health = json.loads(body)
+    assert health['status'] == 'ok'
+    assert health['workers'] == 1
+
+
+@pytest.mark.parametrize('target, status', [
+    ('/pages/nope.png', 404),
+    ('/pages/cover.png?variant=999', 400),
+    ('/pages/cover.png?sheet=0', 400),
+    ('/report.pdf?client=../acme', 400),
+    ('/report.pdf?client=other', 404),
+    ('/index.html', 404),
+])
+def test_errors(service, target, status):
+    with pytest.raises(HTTPError) as e:
+        _get(service, target)
+    assert e.value.status == status
+
+
+def test_client_without_clients_dir(report_pages, data_dir, tmp_path):
+    service = ReportService(report_pages, RenderCache(str(tmp_path / 'cache')), data_dir, workers=1, png=())
+    try:
+        with pytest.raises(HTTPError, match='no --clients-dir') as e:
+            _get(service, '/report.pdf?client=acme')
+        assert e.value.status == 400
+    finally:
+        service.close()
+
+
+def test_post_is_rejected(service):
+    with pytest.raises(HTTPError) as e:
+        asyncio.run(service.respond('POST', '/report.pdf', {}))
+    assert e.value.status == 405
+
+
+def test_http_connection(service, capsys):
+    async def exchange():
+        server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            # Two requests on one kept-alive connection, then one that closes it
+            writer.write(b'GET /health HTTP/1.1\r\nHost: x\r\n\r\n'
+                         b'GET /missing HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+            data = await reader.read()
+            writer.close()
+            return data
+
+    data = asyncio.run(exchange())
+    assert data.startswith(b'HTTP/1.1 200 OK\r\n')
+    assert b'HTTP/1.1 404 Not Found\r\n' in data
+    assert data.endswith(b'Not found: /missing\n')
+    assert 'GET /health 200' in capsys.readouterr().out
@@ -0,0 +1,97 @@
+"""
+The vector renderer against matplotlib, for every helper it supports.
+
+Each page is rendered both ways and compared with bench_vector's checks:
+text runs, rectangles and lines must lie within TOLERANCE of the page size
+of where matplotlib draws them.
+"""
+import pandas as pd
+import pytest
+
+import vector
+from bench_vector import compare_geometry, compare_layout, matplotlib_pdf, shape_geometry, text_lines
+from build_report import default_data_dir, load_page_data
+from charts import table_rows_per_sheet
+from registry import load_manifest
+
+TOLERANCE = 0.03
+
+MANIFEST_PAGES = [page for page in load_manifest() if page['chart'] in vector.SUPPORTED_ARGS]
+
+
+def synthetic_pages():
+    """Cases the manifest doesn't exercise, as (page spec, DataFrame) pairs."""
+    regions = pd.DataFrame({'Region': ['Northeast', 'Mid-Atlantic', 'Southeast', 'Great Lakes',
+                                       'Plains', 'Mountain West', 'Pacific'],
+                            'PEPM': [612.5, 584.0, 547.25, 598.75, 531.0, 566.5, 641.0]})
+    rows = table_rows_per_sheet((10, 8)) * 2 + 3
+    contributions = pd.DataFrame({'Tier': [f'Tier {i}' for i in range(rows)],
+                                  'Employee': [f'{10 + i % 40}%' for i in range(rows)],
+                                  'Employer': [f'${1000 + 25 * i:,}' for i in range(rows)]})
+    return [
+        ({'name': 'rotated_currency_bars', 'chart': 'bar_chart',
+          'args': {'x_col': 'Region', 'y_col': 'PEPM', 'title': 'PEPM by Region',
+                   'rotation': 45, 'value_fmt': 'currency'}}, regions),
+        ({'name': 'bars_without_ylabel', 'chart': 'bar_chart',
+          'args': {'x_col': 'Region', 'y_col': 'PEPM', 'title': 'PEPM by Region', 'value_fmt': 'raw'}},
+         regions),
+        ({'name': 'currency_hbars', 'chart': 'horizontal_bar_chart',
+          'args': {'x_col': 'Region', 'y_col': 'PEPM', 'title': 'PEPM by Region', 'xlabel': 'PEPM',
+                   'value_fmt': 'currency'}}, regions),
+        ({'name': 'continued_table', 'chart': 'table_page',
+          'args': {'title': 'Contributions by Tier'}}, contributions),
+    ]
+
+
+def _pdfs(page, data_dir):
+    return matplotlib_pdf(page, data_dir), vector.render_pdf(page, load_page_data(page, data_dir))
+
+
+def assert_same_layout(reference, candidate):
+    worst, problems = compare_layout(text_lines(reference), text_lines(candidate))
+    assert not problems
+    assert worst <= TOLERANCE, f"text is {worst:.1%} of the page from matplotlib's"
+    worst, problems = compare_geometry(shape_geometry(reference), shape_geometry(candidate))
+    assert not problems
+    assert worst <= TOLERANCE, f"rectangles or lines are {worst:.1%} of the page from matplotlib's"
+
+
+def test_every_helper_is_covered():
+    charts = {page['chart'] for page in MANIFEST_PAGES} | {page['chart'] for page, _ in synthetic_pages()}
+    assert charts == set(vector.SUPPORTED_ARGS)
+
+
+@pytest.mark.parametrize('page', MANIFEST_PAGES, ids=[page['name'] for page in MANIFEST_PAGES])
+def test_manifest_page_matches_matplotlib(page):
+    data_dir = default_data_dir()
+    assert vector.unsupported_reason(page, load_page_data(page, data_dir)) is None
+    assert_same_layout(*_pdfs(page, data_dir))
+
+
+@pytest.mark.parametrize('case', synthetic_pages(), ids=[page['name'] for page, _ in synthetic_pages()])
+def test_synthetic_page_matches_matplotlib(case, tmp_path):
+    page, df = case
+    csv_name = f"{page['name']}.csv"
+    df.to_csv(tmp_path / csv_name, index=False)
+    page = dict(page, csv=csv_name, columns=list(df.columns))
+    assert vector.unsupported_reason(page, df) is None
+    assert_same_layout(*_pdfs(page, str(tmp_path)))
+
+
+def test_table_continues_onto_further_sheets(tmp_path):
+    page, df = synthetic_pages()[-1]
+    df.to_csv(tmp_path / 'table.csv', index=False)
+    page = dict(page, csv='table.csv', columns=list(df.columns))
+    reference, candidate = _pdfs(page, str(tmp_path))
+    assert len(text_lines(candidate)) == len(text_lines(reference)) == 3
+
+
+def test_geometry_check_catches_a_moved_bar():
+    page = next(page for page in MANIFEST_PAGES if page['chart'] == 'bar_chart')
+    df = load_page_data(page, default_data_dir())
+    moved = df.copy()
+    y_col = page['args']['y_col']
+    moved.loc[moved[y_col].idxmin(), y_col] = moved[y_col].min() / 2
+    reference = shape_geometry(vector.render_pdf(page, df))
+    worst, _ = compare_geometry(reference, shape_geometry(vector.render_pdf(page, moved)))
+    assert worst > TOLERANCE
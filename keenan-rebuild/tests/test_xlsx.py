@@ -0,0 +1,119 @@
+"""
+xlsx.py: reading cell values from a hand-built workbook.
+"""
+import zipfile
+
+import pytest
+
+from xlsx import Workbook, column_index
+
+_NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+_REL_NS = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet'
+
+SHARED_STRINGS = (
+    f'<sst {_NS} count="3" uniqueCount="3">'
+    '<si><t>Region</t></si>'
+    '<si><r><t>Bay </t></r><r><t>Area</t></r><rPh><t>ignored</t></rPh></si>'
+    '<si><t/></si>'
+    '</sst>')
+
+# Cells are left out, unordered by reference, or missing their reference,
+# as real exports have them
+SHEET = (
+    f'<worksheet {_NS}><sheetData>'
+    '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="inlineStr"><is><t>PEPM</t></is></c>'
+    '<c r="D1" t="inlineStr"><is><t>Union</t></is></c></row>'
+    '<row r="2"><c r="A2" t="s"><v>1</v></c><c r="B2"><v>612</v></c><c r="C2"><v>0.25</v></c>'
+    '<c r="D2" t="b"><v>1</v></c></row>'
+    '<row r="4"><c r="A4" t="e"><v>#N/A</v></c><c r="B4" t="str"><f>B2*2</f><v>1224</v></c>'
+    '<c><v>7</v></c><c r="D4" t="b"><v>0</v></c></row>'
+    '<row r="5"><c r="A5" t="s"><v>2</v></c><c r="B5"/></row>'
+    '</sheetData></worksheet>')
+
+
+def write_workbook(path, sheets, shared_strings=SHARED_STRINGS):
+    """Write an .xlsx with the given {name: worksheet XML}, in order."""
+    entries = ''.join(f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>'
+                      for i, name in enumerate(sheets, start=1))
+    rels = ''.join(f'<Relationship Id="rId{i}" Type="{_REL}" Target="worksheets/sheet{i}.xml"/>'
+                   for i in range(1, len(sheets) + 1))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('xl/workbook.xml', f'<workbook {_NS} {_REL_NS}><sheets>{entries}</sheets></workbook>')
+        archive.writestr('xl/_rels/workbook.xml.rels',
+                         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         f'{rels}</Relationships>')
+        if shared_strings is not None:
+            archive.writestr('xl/sharedStrings.xml', shared_strings)
+        for i, xml in enumerate(sheets.values(), start=1):
+            archive.writestr(f'xl/worksheets/sheet{i}.xml', xml)
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    path = str(tmp_path / 'export.xlsx')
+    write_workbook(path, {'Summary': f'<worksheet {_NS}><sheetData/></worksheet>', 'Responses': SHEET})
+    return path
+
+
+def test_column_index():
+    assert column_index('A1') == 0
+    assert column_index('Z9') == 25
+    assert column_index('AB12') == 27
+    assert column_index('xfd1') == 16383
+
+
+def test_sheetnames(workbook_path):
+    with Workbook(workbook_path) as workbook:
+        assert workbook.sheetnames == ['Summary', 'Responses']
+
+
+def test_rows(workbook_path):
+    with Workbook(workbook_path) as workbook:
+        assert list(workbook.rows('Responses')) == [
+            ('Region', 'PEPM', None, 'Union'),
+            ('Bay Area', 612, 0.25, True),
+            ('#N/A', '1224', 7, False),
+            ('',),
+        ]
+        assert list(workbook.rows('Summary')) == []
+
+
+def test_value_types(workbook_path):
+    with Workbook(workbook_path) as workbook:
+        row = list(workbook.rows('Responses'))[1]
+    assert type(row[1]) is int
+    assert type(row[2]) is float
+    assert type(row[3]) is bool
+
+
+def test_selected_columns_in_requested_order(workbook_path):
+    with Workbook(workbook_path) as workbook:
+        assert list(workbook.rows('Responses', [3, 0])) == [
+            ('Union', 'Region'), (True, 'Bay Area'), (False, '#N/A'), (None, '')]
+
+
+def test_without_shared_strings(tmp_path):
+    path = str(tmp_path / 'inline.xlsx')
+    sheet = (f'<worksheet {_NS}><sheetData>'
+             '<row><c t="inlineStr"><is><t>only</t></is></c></row></sheetData></worksheet>')
+    write_workbook(path, {'Sheet1': sheet}, shared_strings=None)
+    with Workbook(path) as workbook:
+        assert list(workbook.rows('Sheet1')) == [('only',)]
+
+
+def test_missing_sheet(workbook_path):
+    with Workbook(workbook_path) as workbook:
+        with pytest.raises(ValueError, match="Sheet 'Missing' not found"):
+            list(workbook.rows('Missing'))
+
+
+def test_not_a_workbook(tmp_path):
+    path = tmp_path / 'export.xlsx'
+    path.write_text('Region,PEPM\n')
+    with pytest.raises(ValueError, match='not an .xlsx workbook'):
+        Workbook(str(path))
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('readme.txt', 'not a workbook')
+    with pytest.raises(ValueError, match='not a readable .xlsx workbook'):
+        Workbook(str(path))